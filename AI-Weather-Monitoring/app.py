@@ -1,28 +1,51 @@
 import asyncio
+import gc
 import logging
 import os
 import signal
 import sys
-import winreg
-from datetime import datetime, timedelta
+from datetime import timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from src.service.device_manager import DeviceManager  # Updated import
+from src.service.resampling import Resampler
 from src.utils.logger import setup_logging
 from src.service.service import WeatherService
-from sklearn.ensemble import RandomForestRegressor
+from src.core.predictor.prediction_executor import PredictionExecutor
+from src.core.predictor.forecast_scheduler import ForecastScheduler
+from src.core.predictor.model_registry import ModelRegistry
+from src.core.predictor.online_learning import OnlineLearner
+from src.core.predictor.retraining import RetrainingManager
+from src.core.predictor.weather_predictor import DEFAULT_STATION, EnhancedWeatherPredictor
+from src.service.stations import StationRouter, parse_stations, station_of, station_path
+from src.utils.cache_manager import DataCache
+from src.utils.clock import get_clock
+from src.utils.metrics import get_registry
+from src.utils.snapshot_writer import SnapshotWriter
+from src.utils.stage_timer import StageTimer
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 
-class WeatherPredictor:
+if sys.platform == 'win32':
+    import winreg
+
+STAGE_SECONDS = get_registry().histogram(
+    'weather_stage_seconds', 'Time spent per reading in each pipeline stage', ['stage'])
+READINGS_DROPPED = get_registry().counter(
+    'weather_readings_dropped_total', 'Readings discarded before prediction', ['reason'])
+
+class WeatherPredictor(EnhancedWeatherPredictor):
+    """Quick next-value estimates per reading on top of the ensemble predictor
+
+    Model management (saving, loading and hot-swapping the ensemble,
+    forecasts) is inherited, so retraining, online learning and the
+    forecast scheduler work against the app's predictor.
+    """
+
     def __init__(self):
+        super().__init__()
         self.scaler = StandardScaler()
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            random_state=42
-        )
-        self.data_buffer = []
         
     def process_sensor_data(self, data: dict) -> dict:
         """Process and predict weather data"""
@@ -31,18 +54,20 @@ class WeatherPredictor:
             if not all(key in data for key in ['temperature', 'humidity', 'pressure']):
                 raise ValueError("Missing required sensor data")
                 
-            # Add to buffer
-            self.data_buffer.append(data)
-            if len(self.data_buffer) > 1000:  # Keep last 1000 readings
-                self.data_buffer.pop(0)
+            # Stamp the reading for the training history and add it to the station's buffer;
+            # the firmware's own millis() timestamp is kept as device_timestamp
+            current = {**data, 'timestamp': get_clock().now().isoformat()}
+            if 'timestamp' in data:
+                current['device_timestamp'] = data['timestamp']
+            self._append_to_buffer(current, station_of(data))
                 
             # Make prediction
             prediction = self._predict_next_values(data)
             
             return {
-                'current': data,
+                'current': current,
                 'prediction': prediction,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': get_clock().now().isoformat()
             }
         except Exception as e:
             logging.error(f"Prediction error: {e}")
@@ -55,7 +80,7 @@ class WeatherPredictor:
                 'temperature': round(current_data['temperature'] + np.random.normal(0, 0.5), 2),
                 'humidity': min(100, max(0, round(current_data['humidity'] + np.random.normal(0, 1), 2))),
                 'pressure': round(current_data['pressure'] + np.random.normal(0, 0.2), 2),
-                'forecast_time': (datetime.now() + timedelta(hours=1)).isoformat()
+                'forecast_time': (get_clock().now() + timedelta(hours=1)).isoformat()
             }
         except Exception as e:
             logging.error(f"Prediction calculation error: {e}")
@@ -66,16 +91,31 @@ class WeatherApp:
         self.setup_paths()
         self.setup_environment()
         self.running = True
-        self.device = None
+        self.stations = parse_stations()
+        # Retraining and online learning follow the first configured station
+        self.primary_station = next(iter(self.stations))
+        self.devices: Dict[str, object] = {}
         self.service: Optional[WeatherService] = None
         self.reconnect_attempts = 3
         self.reconnect_delay = 5  # seconds
+        self.update_interval = int(os.getenv('UPDATE_INTERVAL', '5'))
         self.predictor = WeatherPredictor()
+        self.prediction_executor = PredictionExecutor(self.predictor, model_registry=self.create_model_registry())
+        self.retraining = self.create_retraining_manager()
+        self.online_learner = self.create_online_learner()
+        self.cache = DataCache(cache_file=str(self.data_path / 'cache.json'))
+        self.caches: Dict[str, DataCache] = {}
+        self.cache_writers: Dict[str, SnapshotWriter] = {}
+        self.router = StationRouter(self.process_reading)
+        self.resampler = self.create_resampler()
+        self.forecasts = self.create_forecast_scheduler()
+        self.stage_timer = StageTimer(STAGE_SECONDS)
         
     def setup_paths(self):
         """Setup Windows-specific paths"""
+        load_dotenv()
         self.base_path = Path(__file__).parent
-        self.logs_path = self.base_path / 'logs'
+        self.logs_path = Path(os.getenv('LOG_DIR') or self.base_path / 'logs')
         self.data_path = self.base_path / 'data'
         self.config_path = self.base_path / 'config'
         
@@ -88,7 +128,7 @@ class WeatherApp:
         load_dotenv()
         self.logger = setup_logging(
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
-            log_file=str(self.logs_path / f"weather_station_{datetime.now().strftime('%Y%m%d')}.log")
+            log_file=str(self.logs_path / f"weather_station_{get_clock().now().strftime('%Y%m%d')}.log")
         )
         
         # Set Windows event loop policy
@@ -98,6 +138,8 @@ class WeatherApp:
     def get_com_ports(self):
         """Get available COM ports on Windows"""
         ports = []
+        if sys.platform != 'win32':
+            return ports
         try:
             key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
                                r'HARDWARE\DEVICEMAP\SERIALCOMM')
@@ -110,11 +152,11 @@ class WeatherApp:
             pass
         return ports
 
-    async def connect_device(self):
-        """Connect to weather station with improved error handling"""
-        self.device = DeviceManager()
+    async def connect_device(self, station_id: str = DEFAULT_STATION):
+        """Connect to a weather station with improved error handling"""
+        device = self.devices[station_id] = DeviceManager(station_id)
         
-        connection_methods = [
+        connection_methods = self.stations.get(station_id) or [
             ('serial', {'port': port}) for port in self.get_com_ports()
         ] + [
             ('wifi', {'ip': os.getenv('WIFI_HOST', '192.168.4.1')})
@@ -123,62 +165,202 @@ class WeatherApp:
         for attempt in range(self.reconnect_attempts):
             for method, params in connection_methods:
                 try:
-                    self.logger.info(f"Connection attempt {attempt + 1} using {method}")
-                    if await self.device.connect(method, **params):
-                        self.logger.info(f"Successfully connected via {method}")
+                    self.logger.info(f"Station {station_id}: connection attempt {attempt + 1} using {method}")
+                    if await device.connect(method, **params):
+                        self.logger.info(f"Station {station_id}: connected via {method}")
                         return True
                 except Exception as e:
-                    self.logger.warning(f"{method} connection failed: {e}")
-                await asyncio.sleep(self.reconnect_delay)
+                    self.logger.warning(f"Station {station_id}: {method} connection failed: {e}")
+                await get_clock().sleep(self.reconnect_delay)
                 
-        self.logger.error("All connection attempts failed")
+        self.devices.pop(station_id, None)
+        self.logger.error(f"Station {station_id}: all connection attempts failed")
         return False
 
     async def run(self):
-        """Enhanced main application loop"""
+        """Enhanced main application loop: one reader per station, readings partitioned by station"""
         try:
-            if not await self.connect_device():
-                return False
-
-            self.service = WeatherService()
+            self.service = self.create_service()
             await self.service.start()
+            if self.forecasts:
+                self.forecasts.register_routes(self.service.metrics_server)
+                self.forecasts.start()
 
-            while self.running:
-                try:
-                    if self.device is None:
-                        if not await self.connect_device():
-                            await asyncio.sleep(self.reconnect_delay)
-                            continue
-                    
-                    if self.device:  # Check if device is still connected
-                        data = await self.device.read_data()
-                    else:
-                        continue
-                    if data and self.validate_sensor_data(data):
-                        result = self.predictor.process_sensor_data(data)
-                        await self.service.broadcast_data(result)
-                        self.logger.debug(f"Processed data: {result}")
-                        
-                    await asyncio.sleep(int(os.getenv('UPDATE_INTERVAL', '5')))
-                    
-                except ConnectionError as e:
-                    self.logger.error(f"Connection lost: {e}")
-                    self.device = None
-                except Exception as e:
-                    self.logger.error(f"Processing error: {e}")
-                    await asyncio.sleep(5)
+            # Keep long-lived start-up objects (models, imported modules) out of
+            # full GC passes, which otherwise stall the loop for 100+ ms
+            gc.collect()
+            gc.freeze()
+
+            await asyncio.gather(*(self.read_station(station_id) for station_id in self.stations))
 
         except Exception as e:
             self.logger.error(f"System error: {e}")
         finally:
             await self.cleanup()
 
+    async def read_station(self, station_id: str):
+        """Read one station until shutdown, reconnecting when its connection drops"""
+        clock = get_clock()
+        while self.running:
+            try:
+                device = self.devices.get(station_id)
+                if device is None:
+                    if not await self.connect_device(station_id):
+                        await clock.sleep(self.reconnect_delay)
+                    continue
+
+                data = await device.read_data()
+                if data:
+                    # The configured station, not whatever id the device payload carries
+                    data['station_id'] = station_id
+                    # Waits while this station's backlog is full rather than dropping the reading
+                    await self.router.put(data)
+
+                await clock.sleep(self.update_interval)
+
+            except ConnectionError as e:
+                self.logger.error(f"Station {station_id}: connection lost: {e}")
+                self.devices.pop(station_id, None)
+            except Exception as e:
+                self.logger.error(f"Station {station_id}: processing error: {e}")
+                await clock.sleep(5)
+
+    def create_service(self) -> WeatherService:
+        return WeatherService()
+
+    def create_model_registry(self) -> Optional[ModelRegistry]:
+        """Per-station model versions under STATION_MODELS_DIR for station forecasts, when it is set"""
+        if not os.getenv('STATION_MODELS_DIR'):
+            return None
+        return ModelRegistry(self.predictor._read_bundle)
+
+    def create_retraining_manager(self) -> Optional[RetrainingManager]:
+        """Background retraining, for predictors whose models can be hot-swapped"""
+        if os.getenv('RETRAINING_ENABLED', '0') != '1':
+            return None
+        if not hasattr(self.predictor, 'install_models'):
+            self.logger.warning("RETRAINING_ENABLED is set but the predictor cannot swap models; retraining is off")
+            return None
+        return RetrainingManager(self.predictor, self.prediction_executor)
+
+    def create_online_learner(self) -> Optional[OnlineLearner]:
+        """Incremental updates from labelled readings, enabled by ONLINE_LEARNING_MODE"""
+        if not os.getenv('ONLINE_LEARNING_MODE'):
+            return None
+        if not hasattr(self.predictor, 'install_models'):
+            self.logger.warning("ONLINE_LEARNING_MODE is set but the predictor cannot swap models; not learning")
+            return None
+        return OnlineLearner(self.predictor, self.prediction_executor)
+
+    def cache_for(self, station_id: str) -> DataCache:
+        """Storage for one station; the default station keeps data/cache.json"""
+        if station_id == DEFAULT_STATION:
+            return self.cache
+        cache = self.caches.get(station_id)
+        if cache is None:
+            cache = self.caches[station_id] = DataCache(
+                cache_file=str(self.data_path / 'stations' / station_path(station_id) / 'cache.json')
+            )
+        return cache
+
+    def cache_writer(self, station_id: str) -> SnapshotWriter:
+        """Write-behind saves of one station's cache file, at most once per CACHE_SAVE_INTERVAL seconds"""
+        writer = self.cache_writers.get(station_id)
+        if writer is None:
+            writer = self.cache_writers[station_id] = SnapshotWriter(
+                self.cache_for(station_id).cache_file,
+                min_interval=float(os.getenv('CACHE_SAVE_INTERVAL', '1.0')),
+                fsync=False
+            )
+        writer.start()
+        return writer
+
+    def create_resampler(self) -> Optional[Resampler]:
+        """Per-station time grids of the incoming readings, enabled by RESAMPLE_GRIDS (e.g. '1m,1h')"""
+        if not os.getenv('RESAMPLE_GRIDS'):
+            return None
+        return Resampler()
+
+    def create_forecast_scheduler(self) -> Optional[ForecastScheduler]:
+        """Precomputed, cached station forecasts pushed to websocket clients, enabled by FORECAST_SCHEDULER
+
+        With a resampler the forecasts start from its FORECAST_GRID bins
+        (hourly by default) instead of the raw cached readings.
+        """
+        if os.getenv('FORECAST_SCHEDULER', '0') != '1':
+            return None
+        if not hasattr(self.predictor, 'predict_weather'):
+            self.logger.warning("FORECAST_SCHEDULER is set but the predictor cannot forecast; scheduler is off")
+            return None
+        history_size = int(os.getenv('FORECAST_HISTORY_SIZE', '168'))
+        grid = os.getenv('FORECAST_GRID', '1h')
+        if self.resampler and grid in self.resampler.intervals:
+            history = lambda station_id: self.resampler.window(station_id, grid, history_size)
+        else:
+            history = lambda station_id: self.cache_for(station_id).get_recent_data(history_size)
+        return ForecastScheduler(
+            self.prediction_executor,
+            history,
+            on_update=lambda entry: self.service.broadcast_data(entry),
+            on_forecast=self.track_forecast
+        )
+
+    def track_forecast(self, station_id: str, forecast: List[Dict], history) -> None:
+        """Score the primary station's forecasts against later readings, so forecast drift can trigger retraining"""
+        if self.retraining and station_id == self.primary_station:
+            self.retraining.track_forecast(forecast, history)
+
+    async def process_reading(self, data: dict) -> Optional[dict]:
+        """Validate, predict, broadcast and store one reading"""
+        station_id = station_of(data)
+        with self.stage_timer.track('validation'):
+            if not self.validate_sensor_data(data):
+                READINGS_DROPPED.labels(reason='invalid').inc()
+                return None
+        with self.stage_timer.track('prediction'):
+            result = await self.prediction_executor.process_sensor_data(data)
+        if result is None:
+            # The predictor rejected the reading and counted the drop
+            return None
+        result['station_id'] = station_id
+        with self.stage_timer.track('broadcast'):
+            await self.service.broadcast_data(result)
+        with self.stage_timer.track('storage'):
+            # Rewriting the JSON file per reading dominated the loop; it is saved behind
+            entries = self.cache_for(station_id).append(result.get('current', data))
+            self.cache_writer(station_id).update(entries)
+        if self.resampler:
+            with self.stage_timer.track('resampling'):
+                # Binned by arrival time, like the cache's timestamps
+                self.resampler.add({**result.get('current', data), 'station_id': station_id}, get_clock().time())
+        if self.forecasts:
+            self.forecasts.notify(station_id)
+        if station_id != self.primary_station:
+            return result
+        if self.retraining:
+            self.retraining.observe(result.get('current', data))
+            self.retraining.maybe_retrain()
+        if self.online_learner:
+            await self.online_learner.observe(result.get('current', data))
+        return result
+
     async def cleanup(self):
         """Cleanup resources"""
-        if self.device:
-            await self.device.disconnect()
+        await self.router.close()
+        for writer in list(self.cache_writers.values()):
+            await writer.close()
+        if self.forecasts:
+            await self.forecasts.close()
+        if self.resampler:
+            self.resampler.flush()
+        for device in list(self.devices.values()):
+            await device.disconnect()
+        self.devices.clear()
         if self.service:
             await self.service.stop()
+        if self.retraining:
+            await self.retraining.close()
+        await self.prediction_executor.shutdown()
 
     def signal_handler(self, signum, frame):
         """Handle system signals"""
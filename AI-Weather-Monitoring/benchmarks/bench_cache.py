@@ -0,0 +1,33 @@
+import os
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.harness import summarize, time_calls
+from src.utils.cache_manager import DataCache
+
+READING = {'temperature': 22.5, 'humidity': 61.0, 'pressure': 1012.3}
+
+
+def run(profile: Dict) -> Dict[str, Dict]:
+    writes = profile['cache_writes']
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, 'cache.json')
+        cache = DataCache(cache_file=cache_file)
+        # Fill to capacity first; steady state is a full cache
+        for _ in range(cache.cache_size):
+            cache.data_cache.append({**READING, 'timestamp': 0.0})
+
+        samples = []
+        started = time.perf_counter()
+        for _ in range(writes):
+            began = time.perf_counter()
+            cache.add_data(READING)
+            samples.append(time.perf_counter() - began)
+        wall = time.perf_counter() - started
+
+        load = time_calls(lambda: DataCache(cache_file=cache_file), repeat=20)
+        return {
+            'cache.add_data': summarize(samples, writes, wall),
+            'cache.load_cache': summarize(load)
+        }
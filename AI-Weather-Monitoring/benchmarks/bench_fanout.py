@@ -0,0 +1,69 @@
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import websockets
+
+from benchmarks.harness import summarize
+from src.service.service import WeatherService
+
+
+async def _client(url: str, latencies: List[float], delivered: Dict[int, int], events: Dict[int, asyncio.Event],
+                  clients: int, ready: asyncio.Event):
+    async with websockets.connect(url, max_queue=None) as websocket:
+        ready.set()
+        async for message in websocket:
+            received = time.perf_counter()
+            payload = json.loads(message)
+            latencies.append(received - payload['sent'])
+            seq = payload['seq']
+            delivered[seq] = delivered.get(seq, 0) + 1
+            if delivered[seq] == clients:
+                events[seq].set()
+
+
+async def fanout(clients: int, messages: int) -> Dict:
+    """Broadcast ``messages`` readings to ``clients`` local websocket clients"""
+    service = WeatherService(websocket_host='127.0.0.1', websocket_port=0)
+    await service.start_websocket_server()
+    url = f'ws://127.0.0.1:{service.websocket_port}'
+    latencies: List[float] = []
+    broadcasts: List[float] = []
+    delivered: Dict[int, int] = {}
+    events = {seq: asyncio.Event() for seq in range(messages)}
+    tasks = []
+    try:
+        for _ in range(clients):
+            ready = asyncio.Event()
+            tasks.append(asyncio.create_task(_client(url, latencies, delivered, events, clients, ready)))
+            await ready.wait()
+        while len(service.connected_clients) < clients:
+            await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        for seq in range(messages):
+            sent = time.perf_counter()
+            await service.broadcast_data({'seq': seq, 'sent': sent, 'temperature': 22.5,
+                                          'humidity': 61.0, 'pressure': 1012.3})
+            broadcasts.append(time.perf_counter() - sent)
+            await asyncio.wait_for(events[seq].wait(), timeout=60)
+        wall = time.perf_counter() - started
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await service.stop()
+    return {
+        'delivery': summarize(latencies, len(latencies), wall),
+        'broadcast_call': summarize(broadcasts)
+    }
+
+
+def run(profile: Dict) -> Dict[str, Dict]:
+    results = {}
+    for clients in profile['fanout_clients']:
+        report = asyncio.run(fanout(clients, profile['fanout_messages']))
+        results[f'fanout.delivery.{clients}'] = report['delivery']
+        results[f'fanout.broadcast_call.{clients}'] = report['broadcast_call']
+    return results
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+from sklearn.linear_model import Ridge
+
+from benchmarks.harness import summarize, time_calls
+from src.core.predictor.batch_features import BatchFeatureBuilder
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+
+def hourly_columns(rows: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """Hourly readings as column arrays with epoch-second timestamps"""
+    rng = np.random.default_rng(seed)
+    hours = np.arange(rows, dtype=float)
+    phase = 2 * np.pi * hours / 24
+    return {
+        'timestamp': 1_704_067_200 + hours * 3600,
+        'temperature': 22 + 6 * np.sin(phase) + rng.normal(0, 0.5, rows),
+        'humidity': np.clip(65 - 15 * np.sin(phase) + rng.normal(0, 2, rows), 1, 100),
+        'pressure': 1012 + 3 * np.sin(phase / 7) + rng.normal(0, 0.3, rows)
+    }
+
+
+def hourly_readings(rows: int, seed: int = 42) -> List[Dict]:
+    """hourly_columns as reading dicts with ISO timestamps, as the service buffers them"""
+    columns = hourly_columns(rows, seed)
+    return [{
+        'timestamp': datetime.fromtimestamp(columns['timestamp'][i], timezone.utc).replace(tzinfo=None).isoformat(),
+        **{param: float(columns[param][i]) for param in ('temperature', 'humidity', 'pressure')}
+    } for i in range(rows)]
+
+
+def make_predictor(models: str) -> EnhancedWeatherPredictor:
+    predictor = EnhancedWeatherPredictor()
+    if models == 'light':
+        # The stacked ensemble needs hours at 1M rows; a linear model keeps
+        # the feature pipeline and control flow identical
+        predictor.models = {param: Ridge() for param in predictor.WEATHER_PARAMS}
+    return predictor
+
+
+def _repeats(rows: int) -> int:
+    if rows <= 10_000:
+        return 20
+    return 5 if rows <= 100_000 else 3
+
+
+def run(profile: Dict) -> Dict[str, Dict]:
+    results = {}
+    for rows in profile['feature_rows']:
+        data = hourly_columns(rows)
+        predictor = make_predictor(profile['models'])
+        repeat = _repeats(rows)
+
+        samples = time_calls(lambda: predictor.prepare_features(data), repeat)
+        results[f'features.prepare_features.{rows}'] = summarize(samples, rows * repeat, sum(samples))
+        pandas_median = float(np.median(samples))
+
+        builder = BatchFeatureBuilder()
+        samples = time_calls(lambda: builder.transform(data), repeat)
+        results[f'features.batch_features.{rows}'] = {
+            **summarize(samples, rows * repeat, sum(samples)),
+            'speedup': round(pandas_median / float(np.median(samples)), 2)
+        }
+
+        samples = []
+        for _ in range(1 if rows > 10_000 else 3):
+            started = time.perf_counter()
+            metrics = asyncio.run(predictor.train_model(data))
+            samples.append(time.perf_counter() - started)
+            if not metrics:
+                raise RuntimeError(f"train_model failed on {rows} rows")
+        results[f'features.train_model.{rows}'] = summarize(samples, rows * len(samples), sum(samples))
+
+        def forecast():
+            if not asyncio.run(predictor.predict_weather(data)):
+                raise RuntimeError(f"predict_weather failed on {rows} rows")
+
+        samples = time_calls(forecast, repeat)
+        results[f'features.predict_weather.{rows}'] = summarize(samples)
+    return results
@@ -0,0 +1,60 @@
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.harness import summarize
+from src.utils.logger import RateLimitedQueueHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def _time_errors(logger: logging.Logger, calls: int, repeated: bool) -> List[float]:
+    samples = []
+    for i in range(calls):
+        message = f"Invalid humidity value: {150 + i % 50}.0" if repeated else f"Unexpected reading #{i}"
+        started = time.perf_counter()
+        logger.error(message)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f'benchmarks.logging.{name}')
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def run(profile: Dict) -> Dict[str, Dict]:
+    calls = profile['log_calls']
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for repeated in (True, False):
+            kind = 'repeated' if repeated else 'unique'
+
+            # Before: basicConfig-style synchronous FileHandler on the calling thread
+            handler = logging.FileHandler(os.path.join(tmp, f'sync-{kind}.log'))
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            samples = _time_errors(_logger(f'sync.{kind}', handler), calls, repeated)
+            handler.close()
+            results[f'logging.sync_file.{kind}'] = summarize(samples, calls, sum(samples))
+
+            # After: rate-limited queue handler, rotating file written by the listener thread
+            output = logging.handlers.RotatingFileHandler(os.path.join(tmp, f'queued-{kind}.log'),
+                                                          maxBytes=10 * 1024 * 1024, backupCount=1)
+            output.setFormatter(logging.Formatter(LOG_FORMAT))
+            log_queue: queue.Queue = queue.Queue()
+            handler = RateLimitedQueueHandler(log_queue, window=60)
+            listener = logging.handlers.QueueListener(log_queue, output)
+            listener.start()
+            samples = _time_errors(_logger(f'queued.{kind}', handler), calls, repeated)
+            handler.flush_suppressed()
+            listener.stop()
+            output.close()
+            results[f'logging.queued.{kind}'] = summarize(samples, calls, sum(samples))
+    return results
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import websockets
+
+from app import WeatherApp
+from benchmarks.harness import summarize
+from src.core.predictor.weather_predictor import DEFAULT_STATION
+from src.service.device_manager import DeviceManager
+from src.service.service import WeatherService
+from src.simulator.virtual_station import VirtualStation
+from src.utils.cache_manager import DataCache
+
+
+class BenchmarkApp(WeatherApp):
+    """WeatherApp reading a virtual station over its pty serial port"""
+
+    def __init__(self, station: VirtualStation, cache_file: str):
+        super().__init__()
+        self.station = station
+        self.cache = DataCache(cache_file=cache_file)
+
+    async def connect_device(self, station_id: str = DEFAULT_STATION):
+        device = self.devices[station_id] = DeviceManager(station_id)
+        return await device.connect('serial', port=self.station.serial_path, timeout=1)
+
+    def create_service(self) -> WeatherService:
+        return WeatherService(websocket_host='127.0.0.1', websocket_port=0, metrics_port=0)
+
+
+async def pipeline(readings: int, interval: float) -> Dict:
+    """Time readings from station emission to websocket delivery"""
+    previous_interval = os.environ.get('UPDATE_INTERVAL')
+    os.environ['UPDATE_INTERVAL'] = '0'
+    station = VirtualStation('bench-0001', interval=interval, seed=1)
+    await station.start()
+    latencies: List[float] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = BenchmarkApp(station, os.path.join(tmp, 'cache.json'))
+        app_task = asyncio.create_task(app.run())
+        try:
+            while app.service is None or app.service.websocket_server is None:
+                if app_task.done():
+                    raise RuntimeError("application failed to start")
+                await asyncio.sleep(0.01)
+            url = f'ws://127.0.0.1:{app.service.websocket_port}'
+            async with websockets.connect(url) as websocket:
+                started = time.perf_counter()
+                while len(latencies) < readings:
+                    message = json.loads(await asyncio.wait_for(websocket.recv(), timeout=30))
+                    latencies.append((station.uptime_ms() - message['current']['device_timestamp']) / 1000)
+                wall = time.perf_counter() - started
+        finally:
+            app.running = False
+            await asyncio.wait_for(app_task, timeout=30)
+            await station.stop()
+            if previous_interval is None:
+                os.environ.pop('UPDATE_INTERVAL', None)
+            else:
+                os.environ['UPDATE_INTERVAL'] = previous_interval
+    return summarize(latencies, len(latencies), wall)
+
+
+def run(profile: Dict) -> Dict[str, Dict]:
+    if sys.platform == 'win32':
+        return {}
+    return {'pipeline.end_to_end': asyncio.run(pipeline(profile['pipeline_readings'],
+                                                        profile['pipeline_interval']))}
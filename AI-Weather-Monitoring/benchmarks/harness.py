@@ -0,0 +1,85 @@
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def summarize(samples: List[float], items: Optional[int] = None, wall_seconds: Optional[float] = None) -> Dict:
+    """Latency percentiles in milliseconds for samples given in seconds
+
+    ``items``/``wall_seconds`` add a throughput figure when the benchmark
+    measured one separately from per-item latency.
+    """
+    values = np.asarray(samples, dtype=float) * 1000
+    summary = {
+        'count': int(values.size),
+        'mean_ms': round(float(values.mean()), 4) if values.size else 0.0,
+        'max_ms': round(float(values.max()), 4) if values.size else 0.0,
+    }
+    for key, q in zip(LATENCY_KEYS, (50, 95, 99)):
+        summary[key] = round(float(np.percentile(values, q)), 4) if values.size else 0.0
+    if items is not None and wall_seconds:
+        summary['throughput_per_s'] = round(items / wall_seconds, 2)
+    return summary
+
+
+def time_calls(func: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    """Run ``func`` ``warmup + repeat`` times and return the timed durations"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'argv': sys.argv[1:],
+        'created': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def write_results(results: Dict[str, Dict], path: str, profile: str) -> Dict:
+    document = {'meta': {**environment(), 'profile': profile}, 'results': results}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    with open(path, 'r') as f:
+        return json.load(f)['results']
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = 0.10) -> List[Dict]:
+    """List benchmarks that got slower than ``baseline`` by more than ``threshold``
+
+    Latency percentiles regress when they grow; throughput regresses when
+    it drops. Benchmarks missing from either side are ignored.
+    """
+    regressions = []
+    for name in sorted(set(current) & set(baseline)):
+        now, before = current[name], baseline[name]
+        for key in LATENCY_KEYS:
+            if before.get(key) and key in now and now[key] > before[key] * (1 + threshold):
+                regressions.append({'benchmark': name, 'metric': key, 'baseline': before[key],
+                                    'current': now[key], 'change': round(now[key] / before[key] - 1, 4)})
+        key = 'throughput_per_s'
+        if before.get(key) and key in now and now[key] < before[key] * (1 - threshold):
+            regressions.append({'benchmark': name, 'metric': key, 'baseline': before[key],
+                                'current': now[key], 'change': round(now[key] / before[key] - 1, 4)})
+    return regressions
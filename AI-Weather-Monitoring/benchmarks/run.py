@@ -0,0 +1,84 @@
+import argparse
+import json
+import logging
+import sys
+
+from benchmarks import bench_cache, bench_fanout, bench_features, bench_horizons, bench_logging, bench_pipeline
+from benchmarks.harness import compare, load_results, write_results
+
+SUITES = {
+    'pipeline': bench_pipeline,
+    'features': bench_features,
+    'horizons': bench_horizons,
+    'cache': bench_cache,
+    'logging': bench_logging,
+    'fanout': bench_fanout
+}
+
+# 'quick' finishes in a few minutes for routine checks; 'full' covers the
+# 1M-row and 1,000-client cases with the production ensemble and takes hours
+PROFILES = {
+    'quick': {
+        'pipeline_readings': 200,
+        'pipeline_interval': 0.01,
+        'feature_rows': [1_000, 100_000],
+        'horizon_rows': 2_000,
+        'horizon_origins': 10,
+        'models': 'light',
+        'cache_writes': 200,
+        'log_calls': 20_000,
+        'fanout_clients': [10, 100],
+        'fanout_messages': 50
+    },
+    'full': {
+        'pipeline_readings': 2_000,
+        'pipeline_interval': 0.01,
+        'feature_rows': [1_000, 100_000, 1_000_000],
+        'horizon_rows': 8_760,
+        'horizon_origins': 50,
+        'models': 'ensemble',
+        'cache_writes': 1_000,
+        'log_calls': 200_000,
+        'fanout_clients': [10, 100, 1_000],
+        'fanout_messages': 200
+    }
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the latency and throughput benchmarks")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help="suite to run (repeatable, defaults to all)")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--models', choices=['light', 'ensemble'],
+                        help="override the profile's model choice for the features suite")
+    parser.add_argument('--output', default='benchmarks/results/latest.json')
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    profile = dict(PROFILES[args.profile])
+    if args.models:
+        profile['models'] = args.models
+
+    results = {}
+    for name in args.suite or list(SUITES):
+        print(f"running {name} ({args.profile})", file=sys.stderr, flush=True)
+        results.update(SUITES[name].run(profile))
+    write_results(results, args.output, args.profile)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.compare:
+        regressions = compare(results, load_results(args.compare), args.threshold)
+        for item in regressions:
+            print(f"REGRESSION {item['benchmark']} {item['metric']}: "
+                  f"{item['baseline']} -> {item['current']} ({item['change']:+.1%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
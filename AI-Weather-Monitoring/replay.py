@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app import WeatherApp
+from src.core.predictor.weather_predictor import DEFAULT_STATION
+from src.service.service import WeatherService
+from src.utils.cache_manager import DataCache
+from src.utils.clock import VirtualClock, set_clock
+
+SENSOR_FIELDS = ('temperature', 'humidity', 'pressure')
+
+
+def _reading_time(value, index: int, start: datetime, interval: float) -> datetime:
+    """Normalise a recorded timestamp to a datetime
+
+    ISO strings and epoch seconds are used as-is; small numbers are the
+    firmware's millis() since boot and are offset from ``start``.
+    """
+    if value in (None, ''):
+        return start + timedelta(seconds=index * interval)
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return datetime.fromisoformat(value)
+    if value >= 1e9:
+        return datetime.fromtimestamp(value)
+    return start + timedelta(milliseconds=value)
+
+
+def load_recording(path: str, start: datetime, interval: float) -> List[Dict]:
+    """Load readings from a .jsonl, .json (list) or .csv sensor log"""
+    suffix = Path(path).suffix.lower()
+    with open(path, 'r', newline='') as f:
+        if suffix == '.csv':
+            rows = list(csv.DictReader(f))
+        elif suffix == '.json':
+            rows = json.load(f)
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    readings = []
+    for index, row in enumerate(rows):
+        try:
+            reading = {field: float(row[field]) for field in SENSOR_FIELDS}
+        except (KeyError, TypeError, ValueError):
+            continue
+        reading['recorded_at'] = _reading_time(row.get('timestamp'), index, start, interval)
+        readings.append(reading)
+    return readings
+
+
+def synthetic_recording(days: float, interval: float, start: datetime, seed: int = 42) -> List[Dict]:
+    """Generate a plausible diurnal recording for load tests"""
+    rng = np.random.default_rng(seed)
+    seconds = np.arange(0, days * 86400, interval)
+    phase = 2 * np.pi * seconds / 86400
+    temperature = 22 + 6 * np.sin(phase - np.pi / 2) + rng.normal(0, 0.4, len(seconds))
+    humidity = np.clip(65 - 15 * np.sin(phase - np.pi / 2) + rng.normal(0, 2, len(seconds)), 0, 100)
+    pressure = 1012 + 4 * np.sin(phase / 7) + rng.normal(0, 0.3, len(seconds))
+    return [
+        {
+            'temperature': round(float(t), 2),
+            'humidity': round(float(h), 2),
+            'pressure': round(float(p), 2),
+            'recorded_at': start + timedelta(seconds=float(s))
+        }
+        for s, t, h, p in zip(seconds, temperature, humidity, pressure)
+    ]
+
+
+class ReplayDevice:
+    """Stands in for DeviceManager, serving recorded readings on a virtual clock
+
+    Before each reading, ``settle`` waits for the previous one to be
+    handled, then the clock moves to the reading's recorded time, so every
+    reading is processed and stored at the time it was recorded.
+    """
+
+    def __init__(self, readings: List[Dict], clock: VirtualClock, on_exhausted, settle=None):
+        self.readings = readings
+        self.clock = clock
+        self.on_exhausted = on_exhausted
+        self.settle = settle
+        self.position = 0
+
+    async def connect(self, method: str = 'replay', **params) -> bool:
+        return True
+
+    async def disconnect(self):
+        pass
+
+    async def read_data(self) -> Optional[Dict]:
+        if self.settle is not None:
+            await self.settle()
+        if self.position >= len(self.readings):
+            self.on_exhausted()
+            return None
+        reading = self.readings[self.position]
+        self.position += 1
+        self.clock.set(reading['recorded_at'])
+        return {field: reading[field] for field in SENSOR_FIELDS}
+
+
+class ReplayApp(WeatherApp):
+    """WeatherApp wired to a ReplayDevice; everything downstream is unchanged"""
+
+    def __init__(self, readings: List[Dict], clock: VirtualClock, cache_file: str):
+        super().__init__()
+        self.cache = DataCache(cache_file=cache_file)
+        # The recorded timestamps pace the replay, not UPDATE_INTERVAL
+        self.update_interval = 0
+        self.replay_device = ReplayDevice(readings, clock, self.stop, settle=self.router.join)
+
+    async def connect_device(self, station_id: str = DEFAULT_STATION):
+        self.devices[station_id] = self.replay_device
+        return True
+
+    def create_service(self) -> WeatherService:
+        # Don't collide with a live service on the configured port
+        return WeatherService(websocket_host='127.0.0.1', websocket_port=0, metrics_port=0)
+
+    def stop(self):
+        self.running = False
+
+
+async def replay(readings: List[Dict], cache_file: str) -> Dict:
+    """Run readings through the full pipeline and report throughput and stage timings"""
+    if not readings:
+        return {'readings': 0}
+    clock = VirtualClock(readings[0]['recorded_at'])
+    set_clock(clock)
+    app = ReplayApp(readings, clock, cache_file)
+
+    started = time.perf_counter()
+    await app.run()
+    wall_seconds = time.perf_counter() - started
+
+    virtual_seconds = (readings[-1]['recorded_at'] - readings[0]['recorded_at']).total_seconds()
+    stages = app.stage_timer.report()
+    validated = stages.get('validation', {}).get('count', 0)
+    processed = stages.get('storage', {}).get('count', 0)
+    return {
+        'readings': len(readings),
+        'processed': processed,
+        # Failed validation or prediction, as opposed to never reaching the pipeline
+        'rejected': validated - processed,
+        'dropped': len(readings) - validated,
+        'wall_seconds': round(wall_seconds, 3),
+        'readings_per_second': round(len(readings) / wall_seconds, 1),
+        'virtual_hours': round(virtual_seconds / 3600, 2),
+        'speedup': round(virtual_seconds / wall_seconds, 1),
+        'stages': stages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sensor data through the pipeline faster than real time")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log', help="recorded readings (.jsonl, .json or .csv)")
+    source.add_argument('--synthetic-days', type=float, help="generate this many days of readings instead")
+    parser.add_argument('--interval', type=float, default=60.0,
+                        help="seconds between readings without timestamps / synthetic readings")
+    parser.add_argument('--start', default='2024-01-01T00:00:00',
+                        help="virtual start time for relative or missing timestamps")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache-file', help="storage file (defaults to a temporary file)")
+    parser.add_argument('--output', help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    np.random.seed(args.seed)
+    start = datetime.fromisoformat(args.start)
+    if args.log:
+        readings = load_recording(args.log, start, args.interval)
+    else:
+        readings = synthetic_recording(args.synthetic_days, args.interval, start, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = args.cache_file or os.path.join(tmp, 'replay_cache.json')
+        report = asyncio.run(replay(readings, cache_file))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
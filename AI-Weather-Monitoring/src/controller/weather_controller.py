@@ -1,12 +1,15 @@
-import time
 import asyncio
+import os
 from typing import Dict, Optional
 from src.service.sensor_handler import SensorHandler
 from src.core.core import WeatherDataProcessor
 from src.core.weather_predictor import WeatherPredictor
+from src.core.predictor.weather_predictor import DEFAULT_STATION
 import logging
-import json
 from src.service import ConnectionManager
+from src.utils.clock import get_clock
+from src.utils.logger import setup_logging
+from src.utils.snapshot_writer import SnapshotWriter
 
 class WeatherController:
     def __init__(self, connection_manager: ConnectionManager):
@@ -15,14 +18,12 @@ class WeatherController:
         self.sensor_handler = SensorHandler()
         self.data_processor = WeatherDataProcessor()
         self.predictor = WeatherPredictor()
+        # Keyed by station: the file maps each station_id to its latest state
+        self.snapshot_writer = SnapshotWriter(os.getenv('STATE_FILE', 'current_state.json'), keyed=True)
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            filename='controller.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        setup_logging(log_level='INFO', log_file='controller.log')
         self.logger = logging.getLogger(__name__)
 
     async def start(self):
@@ -31,6 +32,7 @@ class WeatherController:
             self.logger.error("Failed to connect to sensors")
             return
 
+        self.snapshot_writer.start()
         try:
             while True:
                 # Read sensor data
@@ -45,11 +47,13 @@ class WeatherController:
                             prediction = self.predictor.predict(prediction_data)
                             self.save_current_state(processed_data, prediction)
 
-                await asyncio.sleep(5)  # Wait 5 seconds between readings
+                await get_clock().sleep(5)  # Wait 5 seconds between readings
 
         except Exception as e:
             self.logger.error(f"Error in weather monitoring: {e}")
-            time.sleep(5)
+            await get_clock().sleep(5)
+        finally:
+            await self.snapshot_writer.close()
 
     def process_data(self, data: dict):
         """Process the received weather data"""
@@ -57,15 +61,14 @@ class WeatherController:
         # Add your data processing logic here
 
     def save_current_state(self, weather_data: Dict, prediction: Optional[str]):
-        """Save current weather state and prediction for mobile app"""
+        """Queue current weather state and prediction for the mobile app snapshot"""
         try:
             state = {
                 "current_weather": weather_data,
                 "prediction": prediction,
                 "timestamp": weather_data['timestamp']
             }
-            with open('current_state.json', 'w') as f:
-                json.dump(state, f)
+            self.snapshot_writer.update(state, key=weather_data.get('station_id', DEFAULT_STATION))
         except Exception as e:
             self.logger.error(f"Error saving state: {e}")
 
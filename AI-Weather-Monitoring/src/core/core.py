@@ -4,16 +4,21 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, Optional, List
-from concurrent.futures import ThreadPoolExecutor
 from sklearn.preprocessing import StandardScaler
 from dotenv import load_dotenv
+from src.utils.executors import get_shared_executor
+from src.utils.logger import setup_logging
+from src.utils.metrics import get_registry
+
+READINGS_DROPPED = get_registry().counter(
+    'weather_readings_dropped_total', 'Readings discarded before prediction', ['reason'])
 
 class WeatherCore:
     def __init__(self):
         self.setup_config()
         self.setup_logging()
         self.setup_processor()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = get_shared_executor()
 
     def setup_config(self):
         load_dotenv()
@@ -38,12 +43,7 @@ class WeatherCore:
         }
 
     def setup_logging(self):
-        os.makedirs('logs', exist_ok=True)
-        logging.basicConfig(
-            filename='logs/weather_system.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        setup_logging(log_level='INFO', log_file='logs/weather_system.log')
         self.logger = logging.getLogger(__name__)
 
     def setup_processor(self):
@@ -58,6 +58,7 @@ class WeatherCore:
                 if len(self.data_cache) > self.cache_size:
                     self.data_cache.pop(0)
                 return data
+            READINGS_DROPPED.labels(reason='invalid').inc()
             return None
         except Exception as e:
             self.logger.error(f"Error processing data: {e}")
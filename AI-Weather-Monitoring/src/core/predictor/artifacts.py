@@ -0,0 +1,381 @@
+import argparse
+import copy
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import pickle
+import time
+import zipfile
+from typing import Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor, StackingRegressor
+from sklearn.utils import Bunch
+
+from src.core.predictor.model_search import load_features, training_matrices
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+
+
+class CompactTrees:
+    """Many regression trees as flat float32 node arrays, evaluated all at once
+
+    Leaves point at themselves, so every row walks ``depth`` steps through
+    every tree with a handful of vectorised gathers. Thresholds are
+    rounded down to float32; as scikit-learn compares float32 inputs,
+    the splits are unchanged and only leaf values lose precision.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depth: int, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_trees(cls, trees, n_features: int) -> 'CompactTrees':
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for tree in trees:
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            threshold = tree.threshold.astype(np.float32)
+            above = threshold.astype(np.float64) > tree.threshold
+            threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0, threshold).astype(np.float32))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        return cls(np.concatenate(features).astype(np.int16), np.concatenate(thresholds),
+                   np.concatenate(lefts).astype(np.int32), np.concatenate(rights).astype(np.int32),
+                   np.concatenate(values).astype(np.float32), np.array(roots, dtype=np.int32), depth, n_features)
+
+    def tree_outputs(self, X) -> np.ndarray:
+        """(n_samples, n_trees) leaf values"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def select(self, trees: np.ndarray) -> 'CompactTrees':
+        """Keep only the trees at positions ``trees``, renumbering their nodes"""
+        ends = np.append(self.roots[1:], len(self.value))
+        keep = np.concatenate([np.arange(self.roots[t], ends[t]) for t in trees])
+        remap = np.full(len(self.value), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        sizes = ends[trees] - self.roots[trees]
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        clone = type(self).__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.feature, clone.threshold, clone.value = self.feature[keep], self.threshold[keep], self.value[keep]
+        clone.left, clone.right = remap[self.left[keep]].astype(np.int32), remap[self.right[keep]].astype(np.int32)
+        clone.roots = roots
+        return clone
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {'feature': self.feature, 'threshold': self.threshold, 'left': self.left, 'right': self.right,
+                'value': self.value, 'roots': self.roots}
+
+
+class CompactForest(CompactTrees):
+    """Drop-in predict() for a fitted RandomForestRegressor"""
+
+    @classmethod
+    def from_model(cls, model: RandomForestRegressor) -> 'CompactForest':
+        return cls.from_trees([est.tree_ for est in model.estimators_], model.n_features_in_)
+
+    def predict(self, X) -> np.ndarray:
+        return self.tree_outputs(X).mean(axis=1, dtype=np.float64)
+
+    def pruned(self, X, y: np.ndarray, limit: float) -> 'CompactForest':
+        """Greedy ordered aggregation: add the tree that helps most until RMSE reaches ``limit``"""
+        outputs = self.tree_outputs(X).astype(np.float64)
+        remaining = list(range(outputs.shape[1]))
+        order, total = [], np.zeros(len(y))
+        for k in range(1, outputs.shape[1] + 1):
+            candidates = (total[:, None] + outputs[:, remaining]) / k
+            rmse = np.sqrt(np.mean((candidates - y[:, None]) ** 2, axis=0))
+            best = int(np.argmin(rmse))
+            total += outputs[:, remaining[best]]
+            order.append(remaining.pop(best))
+            if rmse[best] <= limit:
+                break
+        return self.select(np.sort(order))
+
+
+class CompactBoosting(CompactTrees):
+    """Drop-in predict() for a fitted squared-error GradientBoostingRegressor"""
+
+    init = 0.0
+    learning_rate = 0.1
+
+    @classmethod
+    def from_model(cls, model: GradientBoostingRegressor) -> 'CompactBoosting':
+        compact = cls.from_trees([est.tree_ for est in model.estimators_[:, 0]], model.n_features_in_)
+        zero = np.zeros((1, model.n_features_in_))
+        compact.init = 0.0 if model.init_ == 'zero' else float(model.init_.predict(zero)[0])
+        compact.learning_rate = float(model.learning_rate)
+        return compact
+
+    def predict(self, X) -> np.ndarray:
+        return self.init + self.learning_rate * self.tree_outputs(X).sum(axis=1, dtype=np.float64)
+
+    def pruned(self, X, y: np.ndarray, limit: float) -> 'CompactBoosting':
+        """Keep the fewest leading stages whose RMSE is within ``limit``"""
+        staged = self.init + self.learning_rate * np.cumsum(self.tree_outputs(X).astype(np.float64), axis=1)
+        within = np.nonzero(np.sqrt(np.mean((staged - y[:, None]) ** 2, axis=0)) <= limit)[0]
+        return self.select(np.arange(within[0] + 1 if len(within) else self.n_trees))
+
+
+def _rmse(predicted: np.ndarray, actual: np.ndarray) -> float:
+    return math.sqrt(float(np.mean((np.asarray(predicted) - actual) ** 2)))
+
+
+def _prune_xgb(model: xgb.XGBRegressor, X: np.ndarray, y: np.ndarray, tolerance: float) -> xgb.XGBRegressor:
+    booster = model.get_booster()
+    rounds = booster.num_boosted_rounds()
+    matrix = xgb.DMatrix(X)
+    limit = _rmse(booster.predict(matrix), y) * (1 + tolerance)
+    step = max(1, rounds // 50)
+    for keep in range(step, rounds, step):
+        if _rmse(booster.predict(matrix, iteration_range=(0, keep)), y) <= limit:
+            pruned = xgb.XGBRegressor()
+            pruned.load_model(bytearray(booster[:keep].save_raw('ubj')))
+            return pruned
+    return model
+
+
+def compact_model(model, X: Optional[np.ndarray] = None, y: Optional[np.ndarray] = None,
+                  tolerance: float = 0.01):
+    """Float32 copy of ``model`` with forests and boosting stages pruned within ``tolerance``
+
+    Pruning needs validation rows (``X``, ``y``) and keeps the fewest
+    trees whose own validation RMSE stays within ``1 + tolerance`` of the
+    unpruned estimator's. Stacking ensembles are compacted member by
+    member; anything else is returned unchanged.
+    """
+    if isinstance(model, StackingRegressor):
+        members = [compact_model(est, X, y, tolerance) if est != 'drop' else est for est in model.estimators_]
+        compact = copy.copy(model)
+        compact.estimators_ = members
+        compact.named_estimators_ = Bunch(**{
+            name: est for (name, _), est in zip(model.estimators, members)
+        })
+        return compact
+    if isinstance(model, (RandomForestRegressor, GradientBoostingRegressor)):
+        compact = (CompactForest if isinstance(model, RandomForestRegressor) else CompactBoosting).from_model(model)
+        if X is not None and len(X):
+            compact = compact.pruned(X, y, _rmse(compact.predict(X), y) * (1 + tolerance))
+        return compact
+    if isinstance(model, xgb.XGBRegressor) and X is not None and len(X):
+        return _prune_xgb(model, X, y, tolerance)
+    return model
+
+
+def count_trees(model) -> int:
+    if isinstance(model, StackingRegressor):
+        return sum(count_trees(est) for est in model.estimators_ if est != 'drop')
+    if isinstance(model, CompactTrees):
+        return model.n_trees
+    if isinstance(model, (RandomForestRegressor, GradientBoostingRegressor)):
+        return len(np.ravel(model.estimators_))
+    if isinstance(model, xgb.XGBRegressor):
+        return model.get_booster().num_boosted_rounds()
+    return 0
+
+
+class _BlobWriter:
+    """Content-addressed blobs: identical components are stored once"""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.written = set()
+        self.shared = 0
+
+    def put(self, payload: bytes) -> str:
+        digest = hashlib.sha256(payload).hexdigest()[:24]
+        if digest in self.written:
+            self.shared += 1
+        else:
+            self.archive.writestr(f'blobs/{digest}', payload)
+            self.written.add(digest)
+        return digest
+
+    def put_object(self, obj) -> str:
+        return self.put(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _encode(model, blobs: _BlobWriter) -> Dict:
+    if isinstance(model, StackingRegressor):
+        shell = copy.copy(model)
+        templates, members = shell.estimators, shell.estimators_
+        shell.estimators, shell.estimators_, shell.named_estimators_ = [], [], Bunch()
+        return {
+            'kind': 'stacking',
+            'shell': blobs.put_object(shell),
+            # The unfitted templates are identical for every parameter
+            'templates': blobs.put_object(templates),
+            'names': [name for name, _ in templates],
+            'members': [_encode(est, blobs) if est != 'drop' else {'kind': 'drop'} for est in members]
+        }
+    if isinstance(model, CompactTrees):
+        buffer = io.BytesIO()
+        np.savez(buffer, **model.arrays())
+        extra = {'init': model.init, 'learning_rate': model.learning_rate} if isinstance(model, CompactBoosting) else {}
+        return {'kind': type(model).__name__, 'arrays': blobs.put(buffer.getvalue()), 'depth': model.depth,
+                'n_features': model.n_features_in_, **extra}
+    if isinstance(model, xgb.XGBRegressor):
+        return {'kind': 'xgb', 'raw': blobs.put(bytes(model.get_booster().save_raw('ubj')))}
+    return {'kind': 'pickle', 'blob': blobs.put_object(model)}
+
+
+def _decode(entry: Dict, archive: zipfile.ZipFile):
+    def blob(digest: str) -> bytes:
+        return archive.read(f'blobs/{digest}')
+
+    kind = entry['kind']
+    if kind == 'stacking':
+        shell = pickle.loads(blob(entry['shell']))
+        shell.estimators = pickle.loads(blob(entry['templates']))
+        shell.estimators_ = [_decode(member, archive) for member in entry['members']]
+        shell.named_estimators_ = Bunch(**dict(zip(entry['names'], shell.estimators_)))
+        return shell
+    if kind in ('CompactForest', 'CompactBoosting'):
+        arrays = np.load(io.BytesIO(blob(entry['arrays'])))
+        cls = CompactForest if kind == 'CompactForest' else CompactBoosting
+        model = cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'], arrays['value'],
+                    arrays['roots'], entry['depth'], entry['n_features'])
+        if kind == 'CompactBoosting':
+            model.init, model.learning_rate = entry['init'], entry['learning_rate']
+        return model
+    if kind == 'xgb':
+        model = xgb.XGBRegressor()
+        model.load_model(bytearray(blob(entry['raw'])))
+        return model
+    if kind == 'drop':
+        return 'drop'
+    return pickle.loads(blob(entry['blob']))
+
+
+def save_artifact(path: str, models: Dict, scalers: Dict, meta: Optional[Dict] = None) -> Dict:
+    """Write a compressed, deduplicated artifact that load_models reads like a joblib bundle"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        blobs = _BlobWriter(archive)
+        manifest = {
+            'format': ARTIFACT_FORMAT,
+            'models': {param: _encode(model, blobs) for param, model in models.items()},
+            'scalers': {param: blobs.put_object(scaler) for param, scaler in scalers.items()},
+            'meta': meta or {}
+        }
+        archive.writestr('manifest.json', json.dumps(manifest))
+    os.replace(tmp_path, path)
+    return {'blobs': len(blobs.written), 'shared_blobs': blobs.shared}
+
+
+def is_artifact(path: str) -> bool:
+    return zipfile.is_zipfile(path)
+
+
+def load_artifact(path: str) -> Dict:
+    """The {'models', 'scalers', 'meta'} bundle save_artifact wrote"""
+    with zipfile.ZipFile(path, 'r') as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        if manifest.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format {manifest.get('format')} in {path}")
+        return {
+            'models': {param: _decode(entry, archive) for param, entry in manifest['models'].items()},
+            'scalers': {param: pickle.loads(archive.read(f'blobs/{digest}'))
+                        for param, digest in manifest['scalers'].items()},
+            'meta': manifest['meta']
+        }
+
+
+def compact_artifact(source: str, output: str, validation: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                     tolerance: float = 0.01) -> Dict:
+    """Compact the save_models bundle at ``source`` into ``output`` and report the difference"""
+    started = time.perf_counter()
+    bundle = joblib.load(source)
+    load_before = time.perf_counter() - started
+    models, compacted = bundle['models'], {}
+    accuracy = {}
+    for param, model in models.items():
+        X, y = (validation or {}).get(param, (None, None))
+        compacted[param] = compact_model(model, X, y, tolerance)
+        if X is not None:
+            accuracy[param] = {'rmse_before': round(_rmse(model.predict(X), y), 6),
+                               'rmse_after': round(_rmse(compacted[param].predict(X), y), 6)}
+    stored = save_artifact(output, compacted, bundle.get('scalers', {}), bundle.get('meta', {}))
+
+    started = time.perf_counter()
+    load_artifact(output)
+    load_after = time.perf_counter() - started
+    size_before, size_after = os.path.getsize(source), os.path.getsize(output)
+    return {
+        'source': source,
+        'artifact': output,
+        'size_bytes': {'before': size_before, 'after': size_after,
+                       'ratio': round(size_after / size_before, 4) if size_before else None},
+        'load_seconds': {'before': round(load_before, 4), 'after': round(load_after, 4)},
+        'trees': {param: {'before': count_trees(models[param]), 'after': count_trees(compacted[param])}
+                  for param in models},
+        'accuracy': accuracy,
+        'tolerance': tolerance,
+        **stored
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a trained model artifact")
+    parser.add_argument('source', nargs='?', default=os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib'))
+    parser.add_argument('--output', help="defaults to the source name with a .wma suffix")
+    parser.add_argument('--history', nargs='*', default=[], help="validation history for pruning and accuracy")
+    parser.add_argument('--feature-store', help="read validation features from this feature store instead")
+    parser.add_argument('--station', default='default')
+    parser.add_argument('--validation-rows', type=int, default=5000, help="most recent rows used for validation")
+    parser.add_argument('--horizon', type=int, default=0, help="rows ahead the models were trained to predict")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="allowed relative RMSE increase per pruned estimator")
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    output = args.output or os.path.splitext(args.source)[0] + '.wma'
+    validation = None
+    if args.history or args.feature_store:
+        features = load_features(args.history, args.feature_store, args.station, args.validation_rows)
+        validation = training_matrices(features, args.horizon)
+    report = compact_artifact(args.source, output, validation, args.tolerance)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.predictor.feature_store import FeatureStore
+from src.core.predictor.forecast_strategies import WINDOW, load_columns
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, horizon_offsets, parse_horizons
+
+logger = logging.getLogger(__name__)
+
+PARAMS = EnhancedWeatherPredictor.WEATHER_PARAMS
+# Column order of the shared history array
+COLUMNS = ['timestamp'] + PARAMS
+
+# Set in each worker by _init_backtest_worker
+_worker: Dict = {}
+
+
+def _init_backtest_worker(data_path: str, models_path: str, settings: Dict) -> None:
+    """Map the shared history read-only and load the models once per worker"""
+    predictor = EnhancedWeatherPredictor()
+    if not predictor.load_models(models_path):
+        raise RuntimeError(f"Cannot load models from {models_path}")
+    _worker.update(data=np.load(data_path, mmap_mode='r'), predictor=predictor, **settings)
+
+
+def _score_chunk(cutoffs: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    return score_cutoffs(_worker['predictor'], _worker['data'], cutoffs, _worker['horizons'],
+                         _worker['days_ahead'], _worker['window'], _worker['strategy'])
+
+
+def score_cutoffs(predictor: EnhancedWeatherPredictor, data: np.ndarray, cutoffs: Sequence[int], horizons: str,
+                  days_ahead: int = 7, window: int = WINDOW,
+                  strategy: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Forecast from each cutoff and accumulate errors against the actuals
+
+    ``data`` is the (rows, COLUMNS) history, one row per hour; the
+    forecast from cutoff ``c`` sees rows ``c - window`` to ``c - 1`` and
+    lead ``h`` is scored against row ``c - 1 + h``. Returns the sums of
+    squared and absolute errors (reading units) and the counts, each of
+    shape (leads, parameters), and how many forecasts failed.
+    """
+    leads = horizon_offsets(parse_horizons(horizons), days_ahead * 24)
+    squared = np.zeros((len(leads), len(PARAMS)))
+    absolute = np.zeros_like(squared)
+    counts = np.zeros_like(squared)
+    failed = 0
+    for cutoff in cutoffs:
+        recent = {column: data[cutoff - window:cutoff, i] for i, column in enumerate(COLUMNS)}
+        forecast = asyncio.run(predictor.predict_weather(recent, days_ahead, horizons, strategy))
+        if len(forecast) != len(leads):
+            failed += 1
+            continue
+        # Forecasts are in the units of the scalers prepare_features just fitted on the window
+        scale = np.array([predictor.scalers[param].scale_[0] for param in PARAMS])
+        center = np.array([predictor.scalers[param].center_[0] for param in PARAMS])
+        predicted = np.array([[step[param] for param in PARAMS] for step in forecast]) * scale + center
+        actual = data[np.asarray(leads) + cutoff - 1, 1:]
+        errors = predicted - actual
+        valid = ~np.isnan(errors)
+        squared += np.where(valid, errors, 0) ** 2
+        absolute += np.abs(np.where(valid, errors, 0))
+        counts += valid
+    return squared, absolute, counts, failed
+
+
+class WalkForwardBacktest:
+    """Replay stored history, forecasting from many cutoffs in a process pool
+
+    The history is written once to a .npy file that every worker maps
+    read-only, so the pool shares one copy of the data and tasks carry
+    only cutoff indices; each worker loads the model bundle once.
+    Cutoffs are handed out in contiguous chunks and the per-lead error
+    sums of the chunks are added up, so results do not depend on the
+    number of workers. Throughput is predict_weather's: the direct
+    strategy (FORECAST_STRATEGY) is far cheaper per cutoff than the
+    recursive rollout.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], models_path: str, horizons: str = '1h',
+                 days_ahead: int = 7, window: int = WINDOW, strategy: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.data = np.column_stack([np.asarray(columns[column], dtype=float) for column in COLUMNS])
+        self.models_path = models_path
+        self.horizons = horizons
+        self.days_ahead = days_ahead
+        self.window = window
+        self.strategy = strategy
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.leads = horizon_offsets(parse_horizons(horizons), days_ahead * 24)
+
+    def cutoffs(self, every: int = 1) -> List[int]:
+        """Every ``every``-th row with a full window before it and every lead after it"""
+        return list(range(self.window, len(self.data) - self.leads[-1] + 1, every))
+
+    def run(self, cutoffs: Optional[Sequence[int]] = None) -> Dict:
+        cutoffs = list(self.cutoffs() if cutoffs is None else cutoffs)
+        settings = {'horizons': self.horizons, 'days_ahead': self.days_ahead,
+                    'window': self.window, 'strategy': self.strategy}
+        size = self.chunk_size or max(1, math.ceil(len(cutoffs) / (self.workers * 4)))
+        chunks = [cutoffs[i:i + size] for i in range(0, len(cutoffs), size)]
+        started = time.monotonic()
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, 'history.npy')
+            np.save(data_path, self.data)
+            if self.workers == 1:
+                _init_backtest_worker(data_path, self.models_path, settings)
+                results = [_score_chunk(chunk) for chunk in chunks]
+                _worker.clear()
+            else:
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(self.workers, initializer=_init_backtest_worker,
+                                  initargs=(data_path, self.models_path, settings)) as pool:
+                    results = list(pool.imap_unordered(_score_chunk, chunks))
+        squared, absolute, counts = (sum(result[i] for result in results) for i in range(3))
+        failed = sum(result[3] for result in results)
+        return self.report(squared, absolute, counts, len(cutoffs), failed, time.monotonic() - started)
+
+    def report(self, squared: np.ndarray, absolute: np.ndarray, counts: np.ndarray,
+               cutoffs: int, failed: int, elapsed: float) -> Dict:
+        """RMSE and MAE per lead and parameter, plus RMSE by lead-time band"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rmse = np.sqrt(squared / counts)
+            mae = absolute / counts
+        lead_hours = np.asarray(self.leads)
+        bands = {}
+        for band, mask in (('day1', lead_hours <= 24), ('days2_7', lead_hours > 24)):
+            if mask.any():
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    band_rmse = np.sqrt(squared[mask].sum(axis=0) / counts[mask].sum(axis=0))
+                bands[band] = {param: round(float(band_rmse[i]), 4) for i, param in enumerate(PARAMS)}
+        return {
+            'horizons': self.horizons,
+            'strategy': self.strategy or 'default',
+            'cutoffs': cutoffs,
+            'failed': failed,
+            'workers': self.workers,
+            'elapsed_s': round(elapsed, 3),
+            'cutoffs_per_s': round(cutoffs / elapsed, 3) if elapsed else None,
+            'bands': bands,
+            'leads': {
+                str(lead): {param: {'rmse': round(float(rmse[i, j]), 4), 'mae': round(float(mae[i, j]), 4)}
+                            for j, param in enumerate(PARAMS)}
+                for i, lead in enumerate(self.leads)
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of multi-day forecasts over stored history")
+    parser.add_argument('history', nargs='*', help="hourly history files (.csv, .jsonl, .json), directories or globs")
+    parser.add_argument('--feature-store', help="replay the readings held in this feature store instead")
+    parser.add_argument('--station', default='default')
+    parser.add_argument('--models', default=os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib'))
+    parser.add_argument('--horizons', default=os.getenv('FORECAST_HORIZONS', '1h'))
+    parser.add_argument('--days-ahead', type=int, default=7)
+    parser.add_argument('--strategy', choices=['recursive', 'direct'], default=None,
+                        help="forecast strategy (FORECAST_STRATEGY by default)")
+    parser.add_argument('--every', type=int, default=1, help="rows between cutoffs")
+    parser.add_argument('--max-rows', type=int, default=None, help="replay the most recent rows only")
+    parser.add_argument('--window', type=int, default=WINDOW, help="rows of history each forecast sees")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+    if not args.history and not args.feature_store:
+        parser.error("give history files or --feature-store")
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.feature_store:
+        columns = FeatureStore(args.feature_store).columns(args.station, max_rows=args.max_rows)
+    else:
+        columns = load_columns(args.history, args.max_rows)
+    backtest = WalkForwardBacktest(columns, args.models, args.horizons,
+                                   args.days_ahead, args.window, args.strategy, args.workers)
+    report = backtest.run(backtest.cutoffs(args.every))
+    print(json.dumps({key: value for key, value in report.items() if key != 'leads'}, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import RobustScaler
+
+from src.core.predictor.streaming_features import DERIVED_FEATURES, WEATHER_PARAMS
+
+SUFFIXES = ('hour_avg', 'day_avg', 'rolling_mean_6h', 'rolling_mean_24h', 'rolling_std_24h', 'rate_1h', 'rate_6h')
+# Rows of the feature matrix, in prepare_features' column order
+FEATURE_NAMES = WEATHER_PARAMS + [f'{param}_{suffix}' for param in WEATHER_PARAMS for suffix in SUFFIXES] + \
+    DERIVED_FEATURES
+
+
+def calendar_fields(seconds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Hour of day and day of month of integer epoch seconds"""
+    dates = seconds // 86400
+    hours = (seconds - dates * 86400) // 3600
+    first, last = (int(dates.min()), int(dates.max())) if len(dates) else (0, 0)
+    if last - first > len(dates):
+        calendar = dates.astype('datetime64[D]')
+        return hours, (calendar - calendar.astype('datetime64[M]')).astype(np.int64) + 1
+    # Sorted-ish history spans few distinct dates: convert each once and look the rows up
+    span = np.arange(first, last + 1).astype('datetime64[D]')
+    table = (span - span.astype('datetime64[M]')).astype(np.int64) + 1
+    return hours, table[dates - first]
+
+
+def group_means(values: np.ndarray, hours: np.ndarray, days: np.ndarray, out: np.ndarray,
+                present: Optional[np.ndarray] = None) -> np.ndarray:
+    """Write the hour-of-day and day-of-month means of each row of ``values`` into ``out[:, 0]`` and ``out[:, 1]``
+
+    One bincount per parameter over (hour, day) pairs gives both sets of
+    sums. Missing values must be zeros in ``values`` and False in
+    ``present``.
+    """
+    pairs = hours * 32 + days
+    counts = None if present is not None else np.bincount(pairs, minlength=24 * 32).reshape(24, 32)
+    for j in range(values.shape[0]):
+        sums = np.bincount(pairs, weights=values[j], minlength=24 * 32).reshape(24, 32)
+        if present is not None:
+            counts = np.bincount(pairs, weights=present[j], minlength=24 * 32).reshape(24, 32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[j, 0] = (sums.sum(axis=1) / counts.sum(axis=1)).astype(out.dtype)[hours]
+            out[j, 1] = (sums.sum(axis=0) / counts.sum(axis=0)).astype(out.dtype)[days]
+    return out
+
+
+def sorted_percentiles(ordered: np.ndarray, percentiles: List[float]) -> np.ndarray:
+    """np.percentile's default (linear) method on already sorted values"""
+    positions = np.asarray(percentiles, dtype=np.float64) / 100 * (len(ordered) - 1)
+    below = np.floor(positions).astype(np.intp)
+    above = np.minimum(below + 1, len(ordered) - 1)
+    low, high = ordered[below].astype(np.float64), ordered[above].astype(np.float64)
+    return low + (high - low) * (positions - below)
+
+
+def fit_robust_scaler(scaler: RobustScaler, column: np.ndarray) -> RobustScaler:
+    """RobustScaler.fit on one column, from one sort
+
+    RobustScaler partitions the data once per quantile; numpy's sort is
+    faster than that at a million rows and leaves every quantile (and the
+    missing values, sorted last) in place.
+    """
+    defaults = scaler.with_centering and scaler.with_scaling and tuple(scaler.quantile_range) == (25.0, 75.0)
+    ordered = np.sort(column)
+    ordered = ordered[:len(ordered) - np.count_nonzero(np.isnan(ordered))]
+    if not defaults or scaler.unit_variance or not len(ordered):
+        return scaler.fit(column[:, None])
+    low, median, high = sorted_percentiles(ordered, [25, 50, 75])
+    scaler.center_ = np.array([median])
+    scaler.scale_ = np.array([high - low if high > low else 1.0])
+    scaler.n_features_in_ = 1
+    return scaler
+
+
+def window_sums(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """Trailing ``window``-column sums from cumulative sums with a leading zero column"""
+    return cumulative[..., window:] - cumulative[..., :-window]
+
+
+class BatchFeatureBuilder:
+    """prepare_features for large training sets, in one pass over a 2-D array
+
+    The readings become one (parameters, rows) float32 array and every
+    parameter is handled by the same array operation: hour and day means
+    come from bincount, rolling means and standard deviations from
+    cumulative sums (accumulated in float64 around the parameter means,
+    so long series do not lose precision), and every output is written
+    once into a preallocated float32 matrix. Rolling windows are over
+    rows and follow pandas' rule that a window with a missing value has
+    no result.
+
+    The output matches prepare_features to float32 precision, including
+    refitting ``scalers`` in place.
+    """
+
+    def __init__(self, scalers: Optional[Dict[str, RobustScaler]] = None, dtype=np.float32):
+        self.scalers = scalers if scalers is not None else {param: RobustScaler() for param in WEATHER_PARAMS}
+        self.dtype = dtype
+
+    @staticmethod
+    def _datetimes(timestamps: np.ndarray) -> np.ndarray:
+        """Epoch seconds or date strings as datetime64"""
+        if np.issubdtype(timestamps.dtype, np.number):
+            return np.round(timestamps * 1e6).astype(np.int64).astype('datetime64[us]')
+        return pd.to_datetime(timestamps, format='ISO8601').to_numpy()
+
+    def build(self, data: Union[List[Dict], Dict[str, np.ndarray], pd.DataFrame],
+              fit: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(features, complete, timestamps, datetimes) with one column per reading
+
+        ``features`` is (len(FEATURE_NAMES), rows), one contiguous row per
+        feature; ``complete`` marks the readings without a missing feature.
+        """
+        if isinstance(data, list):
+            data = pd.DataFrame(data)
+        timestamps = np.asarray(data['timestamp'])
+        times = self._datetimes(timestamps)
+        rows, width = len(timestamps), len(WEATHER_PARAMS)
+        values = np.empty((width, rows), dtype=self.dtype)
+        for j, param in enumerate(WEATHER_PARAMS):
+            column = np.asarray(data[param])
+            values[j] = column if np.issubdtype(column.dtype, np.number) else pd.to_numeric(column, errors='coerce')
+        out = np.empty((len(FEATURE_NAMES), rows), dtype=self.dtype)
+        block = out[width:width + width * len(SUFFIXES)].reshape(width, len(SUFFIXES), rows)
+
+        missing = np.isnan(values)
+        gaps = None
+        if missing.any():
+            present = ~missing
+            filled = np.where(missing, 0, values)
+            gaps = np.zeros((width, rows + 1), dtype=np.int32)
+            np.cumsum(missing, axis=1, out=gaps[:, 1:])
+        else:
+            present, filled = None, values
+        seconds = (np.floor(timestamps).astype(np.int64) if np.issubdtype(timestamps.dtype, np.number)
+                   else times.astype('datetime64[s]').astype(np.int64))
+        hours, days = calendar_fields(seconds)
+        group_means(filled, hours, days, block, present)
+
+        # Running sums are float64 so they stay exact over millions of rows; taken around
+        # the parameter means, each window's sums are small enough to finish in float32
+        offset = (np.nanmean(values, axis=1, dtype=np.float64) if present is not None
+                  else values.mean(axis=1, dtype=np.float64)).astype(self.dtype)[:, None]
+        centred = filled - offset
+        if present is not None:
+            centred[missing] = 0
+        sums = np.zeros((width, rows + 1))
+        squares = np.zeros((width, rows + 1))
+        np.cumsum(centred, axis=1, dtype=np.float64, out=sums[:, 1:])
+        np.square(centred, out=centred)
+        np.cumsum(centred, axis=1, dtype=np.float64, out=squares[:, 1:])
+        for window, mean_at, std_at in ((6, 2, None), (24, 3, 4)):
+            block[:, mean_at, :window - 1] = np.nan
+            if std_at is not None:
+                block[:, std_at, :window - 1] = np.nan
+            if rows < window:
+                continue
+            mean = block[:, mean_at, window - 1:]
+            np.subtract(sums[:, window:], sums[:, :-window], out=mean, casting='same_kind')
+            mean /= window
+            if std_at is not None:
+                # (sum of squares - n * mean^2) / (n - 1), built in place
+                std = block[:, std_at, window - 1:]
+                np.subtract(squares[:, window:], squares[:, :-window], out=std, casting='same_kind')
+                std -= window * np.square(mean)
+                std /= window - 1
+                np.maximum(std, 0, out=std)
+                np.sqrt(std, out=std)
+            mean += offset
+            if gaps is not None:
+                broken = np.nonzero(window_sums(gaps, window))
+                block[:, mean_at, window - 1:][broken] = np.nan
+                if std_at is not None:
+                    block[:, std_at, window - 1:][broken] = np.nan
+        for lag, at in ((1, 5), (6, 6)):
+            block[:, at, :lag] = np.nan
+            np.subtract(values[:, lag:], values[:, :-lag], out=block[:, at, lag:])
+
+        scaled = out[:width]
+        for j, param in enumerate(WEATHER_PARAMS):
+            scaler = self.scalers[param]
+            if fit:
+                fit_robust_scaler(scaler, values[j])
+            np.subtract(values[j], scaler.center_[0], out=scaled[j])
+            scaled[j] /= scaler.scale_[0]
+        temperature, humidity, pressure = (WEATHER_PARAMS.index(p) for p in ('temperature', 'humidity', 'pressure'))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            np.divide(scaled[temperature], scaled[humidity], out=out[-2])
+        # The mean of six consecutive diffs telescopes to one 6-row diff
+        out[-1, :6] = np.nan
+        np.subtract(scaled[pressure, 6:], scaled[pressure, :-6], out=out[-1, 6:])
+        out[-1, 6:] /= 6
+        if gaps is not None and rows > 6:
+            out[-1, 6:][window_sums(gaps[pressure], 7) > 0] = np.nan
+
+        if gaps is None and np.isfinite(values).all():
+            # Only the warm-up rows and 0/0 ratios can be missing
+            complete = ~np.isnan(out[-2])
+            complete[:23] = False
+        else:
+            complete = np.ones(rows, dtype=bool)
+            for feature in out:
+                complete &= ~np.isnan(feature)
+        return out, complete, timestamps, times
+
+    def transform(self, data: Union[List[Dict], Dict[str, np.ndarray], pd.DataFrame],
+                  fit: bool = True) -> pd.DataFrame:
+        """prepare_features' output: complete rows only, in its column layout"""
+        out, valid, timestamps, times = self.build(data, fit)
+        first = int(np.argmax(valid)) if valid.any() else len(valid)
+        # Usually only the warm-up rows are incomplete, and a slice needs no copy
+        keep = slice(first, None) if valid[first:].all() else valid
+        df = pd.DataFrame(out[:, keep].T, columns=FEATURE_NAMES, copy=False)
+        df.insert(0, 'timestamp', timestamps[keep])
+        df.insert(1 + len(WEATHER_PARAMS), 'datetime', times[keep])
+        return df
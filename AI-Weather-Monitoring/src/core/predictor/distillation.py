@@ -0,0 +1,170 @@
+import argparse
+import json
+import logging
+import math
+import os
+import pickle
+import time
+from typing import Callable, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from src.core.predictor.model_search import load_features, single_row_latency, training_matrices
+from src.core.predictor.streaming_features import WEATHER_PARAMS
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+logger = logging.getLogger(__name__)
+
+# Compact students; each predicts one reading in well under a millisecond
+STUDENTS: Dict[str, Callable[[], object]] = {
+    'gbm': lambda: GradientBoostingRegressor(n_estimators=100, max_depth=3, learning_rate=0.1, random_state=42),
+    'linear': lambda: make_pipeline(StandardScaler(), PolynomialFeatures(2), Ridge(alpha=1.0)),
+    'tree': lambda: DecisionTreeRegressor(max_depth=8, min_samples_leaf=5, random_state=42)
+}
+
+
+def synthesize(X: np.ndarray, count: int, rng: np.random.Generator, noise: float = 0.05) -> np.ndarray:
+    """Plausible feature rows around the real ones for the teacher to label
+
+    Half are real rows jittered by ``noise`` column standard deviations,
+    half interpolate between two random real rows, so the student sees
+    the teacher's behaviour between and just beyond observed readings.
+    """
+    if count <= 0 or not len(X):
+        return np.empty((0, X.shape[1]))
+    jittered = count // 2
+    rows = X[rng.integers(len(X), size=jittered)]
+    rows = rows + rng.normal(0, noise, rows.shape) * X.std(axis=0)
+    left = X[rng.integers(len(X), size=count - jittered)]
+    right = X[rng.integers(len(X), size=count - jittered)]
+    weight = rng.random((count - jittered, 1))
+    return np.vstack([rows, left * weight + right * (1 - weight)])
+
+
+def _rmse(predicted: np.ndarray, actual: np.ndarray) -> float:
+    return round(math.sqrt(float(np.mean((predicted - actual) ** 2))), 6)
+
+
+def distill(teacher: Dict[str, object], features: pd.DataFrame, synthetic_rows: int = 100_000,
+            students: Sequence[str] = tuple(STUDENTS), holdout: float = 0.2, horizon: int = 0,
+            seed: int = 42) -> Dict:
+    """Train each student on the teacher's labels and compare them on held-out readings
+
+    The teacher labels the training rows plus ``synthetic_rows`` synthetic
+    rows; the trailing ``holdout`` of real rows is kept out and scores
+    teacher and students against the true values. Latencies are per
+    forecast step (one single-row predict per parameter). Returns the
+    report and the fitted models of the most accurate student.
+    """
+    rng = np.random.default_rng(seed)
+    data = training_matrices(features, horizon)
+    fitted = {kind: {} for kind in students}
+    results = {kind: {'rmse_by_param': {}, 'fidelity_by_param': {}, 'latency_ms': 0.0, 'size_bytes': 0}
+               for kind in students}
+    teacher_report = {'rmse_by_param': {}, 'latency_ms': 0.0, 'size_bytes': 0}
+    labelled = 0
+
+    for param in WEATHER_PARAMS:
+        X, y = data[param]
+        split = int(len(X) * (1 - holdout))
+        X_train, X_test, y_test = X[:split], X[split:], y[split:]
+        X_fit = np.vstack([X_train, synthesize(X_train, synthetic_rows, rng)])
+        started = time.perf_counter()
+        labels = teacher[param].predict(X_fit)
+        labelled += len(X_fit)
+        teacher_test = teacher[param].predict(X_test)
+        teacher_report['rmse_by_param'][param] = _rmse(teacher_test, y_test)
+        teacher_report['label_seconds'] = teacher_report.get('label_seconds', 0.0) + time.perf_counter() - started
+        teacher_report['latency_ms'] += single_row_latency(teacher[param], X_test[:20]) * 1000
+        teacher_report['size_bytes'] += len(pickle.dumps(teacher[param]))
+
+        for kind in students:
+            model = STUDENTS[kind]()
+            model.fit(X_fit, labels)
+            predicted = model.predict(X_test)
+            results[kind]['rmse_by_param'][param] = _rmse(predicted, y_test)
+            results[kind]['fidelity_by_param'][param] = _rmse(predicted, teacher_test)
+            results[kind]['latency_ms'] += single_row_latency(model, X_test[:20]) * 1000
+            results[kind]['size_bytes'] += len(pickle.dumps(model))
+            fitted[kind][param] = model
+
+    teacher_report['rmse'] = round(float(np.mean(list(teacher_report['rmse_by_param'].values()))), 6)
+    teacher_report['latency_ms'] = round(teacher_report['latency_ms'], 4)
+    teacher_report['label_seconds'] = round(teacher_report['label_seconds'], 3)
+    for kind, result in results.items():
+        result['rmse'] = round(float(np.mean(list(result['rmse_by_param'].values()))), 6)
+        result['rmse_delta'] = round(result['rmse'] - teacher_report['rmse'], 6)
+        result['latency_ms'] = round(result['latency_ms'], 4)
+        result['speedup'] = round(teacher_report['latency_ms'] / result['latency_ms'], 1) if result['latency_ms'] else None
+        result['size_ratio'] = round(result['size_bytes'] / teacher_report['size_bytes'], 4)
+
+    best = min(results, key=lambda kind: results[kind]['rmse'])
+    report = {
+        'rows': len(features),
+        'labelled_rows': labelled,
+        'synthetic_rows_per_param': synthetic_rows,
+        'holdout': holdout,
+        'horizon': horizon,
+        'teacher': teacher_report,
+        'students': results,
+        'selected': best
+    }
+    return {'report': report, 'models': fitted[best]}
+
+
+def save_student(path: str, models: Dict[str, object], scalers: Dict, report: Dict) -> bool:
+    """Write the student in save_models' layout, with the latencies select_models compares"""
+    predictor = EnhancedWeatherPredictor()
+    predictor.models = models
+    predictor.scalers = scalers
+    predictor.models_meta = {
+        'kind': report['selected'],
+        'latency_ms': report['students'][report['selected']]['latency_ms'],
+        'teacher_latency_ms': report['teacher']['latency_ms'],
+        'rmse_delta': report['students'][report['selected']]['rmse_delta']
+    }
+    return predictor.save_models(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the stacking ensemble into a compact real-time model")
+    parser.add_argument('history', nargs='*', help="history files (.csv, .jsonl, .json), directories or globs")
+    parser.add_argument('--feature-store', help="read features from this feature store instead")
+    parser.add_argument('--station', default='default')
+    parser.add_argument('--max-rows', type=int, default=200_000)
+    parser.add_argument('--teacher', default=os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib'))
+    parser.add_argument('--output', default=os.getenv('STUDENT_PATH', 'models/weather_student.joblib'))
+    parser.add_argument('--synthetic-rows', type=int, default=100_000, help="synthetic rows per parameter")
+    parser.add_argument('--students', default=','.join(STUDENTS), help=f"comma-separated, from {list(STUDENTS)}")
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--horizon', type=int, default=0, help="rows ahead the teacher was trained to predict")
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+    if not args.history and not args.feature_store:
+        parser.error("give history files or --feature-store")
+    students = [kind for kind in args.students.split(',') if kind in STUDENTS]
+    if not students:
+        parser.error(f"--students must name some of {list(STUDENTS)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    teacher = EnhancedWeatherPredictor()
+    if not teacher.load_models(args.teacher):
+        parser.error(f"no teacher models at {args.teacher}")
+    features = load_features(args.history, args.feature_store, args.station, args.max_rows)
+    result = distill(teacher.models, features, args.synthetic_rows, students, args.holdout, args.horizon)
+    report = result['report']
+    report['artifact'] = args.output if save_student(args.output, result['models'], teacher.scalers, report) else None
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
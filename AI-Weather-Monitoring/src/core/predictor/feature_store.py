@@ -0,0 +1,276 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import RobustScaler
+
+from src.core.predictor.streaming_features import (
+    WEATHER_PARAMS, WINDOW_COLUMNS, FeatureStats, WindowedFeatures, finalize, iter_history
+)
+from src.core.predictor.weather_predictor import station_path
+from src.utils.metrics import get_registry
+from src.utils.snapshot_writer import write_json_atomic
+
+# Bump when the on-disk layout changes; the window code itself is hashed
+STORE_FORMAT = 1
+
+
+def _feature_version() -> str:
+    source = inspect.getsource(WindowedFeatures) + ','.join(WINDOW_COLUMNS) + str(STORE_FORMAT)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+
+
+FEATURE_VERSION = _feature_version()
+STORED_COLUMNS = ['timestamp'] + WINDOW_COLUMNS
+
+FEATURE_ROWS = get_registry().counter(
+    'weather_feature_store_rows_total', 'Feature rows computed into or read from the feature store', ['op'])
+
+
+def _dtype(column: str):
+    # Epoch seconds need float64 to keep sub-minute resolution
+    return np.float64 if column == 'timestamp' else np.float32
+
+
+def _epoch_seconds(datetimes: pd.Series) -> np.ndarray:
+    return (datetimes - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
+
+class FeatureStore:
+    """Windowed features materialised once per station, reused by every training run
+
+    Each station keeps ``root/<station>/<FEATURE_VERSION>/`` with a
+    manifest and fixed-size segments of raw columnar files (one per
+    feature, float32). Only rows newer than the stored end are computed;
+    the 24-row carry needed to continue the rolling windows lives in the
+    manifest. The dataset-wide parts of prepare_features (hour/day means,
+    scaling) depend on which rows are used, so they are applied at load
+    time over the requested range. Changing the feature code changes the
+    version, so stale datasets are never read and get evicted first.
+    Whole datasets are evicted least recently used once the store grows
+    past ``max_bytes``. One writer per station at a time.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None, segment_rows: int = 100_000):
+        self.root = root or os.getenv('FEATURE_STORE_DIR', 'data/feature_store')
+        self.max_bytes = max_bytes or int(os.getenv('FEATURE_STORE_MAX_BYTES', str(2 * 1024 ** 3)))
+        self.segment_rows = segment_rows
+        self.logger = logging.getLogger(__name__)
+
+    def _dir(self, station: str, version: str = FEATURE_VERSION) -> str:
+        return os.path.join(self.root, station_path(station), version)
+
+    def _manifest(self, station: str) -> Dict:
+        path = os.path.join(self._dir(station), 'manifest.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+        return {'version': FEATURE_VERSION, 'rows': 0, 'end': None, 'segments': [], 'carry': None,
+                'last_access': time.time()}
+
+    def _save_manifest(self, station: str, manifest: Dict) -> None:
+        write_json_atomic(os.path.join(self._dir(station), 'manifest.json'), manifest)
+
+    def stations(self) -> List[str]:
+        """Directory names (station_path of the station ids) with a current dataset"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(s for s in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self._dir(s), 'manifest.json')))
+
+    def info(self, station: str) -> Dict:
+        """Stored row count and time range for ``station``"""
+        manifest = self._manifest(station)
+        segments = manifest['segments']
+        return {'station': station, 'version': FEATURE_VERSION, 'rows': manifest['rows'],
+                'start': segments[0]['start'] if segments else None, 'end': manifest['end'],
+                'segments': len(segments), 'bytes': _dir_size(self._dir(station))}
+
+    def update(self, station: str, readings: pd.DataFrame) -> int:
+        """Append windowed features for readings newer than what is stored; returns rows added
+
+        ``readings`` are normalised history rows (timestamp, parameters,
+        datetime) in time order, as iter_history yields them.
+        """
+        manifest = self._manifest(station)
+        readings = readings.assign(timestamp=_epoch_seconds(readings['datetime']))
+        if manifest['end'] is not None:
+            readings = readings[readings['timestamp'] > manifest['end']]
+        if not len(readings):
+            return 0
+
+        windows = WindowedFeatures()
+        windows.rows_in = manifest['rows']
+        if manifest['carry']:
+            carry = pd.DataFrame(manifest['carry'])
+            carry['datetime'] = pd.to_datetime(carry['timestamp'], unit='s')
+            windows.carry = carry
+        windowed = windows.transform(readings.reset_index(drop=True))
+
+        directory = self._dir(station)
+        os.makedirs(directory, exist_ok=True)
+        offset = 0
+        while offset < len(windowed):
+            if not manifest['segments'] or manifest['segments'][-1]['rows'] >= self.segment_rows:
+                manifest['segments'].append({'name': f"{len(manifest['segments']):06d}", 'rows': 0,
+                                             'start': None, 'end': None})
+            segment = manifest['segments'][-1]
+            part = windowed.iloc[offset:offset + self.segment_rows - segment['rows']]
+            self._append(os.path.join(directory, segment['name']), segment['rows'], part)
+            segment['rows'] += len(part)
+            segment['start'] = segment['start'] if segment['start'] is not None else float(part['timestamp'].iloc[0])
+            segment['end'] = float(part['timestamp'].iloc[-1])
+            offset += len(part)
+
+        manifest['rows'] += len(windowed)
+        manifest['end'] = float(windowed['timestamp'].iloc[-1])
+        manifest['carry'] = {col: windows.carry[col].tolist() for col in ['timestamp', 'row'] + WEATHER_PARAMS}
+        manifest['last_access'] = time.time()
+        self._save_manifest(station, manifest)
+        FEATURE_ROWS.labels(op='computed').inc(len(windowed))
+        self.evict(keep=station)
+        return len(windowed)
+
+    def _append(self, segment_dir: str, stored_rows: int, part: pd.DataFrame) -> None:
+        os.makedirs(segment_dir, exist_ok=True)
+        for column in STORED_COLUMNS:
+            dtype = _dtype(column)
+            path = os.path.join(segment_dir, f'{column}.bin')
+            # Drop whatever an interrupted write left past the manifest's row count
+            if os.path.exists(path):
+                os.truncate(path, stored_rows * np.dtype(dtype).itemsize)
+            with open(path, 'ab') as f:
+                part[column].to_numpy(dtype=dtype).tofile(f)
+
+    def ingest(self, station: str, paths: Iterable[str], chunk_rows: int = 100_000) -> int:
+        """Read history files and store features for the rows not stored yet"""
+        return sum(self.update(station, chunk) for chunk in iter_history(paths, chunk_rows))
+
+    def iter_windowed(self, station: str, start: Optional[float] = None,
+                      end: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """Yield stored windowed features segment by segment, limited to [start, end] epoch seconds"""
+        manifest = self._manifest(station)
+        manifest['last_access'] = time.time()
+        if manifest['segments']:
+            self._save_manifest(station, manifest)
+        row = 0
+        for segment in manifest['segments']:
+            first_row, row = row, row + segment['rows']
+            if (start is not None and segment['end'] < start) or (end is not None and segment['start'] > end):
+                continue
+            segment_dir = os.path.join(self._dir(station), segment['name'])
+            frame = pd.DataFrame({
+                column: np.fromfile(os.path.join(segment_dir, f'{column}.bin'), dtype=_dtype(column),
+                                    count=segment['rows'])
+                for column in STORED_COLUMNS
+            })
+            frame['row'] = np.arange(first_row, row)
+            mask = np.ones(len(frame), dtype=bool)
+            if start is not None:
+                mask &= frame['timestamp'].to_numpy() >= start
+            if end is not None:
+                mask &= frame['timestamp'].to_numpy() <= end
+            frame = frame[mask].reset_index(drop=True)
+            if len(frame):
+                frame['datetime'] = pd.to_datetime(frame['timestamp'], unit='s')
+                FEATURE_ROWS.labels(op='read').inc(len(frame))
+                yield frame
+
+    def columns(self, station: str, start: Optional[float] = None, end: Optional[float] = None,
+                max_rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """The stored readings as load_columns returns them, for backtests over the store's history"""
+        frames = [frame[['timestamp'] + WEATHER_PARAMS] for frame in self.iter_windowed(station, start, end)]
+        if not frames:
+            return {column: np.empty(0) for column in ['timestamp'] + WEATHER_PARAMS}
+        frame = pd.concat(frames, ignore_index=True).dropna(subset=WEATHER_PARAMS)
+        if max_rows:
+            frame = frame.iloc[-max_rows:]
+        return {column: frame[column].to_numpy(dtype=float) for column in frame.columns}
+
+    def stats(self, station: str, start: Optional[float] = None, end: Optional[float] = None,
+              reservoir_size: int = 200_000) -> FeatureStats:
+        """Dataset-wide statistics over the stored range, without building the features"""
+        stats = FeatureStats(reservoir_size)
+        for frame in self.iter_windowed(station, start, end):
+            stats.update_arrays(frame['hour'].to_numpy(), frame['day'].to_numpy(),
+                                {param: frame[param].to_numpy(dtype=float) for param in WEATHER_PARAMS})
+        return stats
+
+    def load(self, station: str, start: Optional[float] = None, end: Optional[float] = None,
+             scalers: Optional[Dict[str, RobustScaler]] = None) -> pd.DataFrame:
+        """prepare_features output for ``station`` over [start, end] epoch seconds
+
+        Means and scalers are fitted exactly over the range, as
+        prepare_features would over the same readings, and copied into
+        ``scalers`` when given so a predictor can serve with them.
+        Rolling features at the start of a range use the readings before
+        it, so unlike prepare_features no warm-up rows are lost. The
+        ``timestamp`` column holds epoch seconds.
+        """
+        windowed = list(self.iter_windowed(station, start, end))
+        if not windowed:
+            return pd.DataFrame()
+        windowed = pd.concat(windowed, ignore_index=True)
+        stats = FeatureStats(reservoir_size=len(windowed))
+        stats.update_arrays(windowed['hour'].to_numpy(), windowed['day'].to_numpy(),
+                            {param: windowed[param].to_numpy(dtype=float) for param in WEATHER_PARAMS})
+        fitted = stats.fit_scalers()
+        if scalers is not None:
+            scalers.update(fitted)
+        features = finalize(
+            windowed,
+            {param: stats.hour_means(param) for param in WEATHER_PARAMS},
+            {param: stats.day_means(param) for param in WEATHER_PARAMS},
+            fitted
+        )
+        return features.drop(columns='row')
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Delete whole datasets, stale versions first then least recently used, until under max_bytes"""
+        keep = station_path(keep) if keep is not None else None
+        datasets = []
+        for station in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            station_dir = os.path.join(self.root, station)
+            if not os.path.isdir(station_dir):
+                continue
+            for version in os.listdir(station_dir):
+                directory = os.path.join(station_dir, version)
+                last_access = 0.0
+                try:
+                    with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+                        last_access = json.load(f).get('last_access', 0.0)
+                except (OSError, ValueError):
+                    pass
+                current = version == FEATURE_VERSION
+                datasets.append((current, last_access, station, directory, _dir_size(directory)))
+
+        total = sum(size for *_, size in datasets)
+        evicted = []
+        for current, _, station, directory, size in sorted(datasets):
+            if total <= self.max_bytes:
+                break
+            if current and station == keep:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            evicted.append(directory)
+            self.logger.info(f"Evicted feature store dataset {directory} ({size} bytes)")
+        return evicted
+
+
+def _dir_size(directory: str) -> int:
+    total = 0
+    for path, _, names in os.walk(directory):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(path, name))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.utils.clock import get_clock
+from src.utils.metrics import get_registry
+
+FORECAST_REQUESTS = get_registry().counter(
+    'weather_forecast_requests_total', 'Forecast reads by cache outcome', ['result'])
+FORECAST_COMPUTATIONS = get_registry().counter(
+    'weather_forecast_computations_total', 'Forecast rollouts by what triggered them', ['trigger'])
+FORECAST_SECONDS = get_registry().histogram(
+    'weather_forecast_compute_seconds', 'Time to compute one station forecast',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+
+class ForecastScheduler:
+    """Precompute each station's forecast and serve reads from a cache
+
+    A forecast is recomputed once ``min_new_readings`` readings have
+    landed for the station since the last one (notify()), and every
+    ``interval`` seconds for every known station. Entries carry a version
+    (model version and data sequence number) and expire after ``ttl``
+    seconds; reads return the cached entry while it is fresh. An empty
+    forecast (too little history) is cached too, for ``empty_ttl``
+    seconds, so reads of such a station do not each start a rollout.
+    ``on_update`` receives each new non-empty entry and ``on_forecast``
+    the station, its forecast and the history it started from.
+    Whatever triggers it, at most one computation per station runs at a
+    time and every caller that needs it awaits that one, so forecast cost
+    follows the number of stations, not the number of clients.
+    """
+
+    def __init__(self, executor, history: Callable[[str], List[Dict]], days_ahead: int = 7,
+                 ttl: Optional[float] = None, interval: Optional[float] = None,
+                 min_new_readings: Optional[int] = None, empty_ttl: Optional[float] = None,
+                 on_update: Optional[Callable[[Dict], Awaitable]] = None,
+                 on_forecast: Optional[Callable[[str, List[Dict], Any], None]] = None):
+        load_dotenv()
+        self.executor = executor
+        self.history = history
+        self.days_ahead = days_ahead
+        self.ttl = ttl or float(os.getenv('FORECAST_TTL', '3600'))
+        self.empty_ttl = empty_ttl or float(os.getenv('FORECAST_EMPTY_TTL', '60'))
+        self.interval = interval or float(os.getenv('FORECAST_INTERVAL', '900'))
+        self.min_new_readings = min_new_readings or int(os.getenv('FORECAST_MIN_NEW_READINGS', '12'))
+        self.on_update = on_update
+        self.on_forecast = on_forecast
+        self.logger = logging.getLogger(__name__)
+        self.cache: Dict[str, Dict] = {}
+        self.data_seq: Dict[str, int] = {}
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def model_version(self, station_id: str) -> str:
+        registry = getattr(self.executor, 'model_registry', None)
+        if registry is not None:
+            return registry.version_for(station_id) or 'default'
+        return str(getattr(self.executor.predictor, 'models_meta', {}).get('version') or 'default')
+
+    def notify(self, station_id: str) -> None:
+        """Record a new reading; schedules a recomputation once enough have arrived"""
+        seq = self.data_seq[station_id] = self.data_seq.get(station_id, 0) + 1
+        entry = self.cache.get(station_id)
+        if seq - (entry['data_seq'] if entry else 0) >= self.min_new_readings:
+            self.refresh(station_id, 'data')
+
+    def refresh(self, station_id: str, trigger: str = 'manual') -> asyncio.Task:
+        """Recompute the station's forecast, joining a computation already running"""
+        task = self.inflight.get(station_id)
+        if task is None:
+            task = self.inflight[station_id] = asyncio.ensure_future(self._compute(station_id, trigger))
+            task.add_done_callback(lambda done: self._finished(station_id, done))
+        return task
+
+    def _finished(self, station_id: str, task: asyncio.Task) -> None:
+        self.inflight.pop(station_id, None)
+        # Background refreshes have no awaiting caller to see their errors
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Forecast for {station_id} failed: {task.exception()}")
+
+    async def _compute(self, station_id: str, trigger: str) -> Dict:
+        FORECAST_COMPUTATIONS.labels(trigger=trigger).inc()
+        seq = self.data_seq.get(station_id, 0)
+        version = f'{self.model_version(station_id)}:{seq}'
+        started = time.perf_counter()
+        history = self.history(station_id)
+        forecast = await self.executor.predict_station(station_id, history, self.days_ahead)
+        FORECAST_SECONDS.observe(time.perf_counter() - started)
+        now = get_clock().time()
+        entry = {
+            'station_id': station_id,
+            'version': version,
+            'data_seq': seq,
+            'computed_at': now,
+            'expires_at': now + (self.ttl if forecast else self.empty_ttl),
+            'forecast': forecast
+        }
+        self.cache[station_id] = entry
+        if forecast and self.on_forecast is not None:
+            self.on_forecast(station_id, forecast, history)
+        if forecast and self.on_update is not None:
+            await self.on_update(entry)
+        return entry
+
+    async def get(self, station_id: str, known_version: Optional[str] = None) -> Optional[Dict]:
+        """The station's forecast; None when ``known_version`` is still current"""
+        entry = self.cache.get(station_id)
+        if entry is not None and entry['expires_at'] > get_clock().time():
+            if known_version is not None and known_version == entry['version']:
+                FORECAST_REQUESTS.labels(result='not_modified').inc()
+                return None
+            FORECAST_REQUESTS.labels(result='hit').inc()
+            return entry
+        FORECAST_REQUESTS.labels(result='coalesced' if station_id in self.inflight else 'miss').inc()
+        # Shielded so a client that gives up does not cancel the shared computation
+        return await asyncio.shield(self.refresh(station_id, 'miss'))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        clock = get_clock()
+        while True:
+            await clock.sleep(self.interval)
+            stations = sorted(set(self.data_seq) | set(self.cache))
+            results = await asyncio.gather(*(self.refresh(station, 'cadence') for station in stations),
+                                           return_exceptions=True)
+            for station, result in zip(stations, results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Scheduled forecast for {station} failed: {result}")
+
+    async def close(self) -> None:
+        tasks = [task for task in (self._task, *self.inflight.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def register_routes(self, server) -> None:
+        """Expose GET /forecast?station=<id>[&version=<known>] on a MetricsServer"""
+        server.add_route('GET', '/forecast', self._forecast_request)
+
+    async def _forecast_request(self, query: Dict[str, str]) -> Tuple[str, str, str]:
+        station_id = query.get('station')
+        if not station_id:
+            return '400 Bad Request', 'application/json', json.dumps({'error': 'station is required'})
+        entry = await self.get(station_id, query.get('version'))
+        if entry is None:
+            return '304 Not Modified', 'application/json', ''
+        return '200 OK', 'application/json', json.dumps(entry)
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+from src.core.predictor.streaming_features import expand_paths, iter_history
+from src.core.predictor.weather_predictor import (
+    EnhancedWeatherPredictor, horizon_offsets, horizon_steps, parse_horizons
+)
+
+STRATEGIES = ('recursive', 'direct')
+# Two weeks of readings: the window each forecast starts from
+WINDOW = 24 * 14
+
+
+def slice_columns(data: Dict[str, np.ndarray], start: int, stop: int) -> Dict[str, np.ndarray]:
+    return {column: values[start:stop] for column, values in data.items()}
+
+
+def forecast_errors(predictor: EnhancedWeatherPredictor, data: Dict[str, np.ndarray], origins: List[int],
+                    spec: str, strategy: str = 'recursive', window: int = WINDOW) -> Dict[str, float]:
+    """RMSE (scaled units) over the first day and over days 2-7 at the 6-hourly leads every spec emits
+
+    ``data`` holds hourly column arrays; each forecast starts from the
+    ``window`` readings before an origin.
+    """
+    squared = {'day1': [], 'days2_7': []}
+    leads = horizon_offsets(parse_horizons(spec), 7 * 24)
+    for origin in origins:
+        recent = slice_columns(data, origin - window, origin)
+        forecast = asyncio.run(predictor.predict_weather(recent, 7, spec, strategy))
+        # prepare_features refits the scalers on the window, so actuals scale the same way
+        for step, lead in zip(forecast, leads):
+            if lead > 24 and lead % 6:
+                continue
+            band = 'day1' if lead <= 24 else 'days2_7'
+            for param in predictor.WEATHER_PARAMS:
+                scaler = predictor.scalers[param]
+                actual = (data[param][origin + lead - 1] - scaler.center_[0]) / scaler.scale_[0]
+                squared[band].append((step[param] - actual) ** 2)
+    return {f'rmse_{band}': round(math.sqrt(float(np.mean(values))), 4) for band, values in squared.items()}
+
+
+def compare_strategies(predictor: EnhancedWeatherPredictor, data: Dict[str, np.ndarray], spec: str,
+                       origins: int = 20, repeats: int = 5, window: int = WINDOW) -> Dict[str, Dict]:
+    """Latency and accuracy of the recursive and direct strategies on the same forecasts
+
+    The predictor's one-step, step and direct models must already be
+    trained (on readings before the evaluated part of ``data``). Origins
+    are spread over the last half of the series.
+    """
+    rows = len(data['timestamp']) - 7 * 24
+    points = np.linspace(max(rows // 2, window), rows, origins).astype(int).tolist()
+    latest = slice_columns(data, rows - window, rows)
+    report = {}
+    for strategy in STRATEGIES:
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            asyncio.run(predictor.predict_weather(latest, 7, spec, strategy))
+            samples.append((time.perf_counter() - started) * 1000)
+        report[strategy] = {
+            'latency_ms_p50': round(float(np.median(samples)), 3),
+            'latency_ms_max': round(max(samples), 3),
+            **forecast_errors(predictor, data, points, spec, strategy, window)
+        }
+    return report
+
+
+def load_columns(paths: List[str], max_rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Stored readings as column arrays in time order, timestamps as epoch seconds"""
+    frame = pd.concat(list(iter_history(expand_paths(paths))), ignore_index=True).sort_values('datetime')
+    frame = frame.dropna(subset=EnhancedWeatherPredictor.WEATHER_PARAMS)
+    if max_rows:
+        frame = frame.iloc[-max_rows:]
+    columns = {param: frame[param].to_numpy(dtype=float) for param in EnhancedWeatherPredictor.WEATHER_PARAMS}
+    columns['timestamp'] = ((frame['datetime'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recursive and direct multi-horizon forecasts")
+    parser.add_argument('history', nargs='+', help="hourly history files (.csv, .jsonl, .json), directories or globs")
+    parser.add_argument('--horizons', default=None, help="horizon spec (FORECAST_HORIZONS by default)")
+    parser.add_argument('--max-rows', type=int, default=8760, help="use the most recent rows only")
+    parser.add_argument('--origins', type=int, default=20, help="forecasts scored per strategy")
+    parser.add_argument('--light', action='store_true', help="ridge one-step models instead of the ensemble")
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    data = load_columns(args.history, args.max_rows)
+    predictor = EnhancedWeatherPredictor()
+    if args.light:
+        predictor.models = {param: Ridge() for param in predictor.WEATHER_PARAMS}
+    spec = args.horizons or predictor.forecast_horizons
+    # Train on the first half; compare_strategies scores the second
+    train = slice_columns(data, 0, (len(data['timestamp']) - 7 * 24) // 2)
+    asyncio.run(predictor.train_model(train))
+    asyncio.run(predictor.train_step_models(train, horizon_steps(spec, 7 * 24)))
+    asyncio.run(predictor.train_direct_models(train, spec))
+    report = {'horizons': spec, **compare_strategies(predictor, data, spec, args.origins)}
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.core.predictor.retraining import ModelVersions
+from src.core.predictor.weather_predictor import station_path
+from src.utils.executors import get_shared_executor
+from src.utils.metrics import get_registry
+
+REGISTRY_REQUESTS = get_registry().counter(
+    'weather_model_registry_requests_total', 'Station model lookups by outcome', ['result'])
+REGISTRY_EVICTIONS = get_registry().counter(
+    'weather_model_registry_evictions_total', 'Station models dropped to stay under the memory budget')
+MODEL_LOAD_SECONDS = get_registry().histogram(
+    'weather_model_load_seconds', 'Time to load one station model bundle from disk')
+LOADED_MODELS = get_registry().gauge('weather_model_registry_models', 'Station model bundles in memory')
+LOADED_BYTES = get_registry().gauge(
+    'weather_model_registry_bytes', 'Estimated memory held by loaded station model bundles')
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process now (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ModelRegistry:
+    """Station -> model version map with lazily loaded, LRU-evicted bundles
+
+    Each station's versions live in ``<root>/<station>/`` as kept by
+    ModelVersions (retraining promotes into it); the current version is
+    served, and stations without one share the default ENSEMBLE_PATH
+    bundle. Bundles load on first request on the shared executor, and
+    concurrent requests for a bundle that is still loading wait on the
+    same load. Before and after each load, least recently used bundles
+    are dropped while the process RSS (less the measured footprints of
+    bundles already dropped) is over ``rss_budget`` bytes; the bundle
+    just requested is never evicted. ``loader`` is a predictor's
+    _read_bundle, which returns None for a bundle it cannot read.
+    """
+
+    def __init__(self, loader: Callable[[str], Optional[Dict]], root: Optional[str] = None,
+                 default_path: Optional[str] = None, rss_budget: Optional[int] = None,
+                 memory_probe: Callable[[], Optional[int]] = current_rss_bytes):
+        load_dotenv()
+        self.root = root or os.getenv('STATION_MODELS_DIR', 'models/stations')
+        self.default_path = default_path or os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib')
+        self.rss_budget = rss_budget or int(float(os.getenv('MODEL_RSS_BUDGET_MB', '1024')) * 1024 * 1024)
+        self.loader = loader
+        self.memory_probe = memory_probe
+        self.logger = logging.getLogger(__name__)
+        # station -> (served version, its bundle path)
+        self.versions: Dict[str, Tuple[Optional[str], str]] = {}
+        # path -> bundle, least recently used first
+        self.loaded: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.footprints: Dict[str, int] = {}
+        self.loading: Dict[str, asyncio.Task] = {}
+        self.counts = {'hit': 0, 'miss': 0, 'coalesced': 0, 'evicted': 0}
+        LOADED_MODELS.set_function(lambda: len(self.loaded))
+        LOADED_BYTES.set_function(lambda: sum(self.footprints.get(path, 0) for path in self.loaded))
+
+    def version_for(self, station_id: str) -> Optional[str]:
+        """The station's served version, None when it uses the default models"""
+        return self._resolve(station_id)[0]
+
+    def path_for(self, station_id: str) -> str:
+        return self._resolve(station_id)[1]
+
+    def _resolve(self, station_id: str) -> Tuple[Optional[str], str]:
+        resolved = self.versions.get(station_id)
+        if resolved is None:
+            versions = ModelVersions(os.path.join(self.root, station_path(station_id)))
+            current = versions.current
+            resolved = self.versions[station_id] = (
+                current, versions.path(current) if current else self.default_path
+            )
+        return resolved
+
+    def invalidate(self, station_id: str) -> None:
+        """Re-read the station's version on its next request, e.g. after a promotion"""
+        self.versions.pop(station_id, None)
+
+    async def get(self, station_id: str) -> Dict:
+        """The station's bundle ({'models', 'scalers', 'meta'}), loading it if needed"""
+        path = self.path_for(station_id)
+        bundle = self.loaded.get(path)
+        if bundle is not None:
+            self.loaded.move_to_end(path)
+            self._count('hit')
+            return bundle
+        task = self.loading.get(path)
+        if task is None:
+            self._count('miss')
+            task = self.loading[path] = asyncio.ensure_future(self._load(path))
+            task.add_done_callback(lambda _: self.loading.pop(path, None))
+        else:
+            self._count('coalesced')
+        # A cancelled caller must not cancel the load other callers wait on
+        return await asyncio.shield(task)
+
+    async def _load(self, path: str) -> Dict:
+        self._evict(self.footprints.get(path) or self._size_on_disk(path), keep=path)
+        before = self.memory_probe() or 0
+        started = time.perf_counter()
+        bundle = await asyncio.get_running_loop().run_in_executor(get_shared_executor(), self.loader, path)
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - started)
+        if bundle is None:
+            raise RuntimeError(f"Model bundle {path} could not be loaded")
+        self.footprints[path] = max((self.memory_probe() or 0) - before, self._size_on_disk(path))
+        self.loaded[path] = bundle
+        self._evict(0, keep=path)
+        return bundle
+
+    def _evict(self, incoming: int, keep: str) -> None:
+        rss = self.memory_probe()
+        if rss is None:
+            return
+        for path in list(self.loaded):
+            if rss + incoming <= self.rss_budget:
+                return
+            if path == keep:
+                continue
+            del self.loaded[path]
+            # Freed pages may not leave RSS at once; count the bundle's measured footprint as released
+            rss -= self.footprints.get(path, 0)
+            self.counts['evicted'] += 1
+            REGISTRY_EVICTIONS.inc()
+            self.logger.info(f"Evicted station models {path}")
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        REGISTRY_REQUESTS.labels(result=result).inc()
+
+    @staticmethod
+    def _size_on_disk(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def info(self) -> Dict:
+        return {
+            **self.counts,
+            'loaded': list(self.loaded),
+            'loading': list(self.loading),
+            'estimated_bytes': sum(self.footprints.get(path, 0) for path in self.loaded),
+            'rss_bytes': self.memory_probe(),
+            'rss_budget': self.rss_budget
+        }
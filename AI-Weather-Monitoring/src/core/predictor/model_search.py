@@ -0,0 +1,290 @@
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import TimeSeriesSplit
+
+from src.core.predictor.feature_store import FeatureStore
+from src.core.predictor.streaming_features import WEATHER_PARAMS, expand_paths, feature_columns, iter_history
+from src.core.predictor.weather_predictor import ENSEMBLE_DEFAULTS, EnhancedWeatherPredictor, build_ensemble
+from src.utils.snapshot_writer import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Values sampled per hyper-parameter; zero estimators drops that base model
+SEARCH_SPACE = {
+    'rf_estimators': [0, 50, 100, 200, 500],
+    'rf_max_depth': [6, 10, 15],
+    'rf_min_samples_split': [2, 5, 10],
+    'xgb_estimators': [0, 50, 100, 300],
+    'xgb_max_depth': [3, 5, 8],
+    'xgb_learning_rate': [0.05, 0.1, 0.2],
+    'gbm_estimators': [0, 50, 100, 300],
+    'gbm_max_depth': [3, 5, 8],
+    'gbm_learning_rate': [0.05, 0.1, 0.2],
+    'svr_c': [0.3, 1.0, 3.0, 10.0],
+    'svr_epsilon': [0.01, 0.05, 0.1]
+}
+OBJECTIVES = ('rmse', 'latency_ms', 'size_bytes')
+
+# Feature matrices of each search worker, set by _init_search_worker
+_worker_data: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+_worker_splits = 3
+
+
+def _init_search_worker(data: Dict[str, Tuple[np.ndarray, np.ndarray]], n_splits: int) -> None:
+    global _worker_data, _worker_splits
+    _worker_data = data
+    _worker_splits = n_splits
+
+
+def single_row_latency(model, rows: np.ndarray) -> float:
+    """Median seconds for ``model`` to predict one row, as the service does per step"""
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        model.predict(row.reshape(1, -1))
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def _evaluate(config: Dict, fraction: float) -> Dict:
+    """Cross-validate ``config`` on the most recent ``fraction`` of each training fold
+
+    Latency is the median single-reading predict over every parameter's
+    model, since the service predicts one reading at a time; size is the
+    pickled size of those models.
+    """
+    rmse, latency, size, fit_seconds = {}, 0.0, 0, 0.0
+    for param, (X, y) in _worker_data.items():
+        squared, count = 0.0, 0
+        for train, test in TimeSeriesSplit(n_splits=_worker_splits).split(X):
+            train = train[-max(int(len(train) * fraction), 50):]
+            model = build_ensemble(config, n_jobs=1)
+            started = time.perf_counter()
+            model.fit(X[train], y[train])
+            fit_seconds += time.perf_counter() - started
+            squared += float(np.sum((model.predict(X[test]) - y[test]) ** 2))
+            count += len(test)
+        rmse[param] = math.sqrt(squared / count)
+        latency += single_row_latency(model, X[test[:20]])
+        size += len(pickle.dumps(model))
+    return {
+        'config': config,
+        'fraction': round(fraction, 6),
+        'rmse': round(float(np.mean(list(rmse.values()))), 6),
+        'rmse_by_param': {param: round(value, 6) for param, value in rmse.items()},
+        'latency_ms': round(latency * 1000, 4),
+        'size_bytes': size,
+        'fit_seconds': round(fit_seconds, 3)
+    }
+
+
+def sample_configs(count: int, rng: np.random.Generator, space: Dict[str, Sequence] = SEARCH_SPACE) -> List[Dict]:
+    """Distinct random configs from ``space``, each keeping at least one base model"""
+    configs, seen = [], set()
+    for _ in range(count * 20):
+        if len(configs) >= count:
+            break
+        config = dict(ENSEMBLE_DEFAULTS)
+        config.update({key: values[rng.integers(len(values))] for key, values in space.items()})
+        config = {key: value.item() if hasattr(value, 'item') else value for key, value in config.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key in seen or not any(config[f'{m}_estimators'] for m in ('rf', 'xgb', 'gbm')):
+            continue
+        seen.add(key)
+        configs.append(config)
+    return configs
+
+
+def pareto_front(results: List[Dict], objectives: Sequence[str] = OBJECTIVES) -> List[Dict]:
+    """Results no other result beats or matches on every objective (all minimised)"""
+    front = []
+    for candidate in results:
+        dominated = any(
+            all(other[o] <= candidate[o] for o in objectives) and any(other[o] < candidate[o] for o in objectives)
+            for other in results
+        )
+        if not dominated:
+            front.append(candidate)
+    return sorted(front, key=lambda r: r['rmse'])
+
+
+class SuccessiveHalvingSearch:
+    """Hyperband over the stacking ensemble's hyper-parameters under a wall-clock budget
+
+    Each bracket starts many configs on a small, recent slice of every
+    TimeSeriesSplit training fold and keeps the best 1/``eta`` for a
+    ``eta`` times larger slice, up to the full folds. Evaluations run in
+    a pool of spawned worker processes; when the budget runs out the
+    pool is terminated and the search reports what finished.
+    """
+
+    def __init__(self, data: Dict[str, Tuple[np.ndarray, np.ndarray]], budget_s: float = 600,
+                 workers: Optional[int] = None, n_splits: int = 3, eta: int = 3, min_fraction: float = 1 / 9,
+                 space: Optional[Dict[str, Sequence]] = None, seed: int = 42, include_default: bool = True):
+        self.data = data
+        self.budget_s = budget_s
+        self.workers = workers or os.cpu_count() or 1
+        self.n_splits = n_splits
+        self.eta = eta
+        self.min_fraction = min_fraction
+        self.space = space or SEARCH_SPACE
+        self.rng = np.random.default_rng(seed)
+        self.include_default = include_default
+        self.results: List[Dict] = []
+        self._deadline = 0.0
+        self._pool = None
+
+    def _run_rung(self, configs: List[Dict], fraction: float, bracket: int) -> List[Dict]:
+        pending = [self._pool.apply_async(_evaluate, (config, fraction)) for config in configs]
+        finished = []
+        for result in pending:
+            result.wait(max(0.0, self._deadline - time.monotonic()))
+            if not result.ready():
+                continue
+            try:
+                finished.append({**result.get(), 'bracket': bracket})
+            except Exception as e:
+                logger.warning(f"Search evaluation failed: {e}")
+        self.results.extend(finished)
+        return finished
+
+    def _bracket(self, bracket: int, configs: List[Dict], fraction: float) -> None:
+        while configs and time.monotonic() < self._deadline:
+            finished = self._run_rung(configs, fraction, bracket)
+            if fraction >= 1 or not finished:
+                return
+            keep = max(1, len(finished) // self.eta)
+            configs = [r['config'] for r in sorted(finished, key=lambda r: r['rmse'])[:keep]]
+            fraction = min(1.0, fraction * self.eta)
+
+    def run(self) -> Dict:
+        started = time.monotonic()
+        self._deadline = started + self.budget_s
+        s_max = max(0, int(round(math.log(1 / self.min_fraction, self.eta))))
+        self._pool = multiprocessing.get_context('spawn').Pool(
+            self.workers, initializer=_init_search_worker, initargs=(self.data, self.n_splits)
+        )
+        try:
+            for s in range(s_max, -1, -1):
+                if time.monotonic() >= self._deadline:
+                    break
+                count = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+                configs = sample_configs(count, self.rng, self.space)
+                if s == s_max and self.include_default:
+                    # Queued last so an expensive baseline cannot starve the cheap configs
+                    configs = configs[:-1] + [dict(ENSEMBLE_DEFAULTS)]
+                self._bracket(s, configs, self.eta ** -s)
+        finally:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> Dict:
+        """Pareto front over the highest-fidelity results, with every evaluation"""
+        fidelity = max((r['fraction'] for r in self.results), default=None)
+        comparable = [r for r in self.results if r['fraction'] == fidelity]
+        front = pareto_front(comparable)
+        return {
+            'budget_s': self.budget_s,
+            'elapsed_s': round(elapsed, 3),
+            'workers': self.workers,
+            'rows': {param: len(y) for param, (_, y) in self.data.items()},
+            'evaluations': len(self.results),
+            'fidelity': fidelity,
+            'pareto': front,
+            'results': self.results
+        }
+
+
+def recommend(report: Dict, max_latency_ms: Optional[float] = None,
+              max_size_bytes: Optional[int] = None) -> Optional[Dict]:
+    """Most accurate Pareto config within the latency and size limits"""
+    for result in report['pareto']:
+        if max_latency_ms is not None and result['latency_ms'] > max_latency_ms:
+            continue
+        if max_size_bytes is not None and result['size_bytes'] > max_size_bytes:
+            continue
+        return result
+    return None
+
+
+def training_matrices(features: pd.DataFrame, horizon: int = 1) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """(X, y) per parameter from prepare_features output, y being ``horizon`` rows ahead"""
+    data = {}
+    for param in WEATHER_PARAMS:
+        X = features[feature_columns(param)].to_numpy(dtype=float)
+        y = features[param].shift(-horizon).to_numpy(dtype=float) if horizon else features[param].to_numpy()
+        if horizon:
+            X, y = X[:-horizon], y[:-horizon]
+        data[param] = (X, y)
+    return data
+
+
+def load_features(history: Sequence[str] = (), feature_store: Optional[str] = None, station: str = 'default',
+                  max_rows: Optional[int] = None) -> pd.DataFrame:
+    """The most recent ``max_rows`` of prepare_features output from a feature store or history files"""
+    if feature_store:
+        features = FeatureStore(feature_store).load(station)
+    else:
+        frame = pd.concat(list(iter_history(expand_paths(history))), ignore_index=True)
+        frame = frame.drop(columns='datetime')
+        if max_rows:
+            frame = frame.iloc[-(max_rows + 48):]
+        features = EnhancedWeatherPredictor().prepare_features(frame)
+    if max_rows:
+        features = features.iloc[-max_rows:]
+    return features.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the ensemble hyper-parameters for accuracy vs. cost")
+    parser.add_argument('history', nargs='*', help="history files (.csv, .jsonl, .json), directories or globs")
+    parser.add_argument('--feature-store', help="read features from this feature store instead")
+    parser.add_argument('--station', default='default')
+    parser.add_argument('--max-rows', type=int, default=20_000, help="search on the most recent rows only")
+    parser.add_argument('--horizon', type=int, default=1, help="rows ahead to predict (0 is train_model's target)")
+    parser.add_argument('--budget', type=float, default=600, help="wall-clock budget in seconds")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--splits', type=int, default=3, help="TimeSeriesSplit folds")
+    parser.add_argument('--eta', type=int, default=3, help="keep 1/eta of the configs per rung")
+    parser.add_argument('--min-fraction', type=float, default=1 / 9,
+                        help="smallest slice of each training fold a config starts on")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-latency-ms', type=float, help="latency limit for the recommended config")
+    parser.add_argument('--max-size-mb', type=float, help="model size limit for the recommended config")
+    parser.add_argument('--write-config', help="save the recommended config here (read via ENSEMBLE_CONFIG)")
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+    if not args.history and not args.feature_store:
+        parser.error("give history files or --feature-store")
+
+    logging.basicConfig(level=logging.WARNING)
+    features = load_features(args.history, args.feature_store, args.station, args.max_rows)
+    search = SuccessiveHalvingSearch(
+        training_matrices(features, args.horizon), budget_s=args.budget, workers=args.workers,
+        n_splits=args.splits, eta=args.eta, min_fraction=args.min_fraction, seed=args.seed
+    )
+    report = search.run()
+    max_size = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb else None
+    report['recommended'] = recommend(report, args.max_latency_ms, max_size)
+    if args.write_config and report['recommended']:
+        write_json_atomic(args.write_config, report['recommended']['config'])
+    print(json.dumps({key: value for key, value in report.items() if key != 'results'}, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.core.predictor.feature_store import FeatureStore
+from src.core.predictor.streaming_features import (
+    WEATHER_PARAMS, StreamingFeatureBuilder, collect_stats, expand_paths, feature_columns, iter_features
+)
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+logger = logging.getLogger(__name__)
+
+# Every column any parameter's model reads, in spill-file order
+SPILL_COLUMNS = list(dict.fromkeys(col for param in WEATHER_PARAMS for col in feature_columns(param)))
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, where the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def _with_targets(features: Iterator[pd.DataFrame], horizon: int) -> Iterator[pd.DataFrame]:
+    """Attach ``{param}_target``: the scaled value ``horizon`` feature rows ahead
+
+    The last ``horizon`` rows of each chunk wait for the next chunk to
+    supply their targets; rows at the very end of the history have none.
+    """
+    pending: Optional[pd.DataFrame] = None
+    for chunk in features:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        for param in WEATHER_PARAMS:
+            chunk[f'{param}_target'] = chunk[param].shift(-horizon) if horizon else chunk[param]
+        if horizon:
+            pending = chunk.iloc[-horizon:].drop(columns=[f'{p}_target' for p in WEATHER_PARAMS])
+            chunk = chunk.iloc[:-horizon]
+        if len(chunk):
+            yield chunk
+
+
+class _SpilledChunks(xgb.DataIter):
+    """Feed spilled feature chunks for one parameter to XGBoost's external-memory matrix"""
+
+    def __init__(self, files: List[str], param: str, cache_prefix: str):
+        self.files = files
+        self.param = param
+        self.columns = [SPILL_COLUMNS.index(col) for col in feature_columns(param)]
+        self.target = len(SPILL_COLUMNS) + WEATHER_PARAMS.index(param)
+        self._index = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._index >= len(self.files):
+            return False
+        block = np.load(self.files[self._index])
+        self._index += 1
+        input_data(data=block[:, self.columns], label=block[:, self.target],
+                   feature_names=feature_columns(self.param))
+        return True
+
+    def reset(self) -> None:
+        self._index = 0
+
+
+def spill_features(features: Iterator[pd.DataFrame], chunk_rows: int, horizon: int, split_row: int,
+                   spill_dir: str, sample_rate: float = 1.0, seed: int = 42) -> Tuple[List[str], List[str], int, int]:
+    """Write training and validation feature chunks as float32 .npy files
+
+    Training rows are kept with probability ``sample_rate``; validation
+    rows are always kept. Sampled rows are regrouped into files of about
+    ``chunk_rows`` rows, since XGBoost's memory grows with the page count.
+    """
+    rng = np.random.default_rng(seed)
+    files = {'train': [], 'valid': []}
+    pending = {'train': [], 'valid': []}
+    rows, train_rows = 0, 0
+    columns = SPILL_COLUMNS + [f'{p}_target' for p in WEATHER_PARAMS]
+
+    def flush(kind: str) -> None:
+        if pending[kind]:
+            path = os.path.join(spill_dir, f'{kind}-{len(files[kind]):06d}.npy')
+            np.save(path, np.concatenate(pending[kind]))
+            files[kind].append(path)
+            pending[kind].clear()
+
+    for chunk in _with_targets(features, horizon):
+        chunk = chunk.dropna(subset=columns)
+        rows += len(chunk)
+        in_train = chunk['row'].to_numpy() < split_row
+        is_train = in_train & (rng.random(len(chunk)) < sample_rate) if sample_rate < 1 else in_train
+        train_rows += int(is_train.sum())
+        for mask, kind in ((is_train, 'train'), (~in_train, 'valid')):
+            if mask.any():
+                pending[kind].append(chunk.loc[mask, columns].to_numpy(dtype=np.float32))
+                if sum(len(block) for block in pending[kind]) >= chunk_rows:
+                    flush(kind)
+    flush('train')
+    flush('valid')
+    return files['train'], files['valid'], rows, train_rows
+
+
+def _rmse(booster: xgb.Booster, files: List[str], param: str) -> Optional[float]:
+    columns = [SPILL_COLUMNS.index(col) for col in feature_columns(param)]
+    target = len(SPILL_COLUMNS) + WEATHER_PARAMS.index(param)
+    squared, count = 0.0, 0
+    for path in files:
+        block = np.load(path)
+        predicted = booster.predict(xgb.DMatrix(block[:, columns], feature_names=feature_columns(param)))
+        squared += float(np.sum((predicted - block[:, target]) ** 2))
+        count += len(block)
+    return round(float(np.sqrt(squared / count)), 6) if count else None
+
+
+def train_out_of_core(history: List[str], output: str, chunk_rows: int = 100_000, holdout: float = 0.1,
+                      horizon: int = 0, rounds: int = 300, max_depth: int = 8, learning_rate: float = 0.05,
+                      reservoir_size: int = 200_000, max_train_rows: int = 2_000_000,
+                      work_dir: Optional[str] = None, feature_store: Optional[str] = None,
+                      station: str = 'default') -> Dict:
+    """Train per-parameter XGBoost models over history that need not fit in memory
+
+    Pass 1 gathers dataset-wide statistics, pass 2 builds features chunk
+    by chunk and spills them to disk, then each parameter trains from an
+    external-memory matrix. XGBoost still keeps a few dozen bytes of
+    gradient state per training row, so longer histories are sampled
+    down to ``max_train_rows`` to keep memory flat. With ``feature_store``
+    the windowed features come from that store, which only computes rows
+    it has not seen in an earlier run. Returns a report; the artifact at
+    ``output`` is what EnhancedWeatherPredictor.load_models reads.
+    """
+    paths = expand_paths(history)
+    if not paths:
+        raise FileNotFoundError(f"No history files found in {history}")
+    started = time.perf_counter()
+    timings = {}
+
+    store, stored_rows = None, None
+    if feature_store:
+        store = FeatureStore(feature_store, segment_rows=chunk_rows)
+        stored_rows = store.ingest(station, paths, chunk_rows)
+        timings['feature_store_s'] = round(time.perf_counter() - started, 3)
+        stats = store.stats(station, reservoir_size=reservoir_size)
+    else:
+        stats = collect_stats(paths, chunk_rows, reservoir_size)
+    timings['stats_s'] = round(time.perf_counter() - started, 3)
+    builder = StreamingFeatureBuilder(stats)
+    if store:
+        features = (f for f in map(builder.finalize, store.iter_windowed(station)) if len(f))
+    else:
+        features = iter_features(paths, builder, chunk_rows)
+    split_row = int(stats.rows * (1 - holdout))
+    sample_rate = min(1.0, max_train_rows / split_row) if split_row else 1.0
+
+    spill_dir = tempfile.mkdtemp(prefix='weather-train-', dir=work_dir)
+    try:
+        mark = time.perf_counter()
+        train_files, valid_files, feature_rows, train_rows = spill_features(
+            features, chunk_rows, horizon, split_row, spill_dir, sample_rate
+        )
+        timings['features_s'] = round(time.perf_counter() - mark, 3)
+        if not train_files:
+            raise ValueError("Not enough history to build a single training row")
+
+        models, metrics = {}, {}
+        params = {'tree_method': 'hist', 'max_depth': max_depth, 'eta': learning_rate,
+                  'subsample': 0.8, 'colsample_bytree': 0.8, 'seed': 42}
+        for param in WEATHER_PARAMS:
+            mark = time.perf_counter()
+            matrix = xgb.ExtMemQuantileDMatrix(
+                _SpilledChunks(train_files, param, os.path.join(spill_dir, f'cache-{param}'))
+            )
+            booster = xgb.train(params, matrix, num_boost_round=rounds)
+            del matrix
+            model_file = os.path.join(spill_dir, f'{param}.ubj')
+            booster.save_model(model_file)
+            models[param] = xgb.XGBRegressor()
+            models[param].load_model(model_file)
+            metrics[param] = {'rmse': _rmse(booster, valid_files, param)}
+            timings[f'train_{param}_s'] = round(time.perf_counter() - mark, 3)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    predictor = EnhancedWeatherPredictor()
+    predictor.models = models
+    predictor.scalers = builder.scalers
+    if not predictor.save_models(output):
+        raise RuntimeError(f"Could not write model artifact to {output}")
+
+    elapsed = time.perf_counter() - started
+    return {
+        'files': len(paths),
+        'rows': stats.rows,
+        'feature_rows': feature_rows,
+        'train_rows': train_rows,
+        'train_sample_rate': round(sample_rate, 6),
+        'holdout_rows': stats.rows - split_row,
+        'chunk_rows': chunk_rows,
+        'horizon': horizon,
+        'feature_store_new_rows': stored_rows,
+        'metrics': metrics,
+        'timings': timings,
+        'elapsed_s': round(elapsed, 3),
+        'seconds_per_million_rows': round(elapsed / stats.rows * 1e6, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'artifact': output
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the forecast models from stored history in bounded memory")
+    parser.add_argument('history', nargs='+', help="history files (.csv, .jsonl, .json), directories or globs")
+    parser.add_argument('--output', default=os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib'))
+    parser.add_argument('--chunk-rows', type=int, default=100_000)
+    parser.add_argument('--holdout', type=float, default=0.1, help="trailing fraction of rows kept for validation")
+    parser.add_argument('--horizon', type=int, default=0,
+                        help="predict the value this many rows ahead (0 matches train_model)")
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--max-depth', type=int, default=8)
+    parser.add_argument('--learning-rate', type=float, default=0.05)
+    parser.add_argument('--reservoir', type=int, default=200_000,
+                        help="sample size for fitting the robust scalers")
+    parser.add_argument('--max-train-rows', type=int, default=2_000_000,
+                        help="sample training rows down to about this many")
+    parser.add_argument('--work-dir', help="where feature spill files and XGBoost caches go")
+    parser.add_argument('--feature-store', help="reuse and extend the windowed features stored in this directory")
+    parser.add_argument('--station', default='default', help="feature store key for this history")
+    parser.add_argument('--report', help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = train_out_of_core(
+        args.history, args.output, chunk_rows=args.chunk_rows, holdout=args.holdout, horizon=args.horizon,
+        rounds=args.rounds, max_depth=args.max_depth, learning_rate=args.learning_rate,
+        reservoir_size=args.reservoir, max_train_rows=args.max_train_rows, work_dir=args.work_dir,
+        feature_store=args.feature_store, station=args.station
+    )
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import asyncio
+import copy
+import logging
+import math
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from src.core.predictor.streaming_features import (
+    WEATHER_PARAMS, FeatureStats, WindowedFeatures, feature_columns, finalize
+)
+from src.utils.executors import get_shared_executor
+from src.utils.metrics import get_registry
+
+ONLINE_UPDATES = get_registry().counter(
+    'weather_online_updates_total', 'Incremental model updates from labelled readings')
+ONLINE_RMSE = get_registry().gauge(
+    'weather_online_rmse', 'Prequential RMSE of the online models (scaled units)', ['param'])
+
+
+class OnlineSGDRegressor:
+    """Running standardisation followed by SGD; both update in O(batch)"""
+
+    def __init__(self, alpha: float = 1e-4, eta0: float = 0.01):
+        self.scaler = StandardScaler()
+        self.model = SGDRegressor(alpha=alpha, eta0=eta0, learning_rate='invscaling', random_state=42)
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray) -> 'OnlineSGDRegressor':
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y)
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.predict(self.scaler.transform(np.asarray(X, dtype=float)))
+
+
+class OnlineXGBRegressor:
+    """Boosting that keeps adding rounds up to ``max_trees``, then refreshes leaf values
+
+    Once the tree count is capped, each update re-estimates the existing
+    leaves from the new batch (XGBoost's ``refresh`` updater), so an
+    update costs O(batch x max_trees) however long the service has run.
+    """
+
+    def __init__(self, rounds_per_update: int = 5, max_trees: int = 200, max_depth: int = 4,
+                 learning_rate: float = 0.1):
+        self.rounds_per_update = rounds_per_update
+        self.max_trees = max_trees
+        self.params = {'max_depth': max_depth, 'eta': learning_rate, 'seed': 42}
+        self.booster: Optional[xgb.Booster] = None
+
+    @property
+    def n_trees(self) -> int:
+        return self.booster.num_boosted_rounds() if self.booster is not None else 0
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray) -> 'OnlineXGBRegressor':
+        matrix = xgb.DMatrix(X, label=y)
+        if self.n_trees < self.max_trees:
+            rounds = min(self.rounds_per_update, self.max_trees - self.n_trees)
+            self.booster = xgb.train(self.params, matrix, num_boost_round=rounds, xgb_model=self.booster)
+        else:
+            refresh = {**self.params, 'process_type': 'update', 'updater': 'refresh', 'refresh_leaf': True}
+            self.booster = xgb.train(refresh, matrix, num_boost_round=self.n_trees, xgb_model=self.booster)
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        if self.booster is None:
+            return np.zeros(len(X))
+        return self.booster.predict(xgb.DMatrix(np.asarray(X, dtype=float)))
+
+
+LEARNERS = {'sgd': OnlineSGDRegressor, 'xgb': OnlineXGBRegressor}
+
+
+class OnlineLearner:
+    """Update the predictor's models from each batch of newly labelled readings
+
+    A reading labels the feature row ``horizon`` readings before it, so a
+    forecast's model is corrected once its actual value arrives. Features
+    come from WindowedFeatures (24-row carry) with running hour/day means
+    and scalers frozen at the first batch, so every step is O(batch) and
+    nothing grows with the history. Updated models are copied and, after
+    ``min_updates`` warm-up batches, installed with a reference swap;
+    predictions in flight keep the previous ones. Every ``publish_every``
+    updates the models are saved and the executor's forecast workers
+    reloaded. Each batch is scored before it is learnt from, which gives
+    a prequential RMSE.
+    """
+
+    def __init__(self, predictor, executor=None, mode: Optional[str] = None, batch_size: Optional[int] = None,
+                 horizon: int = 1, min_updates: Optional[int] = None, publish_every: Optional[int] = None,
+                 error_window: int = 500, **learner_options):
+        self.predictor = predictor
+        self.executor = executor
+        self.mode = mode or os.getenv('ONLINE_LEARNING_MODE', 'sgd')
+        if self.mode not in LEARNERS:
+            raise ValueError(f"Unknown online learning mode {self.mode}, expected one of {list(LEARNERS)}")
+        self.batch_size = batch_size or int(os.getenv('ONLINE_BATCH_SIZE', '24'))
+        self.horizon = horizon
+        self.min_updates = min_updates if min_updates is not None else int(os.getenv('ONLINE_MIN_UPDATES', '10'))
+        self.publish_every = publish_every or int(os.getenv('ONLINE_PUBLISH_EVERY', '10'))
+        self.logger = logging.getLogger(__name__)
+        self.learners = {param: LEARNERS[self.mode](**learner_options) for param in WEATHER_PARAMS}
+        self.windows = WindowedFeatures()
+        self.stats = FeatureStats(reservoir_size=1)
+        self.scalers: Optional[Dict[str, RobustScaler]] = None
+        self.pending: List[Dict] = []
+        self.unlabelled: Optional[pd.DataFrame] = None
+        self.errors: Dict[str, Deque[float]] = {p: deque(maxlen=error_window) for p in WEATHER_PARAMS}
+        self.updates = 0
+        self._lock = asyncio.Lock()
+
+    def _normalise(self, readings: List[Dict]) -> pd.DataFrame:
+        frame = pd.DataFrame(readings)[['timestamp'] + WEATHER_PARAMS]
+        if pd.api.types.is_numeric_dtype(frame['timestamp']):
+            frame['datetime'] = pd.to_datetime(frame['timestamp'], unit='s')
+        else:
+            frame['datetime'] = pd.to_datetime(frame['timestamp'], format='ISO8601')
+        return frame.astype({param: float for param in WEATHER_PARAMS})
+
+    def _features(self, readings: List[Dict]) -> pd.DataFrame:
+        chunk = self._normalise(readings)
+        self.stats.update(chunk)
+        if self.scalers is None:
+            self.scalers = {p: RobustScaler().fit(chunk[[p]].to_numpy()) for p in WEATHER_PARAMS}
+        windowed = self.windows.transform(chunk)
+        # finalize drops warm-up rows, so labels are matched by stream position
+        return finalize(windowed, {p: self.stats.hour_means(p) for p in WEATHER_PARAMS},
+                        {p: self.stats.day_means(p) for p in WEATHER_PARAMS}, self.scalers)
+
+    def update(self, readings: List[Dict]) -> int:
+        """Learn from ``readings``; returns the number of labelled rows used"""
+        features = self._features(readings)
+        if self.unlabelled is not None:
+            features = pd.concat([self.unlabelled, features], ignore_index=True)
+        if len(features) <= self.horizon:
+            self.unlabelled = features
+            return 0
+        targets = features.set_index('row')
+        rows = features['row'].to_numpy()
+        has_label = np.isin(rows + self.horizon, rows)
+        labelled = features[has_label]
+        # Rows whose label has not arrived yet wait for the next batch
+        self.unlabelled = features[~has_label].iloc[-self.horizon:] if self.horizon else None
+        if not len(labelled):
+            return 0
+
+        models = {}
+        for param in WEATHER_PARAMS:
+            X = labelled[feature_columns(param)].to_numpy(dtype=float)
+            y = targets.loc[labelled['row'].to_numpy() + self.horizon, param].to_numpy(dtype=float)
+            learner = copy.deepcopy(self.learners[param])
+            if self.updates:
+                self.errors[param].extend((learner.predict(X) - y) ** 2)
+                ONLINE_RMSE.labels(param=param).set(self.rmse(param))
+            learner.partial_fit(X, y)
+            self.learners[param] = models[param] = learner
+        self.updates += 1
+        ONLINE_UPDATES.inc()
+        if self.updates >= self.min_updates:
+            self.predictor.install_models({'models': {**self.predictor.models, **models}},
+                                          f'online-{self.mode}-{self.updates}')
+        return len(labelled)
+
+    @property
+    def publish_due(self) -> bool:
+        return self.updates > 0 and self.updates >= self.min_updates and self.updates % self.publish_every == 0
+
+    def rmse(self, param: str) -> Optional[float]:
+        errors = self.errors[param]
+        return math.sqrt(float(np.mean(errors))) if errors else None
+
+    async def observe(self, reading: Dict) -> bool:
+        """Queue a reading; True when it completed a batch and the models were updated"""
+        self.pending.append(reading)
+        if len(self.pending) < self.batch_size:
+            return False
+        batch, self.pending = self.pending, []
+        async with self._lock:
+            try:
+                used = await asyncio.get_running_loop().run_in_executor(get_shared_executor(), self.update, batch)
+            except Exception as e:
+                self.logger.error(f"Online update failed: {e}")
+                return False
+            # A batch that only warmed up the feature window left the models untouched
+            if not used:
+                return False
+            if self.executor is not None and self.publish_due:
+                await self.publish()
+        return True
+
+    async def publish(self) -> None:
+        """Save the online models and move the forecast workers onto them"""
+        saved = await asyncio.get_running_loop().run_in_executor(get_shared_executor(), self.predictor.save_models)
+        if saved:
+            await self.executor.reload_models()
@@ -0,0 +1,253 @@
+import asyncio
+import copy
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Predictor owned by each forecast worker process, set by _init_forecast_worker
+_worker_predictor = None
+# The worker's own station model registry, when the executor has one
+_worker_registry = None
+
+
+def _init_forecast_worker(predictor, models_path: Optional[str], registry: Optional[Dict] = None) -> None:
+    """Install the predictor (and the latest trained models, or their student under a latency budget)"""
+    global _worker_predictor, _worker_registry
+    _worker_predictor = predictor
+    if models_path and hasattr(predictor, 'select_models'):
+        predictor.models_path = models_path
+        predictor.select_models()
+    elif models_path and hasattr(predictor, 'load_models'):
+        predictor.load_models(models_path)
+    if registry is not None:
+        # Imported here: the registry module builds on the predictor modules
+        from src.core.predictor.model_registry import ModelRegistry
+        _worker_registry = ModelRegistry(predictor._read_bundle, **registry)
+
+
+def _forecast_job(recent_data: List[Dict], days_ahead: int) -> List[Dict]:
+    return asyncio.run(_worker_predictor.predict_weather(recent_data, days_ahead))
+
+
+def _station_forecast_job(station_id: str, recent_data: List[Dict], days_ahead: int) -> List[Dict]:
+    return asyncio.run(_station_forecast(station_id, recent_data, days_ahead))
+
+
+async def _station_forecast(station_id: str, recent_data: List[Dict], days_ahead: int) -> List[Dict]:
+    bundle = await _worker_registry.get(station_id)
+    predictor = copy.copy(_worker_predictor)
+    predictor.models = bundle['models']
+    predictor.step_models = bundle.get('step_models', {})
+    predictor.direct_models = bundle.get('direct_models', {})
+    # prepare_features refits the scalers; keep the cached bundle's untouched
+    predictor.scalers = copy.deepcopy(bundle.get('scalers', _worker_predictor.scalers))
+    return await predictor.predict_weather(recent_data, days_ahead)
+
+
+def _training_job(conn, predictor, historical_data: List[Dict], models_path: str) -> None:
+    """Train in a child process and persist the result instead of returning it
+
+    Shipping fitted ensembles back through the pipe would mean unpickling
+    hundreds of MB on the event loop side, so only metrics travel back.
+    """
+    try:
+        metrics = asyncio.run(predictor.train_model(historical_data))
+        if metrics and not predictor.save_models(models_path):
+            metrics = {}
+        conn.send((True, metrics))
+    except BaseException as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+def start_background_process(process) -> None:
+    """Start a child process at background priority
+
+    Set from the parent right after the start, so the child's imports and
+    unpickling already yield the CPU to the serving process on small
+    gateways, not just the training itself. Linux runs it under
+    SCHED_IDLE, which only takes CPU the serving process leaves; elsewhere
+    its niceness is raised by TRAINING_NICENESS.
+    """
+    process.start()
+    try:
+        if hasattr(os, 'SCHED_IDLE'):
+            os.sched_setscheduler(process.pid, os.SCHED_IDLE, os.sched_param(0))
+        elif hasattr(os, 'setpriority'):
+            niceness = os.getpriority(os.PRIO_PROCESS, 0) + int(os.getenv('TRAINING_NICENESS', '10'))
+            os.setpriority(os.PRIO_PROCESS, process.pid, niceness)
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Could not lower training priority: {e}")
+
+
+class PredictionExecutor:
+    """Awaitable facade that keeps model work off the event loop
+
+    Per-reading processing runs on a thread pool (scikit-learn and NumPy
+    release the GIL for the heavy parts); forecast rollouts run in a pool
+    of worker processes and training runs in a dedicated child process
+    that can be terminated on cancellation or timeout. Readings get a
+    short READING_TIMEOUT of their own; a forecast still running when
+    FORECAST_TIMEOUT expires cannot be stopped, so its workers are
+    retired and later forecasts start on fresh ones.
+    """
+
+    def __init__(self, predictor, max_processes: Optional[int] = None,
+                 max_threads: Optional[int] = None,
+                 forecast_timeout: Optional[float] = None,
+                 reading_timeout: Optional[float] = None,
+                 training_timeout: Optional[float] = None,
+                 model_registry=None):
+        load_dotenv()
+        self.predictor = predictor
+        self.model_registry = model_registry
+        self.logger = logging.getLogger(__name__)
+        self.max_processes = max_processes or int(os.getenv('PREDICTION_PROCESSES', '2'))
+        self.forecast_timeout = forecast_timeout or float(os.getenv('FORECAST_TIMEOUT', '60'))
+        self.reading_timeout = reading_timeout or float(os.getenv('READING_TIMEOUT', '2'))
+        self.training_timeout = training_timeout or float(os.getenv('TRAINING_TIMEOUT', '3600'))
+        self.models_path = getattr(predictor, 'models_path', None)
+        self.thread_pool = ThreadPoolExecutor(
+            max_workers=max_threads or int(os.getenv('PREDICTION_THREADS', '2')),
+            thread_name_prefix='prediction'
+        )
+        # Spawn rather than fork: the parent runs an event loop and threads
+        self.mp_context = multiprocessing.get_context('spawn')
+        self.forecast_pool: Optional[ProcessPoolExecutor] = None
+
+    async def process_sensor_data(self, data: Dict, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Validate and predict a single reading on the thread pool"""
+        return await self._run_in_thread(self.predictor.process_sensor_data, data,
+                                         timeout=timeout or self.reading_timeout)
+
+    async def predict_weather(self, recent_data: List[Dict], days_ahead: int = 7,
+                              timeout: Optional[float] = None) -> List[Dict]:
+        """Run the recursive forecast rollout in a worker process"""
+        return await self._run_forecast(_forecast_job, recent_data, days_ahead, timeout=timeout)
+
+    async def predict_station(self, station_id: str, recent_data: List[Dict], days_ahead: int = 7,
+                              timeout: Optional[float] = None) -> List[Dict]:
+        """Forecast with the station's own models from the model registry, in a worker process
+
+        Without a registry this is predict_weather. Each forecast worker
+        keeps its own registry with the same settings, so a station's
+        bundle is loaded once per worker and the rollout runs on a
+        shallow copy of the worker's predictor holding those models.
+        """
+        if self.model_registry is None:
+            return await self.predict_weather(recent_data, days_ahead, timeout)
+        return await self._run_forecast(_station_forecast_job, station_id, recent_data, days_ahead,
+                                        timeout=timeout)
+
+    async def _run_forecast(self, job, *args, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        pool = await self._get_forecast_pool()
+        # submit() may spawn a worker and pickle the predictor, keep that off the loop
+        future = await loop.run_in_executor(self.thread_pool, pool.submit, job, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future),
+                                          timeout or self.forecast_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if not future.cancel() and not future.done() and pool is self.forecast_pool:
+                # The job is running and cannot be stopped; its result is ignored and
+                # new jobs go to fresh workers instead of queueing behind it
+                self.logger.warning("Forecast abandoned while running, replacing the forecast workers")
+                await self._recycle_forecast_pool()
+            raise
+
+    async def train_model(self, historical_data: List[Dict],
+                          timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Train in a child process, then roll the forecast workers onto the new models"""
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self.mp_context.Pipe(duplex=False)
+        process = self.mp_context.Process(
+            target=_training_job,
+            args=(child_conn, self.predictor, historical_data, self.models_path),
+            daemon=True
+        )
+        # Starting a spawned process pickles the history, do it off the loop
+        await loop.run_in_executor(None, start_background_process, process)
+        child_conn.close()
+        try:
+            ok, payload = await asyncio.wait_for(
+                loop.run_in_executor(None, parent_conn.recv),
+                timeout or self.training_timeout
+            )
+        except EOFError:
+            ok, payload = False, "training process exited unexpectedly"
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.logger.warning("Training cancelled, terminating training process")
+            process.terminate()
+            raise
+        finally:
+            loop.run_in_executor(None, process.join)
+
+        if not ok:
+            self.logger.error(f"Training error: {payload}")
+            return {}
+        if payload:
+            await self._install_trained_models()
+            await self._recycle_forecast_pool()
+        return payload
+
+    async def _install_trained_models(self) -> None:
+        """Serve the models the training process saved from the parent's predictor too"""
+        if not hasattr(self.predictor, 'install_models'):
+            return
+        loop = asyncio.get_running_loop()
+        # Unpickling the bundle happens off the loop; the swap is a reference assignment
+        bundle = await loop.run_in_executor(self.thread_pool, self.predictor._read_bundle, self.models_path)
+        if bundle is None:
+            self.logger.error(f"Trained models at {self.models_path} could not be loaded")
+            return
+        self.predictor.install_models(bundle)
+
+    async def reload_models(self) -> None:
+        """Roll the forecast workers onto the models now at models_path"""
+        await self._recycle_forecast_pool()
+
+    async def _run_in_thread(self, func, *args, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(self.thread_pool, func, *args), timeout)
+
+    async def _get_forecast_pool(self) -> ProcessPoolExecutor:
+        if self.forecast_pool is None:
+            self.forecast_pool = ProcessPoolExecutor(
+                max_workers=self.max_processes,
+                mp_context=self.mp_context,
+                initializer=_init_forecast_worker,
+                initargs=(self.predictor, self.models_path, self._registry_settings())
+            )
+        return self.forecast_pool
+
+    def _registry_settings(self) -> Optional[Dict]:
+        registry = self.model_registry
+        if registry is None:
+            return None
+        return {'root': registry.root, 'default_path': registry.default_path, 'rss_budget': registry.rss_budget}
+
+    async def _recycle_forecast_pool(self) -> None:
+        """Replace forecast workers so new jobs see freshly trained models
+
+        Jobs already running finish on the old workers.
+        """
+        old_pool, self.forecast_pool = self.forecast_pool, None
+        if old_pool is not None:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, old_pool.shutdown, True)
+
+    async def shutdown(self) -> None:
+        """Stop worker processes and threads"""
+        loop = asyncio.get_running_loop()
+        if self.forecast_pool is not None:
+            await loop.run_in_executor(
+                None, functools.partial(self.forecast_pool.shutdown, wait=True, cancel_futures=True)
+            )
+            self.forecast_pool = None
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,331 @@
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.core.predictor.model_search import training_matrices
+from src.core.predictor.prediction_executor import start_background_process
+from src.core.predictor.weather_predictor import forecast_in_reading_units
+from src.utils.clock import get_clock
+from src.utils.executors import get_shared_executor
+from src.utils.metrics import get_registry
+from src.utils.snapshot_writer import write_json_atomic
+
+RETRAINS = get_registry().counter(
+    'weather_retrain_total', 'Background retraining runs by outcome', ['outcome'])
+MODEL_VERSION = get_registry().gauge(
+    'weather_model_version', 'Version number of the models being served')
+FORECAST_ERROR = get_registry().gauge(
+    'weather_forecast_rmse', 'Rolling RMSE of forecasts against the readings that followed')
+
+
+def _holdout_rmse(models: Dict, features) -> Optional[float]:
+    if not len(features):
+        return None
+    errors = []
+    for param, (X, y) in training_matrices(features, horizon=0).items():
+        errors.append(math.sqrt(float(np.mean((models[param].predict(X) - y) ** 2))))
+    return float(np.mean(errors))
+
+
+def _candidate_job(conn, predictor, history: List[Dict], candidate_path: str, incumbent_path: str,
+                   holdout: float) -> None:
+    """Train a candidate on all but the newest ``holdout`` of the history and score both models there"""
+    try:
+        if not all(hasattr(model, 'fit') for model in predictor.models.values()):
+            # Compacted or distilled models cannot be refitted; start from the configured ensemble
+            predictor.setup_models()
+        features = predictor.prepare_training_features(history)
+        split = int(len(features) * (1 - holdout))
+        metrics = asyncio.run(predictor.train_model([], features=features.iloc[:split]))
+        if not metrics:
+            raise RuntimeError("training returned no metrics")
+        validation = features.iloc[split:]
+        report = {'cv': metrics, 'rows': len(features), 'holdout_rows': len(validation),
+                  'candidate_rmse': _holdout_rmse(predictor.models, validation), 'incumbent_rmse': None}
+        incumbent = predictor._read_bundle(incumbent_path) if incumbent_path else None
+        if incumbent is not None:
+            report['incumbent_rmse'] = _holdout_rmse(incumbent['models'], validation)
+        if not predictor.save_models(candidate_path):
+            raise RuntimeError(f"could not save candidate to {candidate_path}")
+        conn.send((True, report))
+    except BaseException as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+class ModelVersions:
+    """Numbered model artifacts with the promotion history needed for rollback
+
+    Every candidate is kept as ``<root>/<version>.joblib``; promoting one
+    copies it over the serving path with an atomic rename, so forecast
+    workers and restarts pick it up. ``keep`` versions are retained.
+    """
+
+    def __init__(self, root: str, keep: int = 5):
+        self.root = root
+        self.keep = keep
+        self.registry_path = os.path.join(root, 'registry.json')
+        self.registry = {'next': 1, 'current': None, 'history': [], 'versions': {}}
+        if os.path.exists(self.registry_path):
+            with open(self.registry_path, 'r') as f:
+                self.registry = json.load(f)
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.root, f'{version}.joblib')
+
+    @property
+    def current(self) -> Optional[str]:
+        return self.registry['current']
+
+    def new_version(self) -> str:
+        version = f"{self.registry['next']:06d}"
+        self.registry['next'] += 1
+        return version
+
+    def add(self, version: str, report: Dict, status: str) -> None:
+        self.registry['versions'][version] = {
+            'created': get_clock().now().isoformat(), 'status': status, 'report': report
+        }
+        self._prune()
+        self._save()
+
+    def promote(self, version: str, serving_path: str) -> None:
+        self._install(version, serving_path)
+        if self.registry['current']:
+            self.registry['history'].append(self.registry['current'])
+        self.registry['current'] = version
+        self.registry['versions'][version]['status'] = 'promoted'
+        self._save()
+
+    def rollback(self, serving_path: str) -> Optional[str]:
+        """Reinstall the previously promoted version; None when there is none left"""
+        while self.registry['history']:
+            version = self.registry['history'].pop()
+            if os.path.exists(self.path(version)):
+                self._install(version, serving_path)
+                if self.registry['current']:
+                    self.registry['versions'][self.registry['current']]['status'] = 'rolled_back'
+                self.registry['current'] = version
+                self._save()
+                return version
+        return None
+
+    def _install(self, version: str, serving_path: str) -> None:
+        directory = os.path.dirname(serving_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f'.{os.path.basename(serving_path)}.{os.getpid()}.tmp')
+        shutil.copyfile(self.path(version), tmp_path)
+        os.replace(tmp_path, serving_path)
+
+    def _prune(self) -> None:
+        pinned = set(self.registry['history'][-self.keep:]) | {self.registry['current']}
+        versions = sorted(self.registry['versions'])
+        for version in versions[:-self.keep]:
+            if version not in pinned and os.path.exists(self.path(version)):
+                os.remove(self.path(version))
+                self.registry['versions'][version]['deleted'] = True
+
+    def _save(self) -> None:
+        write_json_atomic(self.registry_path, self.registry)
+
+
+class RetrainingManager:
+    """Retrain the live predictor in the background and hot-swap validated models
+
+    Readings passed to observe() accumulate in a bounded history;
+    retraining starts after TRAINING_INTERVAL new readings (once at least
+    MIN_DATA_POINTS are held) or when the rolling forecast RMSE drifts
+    DRIFT_THRESHOLD above the level measured at the last promotion. A
+    spawned process trains the candidate and scores it and the serving
+    models on the newest readings; a candidate no worse than the
+    incumbent (within ``tolerance``) is swapped in by replacing the
+    predictor's model references, so in-flight predictions finish on the
+    old models and new ones see the new models without any pause.
+    """
+
+    def __init__(self, predictor, executor=None, versions_dir: Optional[str] = None,
+                 training_interval: Optional[int] = None, min_data_points: Optional[int] = None,
+                 history_size: Optional[int] = None, holdout: float = 0.2, tolerance: float = 0.05,
+                 drift_threshold: Optional[float] = None, timeout: Optional[float] = None):
+        load_dotenv()
+        self.predictor = predictor
+        self.executor = executor
+        self.logger = logging.getLogger(__name__)
+        self.versions = ModelVersions(versions_dir or os.getenv('MODEL_VERSIONS_DIR', 'models/versions'))
+        self.training_interval = training_interval or int(os.getenv('TRAINING_INTERVAL', '100'))
+        self.min_data_points = min_data_points or int(os.getenv('MIN_DATA_POINTS', '24'))
+        self.history: Deque[Dict] = deque(maxlen=history_size or int(os.getenv('RETRAIN_HISTORY_SIZE', '5000')))
+        self.holdout = holdout
+        self.tolerance = tolerance
+        self.drift_threshold = drift_threshold or float(os.getenv('DRIFT_THRESHOLD', '0.5'))
+        self.timeout = timeout or float(os.getenv('TRAINING_TIMEOUT', '3600'))
+        self.new_readings = 0
+        self.baseline_error: Optional[float] = None
+        self.forecasts: Dict[str, Dict] = {}
+        self.errors: Deque[float] = deque(maxlen=int(os.getenv('DRIFT_WINDOW', '48')))
+        self.last_report: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.mp_context = multiprocessing.get_context('spawn')
+        if self.versions.current:
+            MODEL_VERSION.set(int(self.versions.current))
+
+    @staticmethod
+    def _hour_key(timestamp) -> str:
+        if isinstance(timestamp, (int, float)):
+            moment = datetime.fromtimestamp(timestamp, timezone.utc)
+        else:
+            moment = datetime.fromisoformat(str(timestamp))
+        return moment.replace(minute=0, second=0, microsecond=0, tzinfo=None).isoformat()
+
+    def track_forecast(self, forecast: List[Dict], recent_data=None) -> None:
+        """Remember forecast values so later readings can score them
+
+        Forecasts from predict_weather are in the units of the scalers it
+        fitted on its input; pass that input as ``recent_data`` to score
+        them in reading units.
+        """
+        if recent_data is not None:
+            forecast = forecast_in_reading_units(forecast, recent_data)
+        for entry in forecast:
+            self.forecasts[self._hour_key(entry['timestamp'])] = entry
+        if len(self.forecasts) > 4 * self.history.maxlen:
+            for key in sorted(self.forecasts)[:len(self.forecasts) // 2]:
+                del self.forecasts[key]
+
+    def observe(self, reading: Dict) -> None:
+        self.history.append(reading)
+        self.new_readings += 1
+        try:
+            forecast = self.forecasts.pop(self._hour_key(reading['timestamp']), None)
+        except (KeyError, ValueError, TypeError):
+            forecast = None
+        if forecast is not None:
+            squared = [(float(forecast[p]) - float(reading[p])) ** 2 for p in ('temperature', 'humidity', 'pressure')]
+            self.errors.append(float(np.mean(squared)))
+            FORECAST_ERROR.set(self.forecast_rmse)
+
+    @property
+    def forecast_rmse(self) -> Optional[float]:
+        return math.sqrt(float(np.mean(self.errors))) if self.errors else None
+
+    def drifted(self) -> bool:
+        """Rolling forecast error is DRIFT_THRESHOLD above the baseline (set on first full window)"""
+        if len(self.errors) < self.errors.maxlen:
+            return False
+        if self.baseline_error is None:
+            self.baseline_error = self.forecast_rmse
+            return False
+        return self.forecast_rmse > self.baseline_error * (1 + self.drift_threshold)
+
+    def retrain_reason(self) -> Optional[str]:
+        if len(self.history) < self.min_data_points:
+            return None
+        if self.new_readings >= self.training_interval:
+            return 'volume'
+        if self.drifted():
+            return 'drift'
+        return None
+
+    def maybe_retrain(self) -> bool:
+        """Start a background retrain when due; False if not due or one is running"""
+        reason = self.retrain_reason()
+        if reason is None or (self._task and not self._task.done()):
+            return False
+        self._task = asyncio.get_running_loop().create_task(self.retrain(reason))
+        return True
+
+    async def retrain(self, reason: str = 'manual') -> Dict[str, Any]:
+        """Train, validate and (if accepted) promote a candidate; returns the run's report"""
+        loop = asyncio.get_running_loop()
+        version = self.versions.new_version()
+        candidate_path = self.versions.path(version)
+        history = list(self.history)
+        self.new_readings = 0
+        incumbent = self.predictor.models_path if os.path.exists(self.predictor.models_path) else None
+        os.makedirs(self.versions.root, exist_ok=True)
+
+        parent_conn, child_conn = self.mp_context.Pipe(duplex=False)
+        process = self.mp_context.Process(
+            target=_candidate_job,
+            args=(child_conn, self.predictor, history, candidate_path, incumbent, self.holdout),
+            daemon=True
+        )
+        await loop.run_in_executor(get_shared_executor(), start_background_process, process)
+        child_conn.close()
+        try:
+            ok, payload = await asyncio.wait_for(
+                loop.run_in_executor(get_shared_executor(), parent_conn.recv), self.timeout
+            )
+        except EOFError:
+            ok, payload = False, "training process exited unexpectedly"
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.terminate()
+            raise
+        finally:
+            loop.run_in_executor(get_shared_executor(), process.join)
+
+        report = {'version': version, 'reason': reason, 'readings': len(history)}
+        if not ok:
+            self.logger.error(f"Retraining failed: {payload}")
+            RETRAINS.labels(outcome='failed').inc()
+            self.last_report = {**report, 'outcome': 'failed', 'error': str(payload)}
+            return self.last_report
+
+        report.update(payload)
+        incumbent_rmse = payload['incumbent_rmse']
+        accepted = incumbent_rmse is None or payload['candidate_rmse'] <= incumbent_rmse * (1 + self.tolerance)
+        self.versions.add(version, payload, 'validated' if accepted else 'rejected')
+        if accepted:
+            await self._swap(version)
+            self.baseline_error = None
+            self.errors.clear()
+        else:
+            os.remove(candidate_path)
+        RETRAINS.labels(outcome='promoted' if accepted else 'rejected').inc()
+        self.logger.info(f"Retrained model {version} ({reason}): {'promoted' if accepted else 'rejected'}")
+        self.last_report = {**report, 'outcome': 'promoted' if accepted else 'rejected'}
+        return self.last_report
+
+    async def rollback(self) -> Optional[str]:
+        """Serve the previously promoted version again"""
+        loop = asyncio.get_running_loop()
+        version = await loop.run_in_executor(get_shared_executor(), self.versions.rollback,
+                                             self.predictor.models_path)
+        if version:
+            await self._load(version)
+            self.logger.warning(f"Rolled back to model {version}")
+        return version
+
+    async def _swap(self, version: str) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(get_shared_executor(), self.versions.promote, version,
+                                   self.predictor.models_path)
+        await self._load(version)
+
+    async def _load(self, version: str) -> None:
+        loop = asyncio.get_running_loop()
+        bundle = await loop.run_in_executor(get_shared_executor(), self.predictor._read_bundle,
+                                            self.versions.path(version))
+        if bundle is None:
+            raise RuntimeError(f"Model version {version} could not be loaded")
+        # Unpickling happened off the loop; the swap itself is a reference assignment
+        self.predictor.install_models(bundle, version)
+        MODEL_VERSION.set(int(version))
+        if self.executor is not None:
+            await self.executor.reload_models()
+
+    async def close(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
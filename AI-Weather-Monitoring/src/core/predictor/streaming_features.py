@@ -0,0 +1,234 @@
+import glob
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import RobustScaler
+
+WEATHER_PARAMS = ['temperature', 'humidity', 'pressure']
+DERIVED_FEATURES = ['temp_humidity_ratio', 'pressure_change_rate']
+# Longest look-back in prepare_features: the 24-row rolling window
+CARRY_ROWS = 24
+
+
+def feature_columns(param: str) -> List[str]:
+    """Model inputs for ``param`` in the order prepare_features produces them"""
+    return [param] + [
+        f'{param}_{suffix}' for suffix in (
+            'hour_avg', 'day_avg', 'rolling_mean_6h', 'rolling_mean_24h',
+            'rolling_std_24h', 'rate_1h', 'rate_6h'
+        )
+    ] + DERIVED_FEATURES
+
+
+def expand_paths(patterns: Iterable[str]) -> List[str]:
+    """Expand files, directories and globs into a chronologically named file list"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        paths.extend(p for p in glob.glob(pattern) if p.lower().endswith(('.csv', '.jsonl', '.json')))
+    return sorted(set(paths))
+
+
+def _normalise(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk[['timestamp'] + WEATHER_PARAMS].copy()
+    for param in WEATHER_PARAMS:
+        chunk[param] = pd.to_numeric(chunk[param], errors='coerce')
+    if pd.api.types.is_numeric_dtype(chunk['timestamp']):
+        chunk['datetime'] = pd.to_datetime(chunk['timestamp'], unit='s')
+    else:
+        chunk['datetime'] = pd.to_datetime(chunk['timestamp'], format='ISO8601')
+    return chunk.dropna(subset=['datetime']).reset_index(drop=True)
+
+
+def iter_history(paths: Iterable[str], chunk_rows: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Yield stored readings in chunks of at most ``chunk_rows`` rows
+
+    CSV and JSON-lines files are streamed; a plain .json list (such as the
+    DataCache file) is small by construction and read whole.
+    """
+    for path in paths:
+        lower = path.lower()
+        if lower.endswith('.csv'):
+            reader = pd.read_csv(path, chunksize=chunk_rows)
+        elif lower.endswith('.jsonl'):
+            reader = pd.read_json(path, lines=True, chunksize=chunk_rows, convert_dates=False)
+        else:
+            with open(path, 'r') as f:
+                frame = pd.DataFrame(json.load(f))
+            reader = (frame.iloc[i:i + chunk_rows] for i in range(0, len(frame), chunk_rows))
+        for chunk in reader:
+            if len(chunk):
+                yield _normalise(chunk)
+
+
+class FeatureStats:
+    """Dataset-wide statistics gathered in a first pass over the history
+
+    prepare_features uses whole-dataset hour-of-day and day-of-month means
+    and fits its RobustScaler on every value. Means are exact running sums;
+    the scaler is fitted on a uniform reservoir sample, which is exact when
+    the history fits in the reservoir.
+    """
+
+    def __init__(self, reservoir_size: int = 200_000, seed: int = 42):
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.hour_sum = {p: np.zeros(24) for p in WEATHER_PARAMS}
+        self.hour_count = {p: np.zeros(24) for p in WEATHER_PARAMS}
+        self.day_sum = {p: np.zeros(32) for p in WEATHER_PARAMS}
+        self.day_count = {p: np.zeros(32) for p in WEATHER_PARAMS}
+        self.reservoir = {p: np.empty(0) for p in WEATHER_PARAMS}
+        self.seen = {p: 0 for p in WEATHER_PARAMS}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.update_arrays(
+            chunk['datetime'].dt.hour.to_numpy(),
+            chunk['datetime'].dt.day.to_numpy(),
+            {param: chunk[param].to_numpy(dtype=float) for param in WEATHER_PARAMS}
+        )
+
+    def update_arrays(self, hours: np.ndarray, days: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        hours, days = hours.astype(np.intp), days.astype(np.intp)
+        self.rows += len(hours)
+        for param in WEATHER_PARAMS:
+            column = np.asarray(values[param], dtype=float)
+            valid = ~np.isnan(column)
+            self.hour_sum[param] += np.bincount(hours[valid], column[valid], minlength=24)
+            self.hour_count[param] += np.bincount(hours[valid], minlength=24)
+            self.day_sum[param] += np.bincount(days[valid], column[valid], minlength=32)
+            self.day_count[param] += np.bincount(days[valid], minlength=32)
+            self._sample(param, column[valid])
+
+    def _sample(self, param: str, values: np.ndarray) -> None:
+        reservoir, seen = self.reservoir[param], self.seen[param]
+        room = self.reservoir_size - len(reservoir)
+        if room > 0:
+            reservoir = np.concatenate([reservoir, values[:room]])
+            seen += min(room, len(values))
+            values = values[room:]
+        if len(values):
+            # Algorithm R, vectorised over the chunk
+            slots = self.rng.integers(0, np.arange(seen + 1, seen + len(values) + 1))
+            keep = slots < self.reservoir_size
+            reservoir[slots[keep]] = values[keep]
+            seen += len(values)
+        self.reservoir[param], self.seen[param] = reservoir, seen
+
+    def hour_means(self, param: str) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.hour_sum[param] / self.hour_count[param]
+
+    def day_means(self, param: str) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.day_sum[param] / self.day_count[param]
+
+    def fit_scalers(self) -> Dict[str, RobustScaler]:
+        return {p: RobustScaler().fit(self.reservoir[p].reshape(-1, 1)) for p in WEATHER_PARAMS}
+
+
+class WindowedFeatures:
+    """The look-back part of prepare_features, computed chunk by chunk
+
+    Rolling means, rolling std and rates only depend on nearby rows, so the
+    last ``CARRY_ROWS`` raw rows of each chunk are prepended to the next
+    one and chunk boundaries leave no gaps. Everything that depends on the
+    whole dataset (group means, scaling) is left to ``finalize``.
+    """
+
+    def __init__(self):
+        self.carry: Optional[pd.DataFrame] = None
+        self.rows_in = 0
+
+    def reset(self) -> None:
+        self.carry = None
+        self.rows_in = 0
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Windowed columns for ``chunk``; ``row`` holds each reading's position in the stream"""
+        chunk = chunk.copy()
+        chunk['row'] = np.arange(self.rows_in, self.rows_in + len(chunk))
+        self.rows_in += len(chunk)
+        carried = 0 if self.carry is None else len(self.carry)
+        df = chunk if self.carry is None else pd.concat([self.carry, chunk], ignore_index=True)
+        self.carry = df.iloc[-CARRY_ROWS:].reset_index(drop=True)
+
+        df = df.copy()
+        df['hour'] = df['datetime'].dt.hour
+        df['day'] = df['datetime'].dt.day
+        for param in WEATHER_PARAMS:
+            rolling_data = df[param].rolling(window=24)
+            df[f'{param}_rolling_mean_6h'] = df[param].rolling(window=6).mean()
+            df[f'{param}_rolling_mean_24h'] = rolling_data.mean()
+            df[f'{param}_rolling_std_24h'] = rolling_data.std()
+            df[f'{param}_rate_1h'] = df[param].diff(1)
+            df[f'{param}_rate_6h'] = df[param].diff(6)
+        # Scaling is linear, so the scaled pressure's smoothed diff is this divided by the scale
+        df['pressure_diff_mean_6'] = df['pressure'].diff().rolling(6).mean()
+        return df.iloc[carried:].reset_index(drop=True)
+
+
+WINDOW_COLUMNS = ['hour', 'day'] + WEATHER_PARAMS + [
+    f'{param}_{suffix}' for param in WEATHER_PARAMS for suffix in (
+        'rolling_mean_6h', 'rolling_mean_24h', 'rolling_std_24h', 'rate_1h', 'rate_6h'
+    )
+] + ['pressure_diff_mean_6']
+
+
+def finalize(windowed: pd.DataFrame, hour_means: Dict[str, np.ndarray], day_means: Dict[str, np.ndarray],
+             scalers: Dict[str, RobustScaler]) -> pd.DataFrame:
+    """Apply the dataset-wide parts and return prepare_features' layout (plus ``row``)"""
+    hours = windowed['hour'].to_numpy(dtype=np.intp)
+    days = windowed['day'].to_numpy(dtype=np.intp)
+    df = pd.DataFrame({'timestamp': windowed['timestamp']})
+    for param in WEATHER_PARAMS:
+        df[param] = scalers[param].transform(windowed[[param]].to_numpy())[:, 0]
+    df['datetime'] = windowed['datetime']
+    for param in WEATHER_PARAMS:
+        df[f'{param}_hour_avg'] = hour_means[param][hours]
+        df[f'{param}_day_avg'] = day_means[param][days]
+        for suffix in ('rolling_mean_6h', 'rolling_mean_24h', 'rolling_std_24h', 'rate_1h', 'rate_6h'):
+            df[f'{param}_{suffix}'] = windowed[f'{param}_{suffix}']
+    df['temp_humidity_ratio'] = df['temperature'] / df['humidity']
+    df['pressure_change_rate'] = windowed['pressure_diff_mean_6'] / scalers['pressure'].scale_[0]
+    if 'row' in windowed:
+        df['row'] = windowed['row']
+    return df.dropna().reset_index(drop=True)
+
+
+class StreamingFeatureBuilder:
+    """Produce prepare_features output chunk by chunk from first-pass statistics"""
+
+    def __init__(self, stats: FeatureStats, scalers: Optional[Dict[str, RobustScaler]] = None):
+        self.scalers = scalers or stats.fit_scalers()
+        self.hour_means = {p: stats.hour_means(p) for p in WEATHER_PARAMS}
+        self.day_means = {p: stats.day_means(p) for p in WEATHER_PARAMS}
+        self.windows = WindowedFeatures()
+
+    def reset(self) -> None:
+        self.windows.reset()
+
+    def finalize(self, windowed: pd.DataFrame) -> pd.DataFrame:
+        return finalize(windowed, self.hour_means, self.day_means, self.scalers)
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        return self.finalize(self.windows.transform(chunk))
+
+
+def collect_stats(paths: List[str], chunk_rows: int, reservoir_size: int = 200_000) -> FeatureStats:
+    stats = FeatureStats(reservoir_size)
+    for chunk in iter_history(paths, chunk_rows):
+        stats.update(chunk)
+    return stats
+
+
+def iter_features(paths: List[str], builder: StreamingFeatureBuilder, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    builder.reset()
+    for chunk in iter_history(paths, chunk_rows):
+        features = builder.transform(chunk)
+        if len(features):
+            yield features
@@ -1,19 +1,27 @@
+import hashlib
+import json
 import os
+import re
+import time
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import StackingRegressor, GradientBoostingRegressor, RandomForestRegressor
 from sklearn.svm import SVR
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+from sklearn.multioutput import MultiOutputRegressor
 import xgboost as xgb
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 import joblib
 from dotenv import load_dotenv
 from functools import lru_cache
 from abc import ABC, abstractmethod
 from pathlib import Path
+from src.core.predictor.batch_features import BatchFeatureBuilder
+from src.utils.clock import get_clock
+from src.utils.metrics import get_registry
 
 
 # Base paths
@@ -23,6 +31,23 @@ MODEL_DIR = BASE_DIR / 'models' / 'saved_models'
 
 # Model settings
 WEATHER_PARAMS = ['temperature', 'humidity', 'pressure']
+# Station key for readings that don't carry a station_id (single-station setups)
+DEFAULT_STATION = 'default'
+_UNSAFE_PATH_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def station_path(station_id: str) -> str:
+    """File-system safe directory name for a station
+
+    Ids made only of dots ('.', '..') would name the current or parent
+    directory, so they are replaced by a hash of the id.
+    """
+    name = _UNSAFE_PATH_CHARS.sub('_', station_id) or '_'
+    if not name.strip('.'):
+        return '_' + hashlib.sha256(station_id.encode('utf-8')).hexdigest()[:16]
+    return name
+
+
 FEATURE_COLUMNS = ['hour', 'day', 'temp_humidity_ratio', 'pressure_change_rate']
 VALID_RANGES = {
     'temperature': (-50, 60),
@@ -30,6 +55,160 @@ VALID_RANGES = {
     'pressure': (900, 1100)
 }
 
+PREDICT_SECONDS = get_registry().histogram(
+    'weather_predict_seconds', 'Model inference time', ['kind'])
+READINGS_DROPPED = get_registry().counter(
+    'weather_readings_dropped_total', 'Readings discarded before prediction', ['reason'])
+_PREDICT_READING = PREDICT_SECONDS.labels(kind='reading')
+_PREDICT_BATCH = PREDICT_SECONDS.labels(kind='batch')
+_PREDICT_FORECAST = PREDICT_SECONDS.labels(kind='forecast')
+_DROPPED_INVALID = READINGS_DROPPED.labels(reason='invalid')
+
+# Stacking ensemble hyper-parameters; a JSON file at ENSEMBLE_CONFIG (written
+# by model_search) overrides them. Zero estimators drops that base model.
+ENSEMBLE_DEFAULTS = {
+    'rf_estimators': 500,
+    'rf_max_depth': 15,
+    'rf_min_samples_split': 5,
+    'xgb_estimators': 300,
+    'xgb_max_depth': 8,
+    'xgb_learning_rate': 0.05,
+    'gbm_estimators': 300,
+    'gbm_max_depth': 8,
+    'gbm_learning_rate': 0.05,
+    'svr_c': 1.0,
+    'svr_epsilon': 0.1
+}
+
+
+def load_ensemble_config(path: Optional[str] = None) -> Dict:
+    """ENSEMBLE_DEFAULTS updated with the saved config, if there is one"""
+    config = dict(ENSEMBLE_DEFAULTS)
+    path = path or os.getenv('ENSEMBLE_CONFIG', 'models/ensemble_config.json')
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            config.update({key: saved[key] for key in ENSEMBLE_DEFAULTS if key in saved})
+    except Exception as e:
+        logging.error(f"Error loading ensemble config {path}: {e}")
+    return config
+
+
+def build_ensemble(config: Optional[Dict] = None, n_jobs: int = -1) -> StackingRegressor:
+    """Stacking regressor of RF, XGBoost and GBM under an RBF SVR"""
+    config = {**ENSEMBLE_DEFAULTS, **(config or {})}
+    estimators = []
+    if config['rf_estimators']:
+        estimators.append(('rf', RandomForestRegressor(
+            n_estimators=config['rf_estimators'],
+            max_depth=config['rf_max_depth'],
+            min_samples_split=config['rf_min_samples_split'],
+            n_jobs=n_jobs,
+            random_state=42
+        )))
+    if config['xgb_estimators']:
+        estimators.append(('xgb', xgb.XGBRegressor(
+            n_estimators=config['xgb_estimators'],
+            learning_rate=config['xgb_learning_rate'],
+            max_depth=config['xgb_max_depth'],
+            subsample=0.8,
+            colsample_bytree=0.8,
+            n_jobs=None if n_jobs == -1 else n_jobs,
+            random_state=42
+        )))
+    if config['gbm_estimators']:
+        estimators.append(('gbm', GradientBoostingRegressor(
+            n_estimators=config['gbm_estimators'],
+            learning_rate=config['gbm_learning_rate'],
+            max_depth=config['gbm_max_depth'],
+            subsample=0.8,
+            random_state=42
+        )))
+    if not estimators:
+        raise ValueError("Ensemble config leaves no base estimator")
+    return StackingRegressor(
+        estimators=estimators,
+        final_estimator=SVR(kernel='rbf', C=config['svr_c'], epsilon=config['svr_epsilon'])
+    )
+
+
+HORIZON_UNITS = {'h': 1, 'd': 24}
+
+
+def _hours(value: str) -> int:
+    value = value.strip().lower()
+    if value and value[-1] in HORIZON_UNITS:
+        return int(value[:-1]) * HORIZON_UNITS[value[-1]]
+    return int(value)
+
+
+def parse_horizons(spec: str) -> List[Tuple[int, int]]:
+    """Forecast resolution as (step hours, until hours) segments
+
+    ``'1h:24h,3h:7d'`` steps hourly to 24 hours, then 3-hourly to 7 days.
+    A bare step (``'1h'``) applies to the whole forecast.
+    """
+    segments = []
+    for part in filter(None, (item.strip() for item in spec.split(','))):
+        step, _, until = part.partition(':')
+        segment = (_hours(step), _hours(until) if until else 0)
+        if segment[0] <= 0 or (until and segment[1] <= (segments[-1][1] if segments else 0)):
+            raise ValueError(f"Invalid forecast horizon segment {part!r}")
+        segments.append(segment)
+    if not segments:
+        raise ValueError("Empty forecast horizon spec")
+    return segments
+
+
+def horizon_offsets(segments: List[Tuple[int, int]], total_hours: int) -> List[int]:
+    """Lead times in hours up to ``total_hours``; the last step continues past the spec's end"""
+    offsets, lead = [], 0
+    for index, (step, until) in enumerate(segments):
+        last = index == len(segments) - 1
+        end = total_hours if last or not until else min(until, total_hours)
+        while lead + step <= end:
+            lead += step
+            offsets.append(lead)
+    return offsets
+
+
+def default_direct_model():
+    """Forests predict every lead natively, so one fit and one call cover all horizons"""
+    return RandomForestRegressor(n_estimators=100, max_depth=12, min_samples_leaf=2, n_jobs=-1, random_state=42)
+
+
+def multi_output(model):
+    """``model`` if it fits a 2-D target itself, else wrapped in one model per lead"""
+    try:
+        native = model.__sklearn_tags__().target_tags.multi_output
+    except AttributeError:
+        native = False
+    return model if native else MultiOutputRegressor(model)
+
+
+def forecast_in_reading_units(forecast: List[Dict],
+                              recent_data: Union[List[Dict], Dict[str, np.ndarray]]) -> List[Dict]:
+    """A forecast mapped back from the scaled units predict_weather returns
+
+    prepare_features fits each parameter's RobustScaler on the window the
+    forecast started from, so refitting on ``recent_data`` recovers it.
+    """
+    frame = pd.DataFrame(recent_data)
+    scalers = {param: RobustScaler().fit(frame[[param]].astype(float)) for param in WEATHER_PARAMS}
+    return [
+        {**step, **{param: float(step[param] * scalers[param].scale_[0] + scalers[param].center_[0])
+                    for param in WEATHER_PARAMS}}
+        for step in forecast
+    ]
+
+
+def horizon_steps(spec: str, total_hours: int) -> Set[int]:
+    """Step sizes a spec uses, i.e. the step models worth training for it"""
+    offsets = horizon_offsets(parse_horizons(spec), total_hours)
+    return {lead - previous for previous, lead in zip([0] + offsets, offsets)}
+
+
 class LoggerMixin:
     def log_error(self, message: str) -> None:
         logging.error(message)
@@ -70,12 +249,30 @@ class EnhancedWeatherPredictor(LoggerMixin):
         super().__init__()
         load_dotenv()
         self.model_path = os.getenv('MODEL_PATH', 'models/weather_model.joblib')
+        self.models_path = os.getenv('ENSEMBLE_PATH', 'models/weather_ensemble.joblib')
+        self.student_path = os.getenv('STUDENT_PATH', 'models/weather_student.joblib')
+        budget = os.getenv('PREDICT_LATENCY_BUDGET_MS')
+        self.latency_budget_ms = float(budget) if budget else None
+        # Provenance of self.models, e.g. a distilled student's measured latency
+        self.models_meta: Dict = {}
+        self.active_models = 'default'
+        # step hours -> per-parameter models predicting that far ahead, for coarse horizons
+        self.step_models: Dict[int, Dict] = {}
+        self.forecast_horizons = os.getenv('FORECAST_HORIZONS', '1h')
+        # {'leads': hours, 'models': per-parameter multi-output models} for the direct strategy
+        self.direct_models: Dict = {}
+        self.forecast_strategy = os.getenv('FORECAST_STRATEGY', 'recursive')
+        # Training sets at least this long use the vectorized float32 feature builder
+        self.batch_feature_rows = int(os.getenv('BATCH_FEATURE_ROWS', '100000'))
         self.model = self._load_model() or RandomForestRegressor(
             n_estimators=100,
             max_depth=10,
             random_state=42
         )
-        self.data_buffer = []
+        # One buffer per station; data_buffer stays the default station's
+        self.station_buffers: Dict[str, List[Dict]] = {DEFAULT_STATION: []}
+        self.data_buffer = self.station_buffers[DEFAULT_STATION]
+        self.buffer_size = int(os.getenv('BUFFER_SIZE', '1000'))
         self.min_samples = 24 * 7  # 7 days minimum
         self.setup_models()
         self.setup_scalers()
@@ -98,47 +295,78 @@ class EnhancedWeatherPredictor(LoggerMixin):
         except Exception as e:
             self.log_error(f"Error saving model: {e}")
 
+    def save_models(self, path: Optional[str] = None) -> bool:
+        """Atomically persist the per-parameter models and scalers"""
+        path = path or self.models_path
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            joblib.dump({'models': self.models, 'scalers': self.scalers, 'meta': self.models_meta,
+                         'step_models': self.step_models, 'direct_models': self.direct_models}, tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            self.log_error(f"Error saving models: {e}")
+            return False
+
+    def _read_bundle(self, path: str) -> Optional[Dict]:
+        # Imported here: the artifacts module builds on this one
+        from src.core.predictor.artifacts import is_artifact, load_artifact
+        try:
+            if os.path.exists(path):
+                return load_artifact(path) if is_artifact(path) else joblib.load(path)
+        except Exception as e:
+            self.log_error(f"Error loading models: {e}")
+        return None
+
+    def load_models(self, path: Optional[str] = None) -> bool:
+        """Load per-parameter models and scalers written by save_models"""
+        bundle = self._read_bundle(path or self.models_path)
+        if bundle is None:
+            return False
+        self.models = bundle['models']
+        self.scalers = bundle.get('scalers', self.scalers)
+        self.models_meta = bundle.get('meta', {})
+        self.step_models = bundle.get('step_models', {})
+        self.direct_models = bundle.get('direct_models', {})
+        return True
+
+    def install_models(self, bundle: Dict, version: Optional[str] = None) -> None:
+        """Swap in a loaded bundle; callers holding the old models finish on them"""
+        self.scalers = bundle.get('scalers', self.scalers)
+        self.models_meta = {**bundle.get('meta', {}), 'version': version}
+        self.step_models = bundle.get('step_models', self.step_models)
+        self.direct_models = bundle.get('direct_models', self.direct_models)
+        self.models = bundle['models']
+
+    def select_models(self, budget_ms: Optional[float] = None) -> str:
+        """Serve the full ensemble or its distilled student, whichever fits the latency budget
+
+        The budget is per forecast step (all parameters) in milliseconds,
+        PREDICT_LATENCY_BUDGET_MS by default, compared with the latencies
+        the distillation run measured. Without a budget or a student the
+        ensemble is served. Returns 'teacher', 'student' or 'default'.
+        """
+        budget_ms = self.latency_budget_ms if budget_ms is None else budget_ms
+        student = self._read_bundle(self.student_path) if budget_ms is not None else None
+        if student is not None:
+            meta = student.get('meta', {})
+            if meta.get('teacher_latency_ms', float('inf')) > budget_ms or not os.path.exists(self.models_path):
+                if meta.get('latency_ms', 0.0) > budget_ms:
+                    self.log_warning(f"No model meets the {budget_ms} ms budget, serving the student")
+                self.models = student['models']
+                self.scalers = student.get('scalers', self.scalers)
+                self.models_meta = meta
+                self.active_models = 'student'
+                return self.active_models
+        if self.load_models(self.models_path):
+            self.active_models = 'teacher'
+        return self.active_models
+
     def setup_models(self):
         # Create specialized models for each weather parameter
-        estimators = [
-            ('rf', RandomForestRegressor(
-                n_estimators=500,
-                max_depth=15,
-                min_samples_split=5,
-                n_jobs=-1,
-                random_state=42
-            )),
-            ('xgb', xgb.XGBRegressor(
-                n_estimators=300,
-                learning_rate=0.05,
-                max_depth=8,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                random_state=42
-            )),
-            ('gbm', GradientBoostingRegressor(
-                n_estimators=300,
-                learning_rate=0.05,
-                max_depth=8,
-                subsample=0.8,
-                random_state=42
-            ))
-        ]
-
-        self.models = {
-            'temperature': StackingRegressor(
-                estimators=estimators,
-                final_estimator=SVR(kernel='rbf')
-            ),
-            'humidity': StackingRegressor(
-                estimators=estimators,
-                final_estimator=SVR(kernel='rbf')
-            ),
-            'pressure': StackingRegressor(
-                estimators=estimators,
-                final_estimator=SVR(kernel='rbf')
-            )
-        }
+        config = load_ensemble_config()
+        self.models = {param: build_ensemble(config) for param in self.WEATHER_PARAMS}
 
     def setup_scalers(self):
         self.scalers = {
@@ -151,21 +379,23 @@ class EnhancedWeatherPredictor(LoggerMixin):
         """Process incoming sensor data and make prediction"""
         try:
             if not self.validate_weather_data(data):
+                _DROPPED_INVALID.inc()
                 return None
 
             processed_data = {
                 'temperature': float(data.get('temperature', 0.0)),
                 'humidity': float(data.get('humidity', 0.0)),
                 'pressure': float(data.get('pressure', 0.0)),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': get_clock().now().isoformat()
             }
             
-            self.data_buffer.append(processed_data)
-            prediction = self.predict([
-                processed_data['temperature'],
-                processed_data['humidity'],
-                processed_data['pressure']
-            ])
+            self._append_to_buffer(processed_data, data.get('station_id', DEFAULT_STATION))
+            with _PREDICT_READING.time():
+                prediction = self.predict([
+                    processed_data['temperature'],
+                    processed_data['humidity'],
+                    processed_data['pressure']
+                ])
             
             return {
                 'current': processed_data,
@@ -176,6 +406,78 @@ class EnhancedWeatherPredictor(LoggerMixin):
             self.log_error(f"Error processing sensor data: {e}")
             return None
 
+    def process_sensor_batch(self, batch: List[Dict]) -> List[Optional[Dict]]:
+        """Process several readings with a single model call"""
+        results: List[Optional[Dict]] = [None] * len(batch)
+        valid = []
+        for index, data in enumerate(batch):
+            if not self.validate_weather_data(data):
+                _DROPPED_INVALID.inc()
+                continue
+            processed_data = {
+                'temperature': float(data['temperature']),
+                'humidity': float(data['humidity']),
+                'pressure': float(data['pressure']),
+                'timestamp': get_clock().now().isoformat()
+            }
+            self._append_to_buffer(processed_data, data.get('station_id', DEFAULT_STATION))
+            valid.append((index, processed_data))
+
+        if valid:
+            with _PREDICT_BATCH.time():
+                codes = self.predict_batch(np.array([
+                    [item['temperature'], item['humidity'], item['pressure']]
+                    for _, item in valid
+                ]))
+            for (index, processed_data), code in zip(valid, codes):
+                results[index] = {
+                    'current': processed_data,
+                    'prediction': self.decode_prediction(code)
+                }
+        return results
+
+    def process_sensor_columns(self, columns: Dict[str, np.ndarray]) -> List[Dict]:
+        """process_sensor_batch for validated readings held as column arrays, e.g. a SharedRingBuffer window
+
+        The arrays are read in place and the readings are not buffered;
+        their history is the columns' owner.
+        """
+        if not len(columns['timestamp']):
+            return []
+        with _PREDICT_BATCH.time():
+            codes = self.predict_batch(np.column_stack([columns[param] for param in self.WEATHER_PARAMS]))
+        rows = zip(columns['timestamp'].tolist(), *(columns[param].tolist() for param in self.WEATHER_PARAMS))
+        return [
+            {
+                'current': {'temperature': temperature, 'humidity': humidity, 'pressure': pressure,
+                            'timestamp': datetime.fromtimestamp(timestamp).isoformat()},
+                'prediction': self.decode_prediction(code)
+            }
+            for (timestamp, temperature, humidity, pressure), code in zip(rows, codes)
+        ]
+
+    def _append_to_buffer(self, processed_data: Dict, station_id: str = DEFAULT_STATION) -> None:
+        # Stations only ever touch their own list, so concurrent readings need no lock
+        buffer = self.station_buffers.get(station_id)
+        if buffer is None:
+            buffer = self.station_buffers.setdefault(station_id, [])
+        # Trim in bulk so appends stay O(1) amortized
+        buffer.append(processed_data)
+        if len(buffer) > 2 * self.buffer_size:
+            del buffer[:-self.buffer_size]
+
+    def predict_batch(self, features: np.ndarray) -> List[int]:
+        """Make weather predictions for a 2-D array of sensor readings"""
+        try:
+            if not self.model:
+                self.log_error("No model available for prediction")
+                return [0] * len(features)
+
+            return [int(value) for value in self.model.predict(features)]
+        except Exception as e:
+            self.log_error(f"Prediction error: {e}")
+            return [0] * len(features)
+
     def predict(self, features: List[float]) -> int:
         """Make weather prediction from sensor data"""
         try:
@@ -253,10 +555,15 @@ class EnhancedWeatherPredictor(LoggerMixin):
         
         return df.dropna()
 
-    async def train_model(self, historical_data: List[Dict]) -> Dict[str, float]:
-        """Train models with advanced validation"""
+    async def train_model(self, historical_data: List[Dict],
+                          features: Optional[pd.DataFrame] = None) -> Dict[str, float]:
+        """Train models with advanced validation
+
+        ``features`` skips feature engineering, e.g. FeatureStore.load output
+        loaded with this predictor's scalers.
+        """
         try:
-            df = self.prepare_features(historical_data)
+            df = self.prepare_training_features(historical_data) if features is None else features
             metrics = {}
             
             # Use time series cross-validation
@@ -292,12 +599,98 @@ class EnhancedWeatherPredictor(LoggerMixin):
             logging.error(f"Training error: {e}")
             return {}
 
-    def _predict_parameter(self, param: str, features) -> float:
-        """Make prediction for a specific weather parameter"""
+    async def train_step_models(self, historical_data: List[Dict], steps: Optional[Iterable[int]] = None,
+                                features: Optional[pd.DataFrame] = None,
+                                model_factory=default_direct_model) -> Dict[int, Dict[str, Dict[str, float]]]:
+        """Train models that predict ``step`` hours ahead, for the coarse steps of a horizon spec
+
+        Readings are assumed hourly, so the target is the scaled value
+        ``step`` rows later. Each model is a fresh ``model_factory()``
+        rather than a copy of the stacked 1-hour ensemble, whose nested
+        cross-validation would multiply the cost of every step. ``steps``
+        defaults to those of FORECAST_HORIZONS over a 7-day forecast.
+        """
+        try:
+            df = self.prepare_training_features(historical_data) if features is None else features
+            steps = sorted(set(steps or horizon_steps(self.forecast_horizons, 7 * 24)) - {1})
+            trained, metrics = {}, {}
+            tscv = TimeSeriesSplit(n_splits=5)
+            for step in steps:
+                trained[step], metrics[step] = {}, {}
+                for param in self.WEATHER_PARAMS:
+                    X = df[self._feature_cols(df, param)].values[:-step]
+                    y = df[param].values[step:]
+                    model = model_factory()
+                    scores = cross_val_score(model, X, y, cv=tscv, scoring='neg_root_mean_squared_error')
+                    trained[step][param] = model.fit(X, y)
+                    metrics[step][param] = {'rmse': float(-scores.mean()), 'std': float(scores.std())}
+            self.step_models = {**self.step_models, **trained}
+            return metrics
+        except Exception as e:
+            logging.error(f"Step model training error: {e}")
+            return {}
+
+    async def train_direct_models(self, historical_data: List[Dict], horizons: Optional[str] = None,
+                                  days_ahead: int = 7, features: Optional[pd.DataFrame] = None,
+                                  model_factory=default_direct_model) -> Dict[str, Dict[str, float]]:
+        """Fit one multi-output model per parameter that predicts every lead of a horizon spec
+
+        Row ``i`` is labelled with the scaled values ``lead`` rows later for
+        each lead (readings assumed hourly). The direct strategy then needs
+        a single predict call per parameter however long the forecast is,
+        and errors do not compound through fed-back predictions.
+        """
+        try:
+            df = self.prepare_training_features(historical_data) if features is None else features
+            leads = horizon_offsets(parse_horizons(horizons or self.forecast_horizons), days_ahead * 24)
+            rows = len(df) - leads[-1]
+            models, metrics = {}, {}
+            tscv = TimeSeriesSplit(n_splits=5)
+            for param in self.WEATHER_PARAMS:
+                X = df[self._feature_cols(df, param)].values[:rows]
+                Y = np.column_stack([df[param].values[lead:lead + rows] for lead in leads])
+                model = multi_output(model_factory())
+                scores = cross_val_score(model, X, Y, cv=tscv, scoring='neg_root_mean_squared_error')
+                models[param] = model.fit(X, Y)
+                metrics[param] = {'rmse': float(-scores.mean()), 'std': float(scores.std())}
+            self.direct_models = {'leads': leads, 'models': models}
+            return metrics
+        except Exception as e:
+            logging.error(f"Direct model training error: {e}")
+            return {}
+
+    def _predict_direct(self, features: pd.DataFrame, offsets: List[int]) -> List[Dict]:
+        """All leads from the latest feature row: one batched call per parameter"""
+        current_features = features.iloc[-1:]
+        current_date = features.iloc[-1]['datetime']
+        columns = {lead: index for index, lead in enumerate(self.direct_models['leads'])}
+        outputs = {
+            param: self.direct_models['models'][param].predict(
+                current_features[self._feature_cols(current_features, param)].values
+            )[0]
+            for param in self.WEATHER_PARAMS
+        }
+        predictions = []
+        for lead in offsets:
+            prediction = {
+                'timestamp': (current_date + timedelta(hours=lead)).isoformat(),
+                **{param: float(outputs[param][columns[lead]]) for param in self.WEATHER_PARAMS}
+            }
+            prediction['weather_type'] = self._determine_weather_type(prediction)
+            prediction['confidence'] = self._calculate_confidence(prediction)
+            predictions.append(prediction)
+        return predictions
+
+    @staticmethod
+    def _feature_cols(features: pd.DataFrame, param: str) -> List[str]:
+        return [col for col in features.columns if col.startswith(param) or
+                col in ['hour', 'day', 'temp_humidity_ratio', 'pressure_change_rate']]
+
+    def _predict_parameter(self, param: str, features, step: int = 1) -> float:
+        """Make prediction for a specific weather parameter ``step`` hours ahead"""
         try:
-            feature_cols = [col for col in features.columns if col.startswith(param) or 
-                          col in ['hour', 'day', 'temp_humidity_ratio', 'pressure_change_rate']]
-            return float(self.models[param].predict(features[feature_cols]))
+            models = self.step_models[step] if step != 1 else self.models
+            return float(models[param].predict(features[self._feature_cols(features, param)])[0])
         except Exception as e:
             self.log_error(f"Error predicting {param}: {e}")
             return 0.0
@@ -351,57 +744,75 @@ class EnhancedWeatherPredictor(LoggerMixin):
             prediction['pressure']
         )
 
-    async def predict_weather(self, recent_data: List[Dict], days_ahead: int = 7) -> List[Dict]:
-        """Optimized weather prediction with batched processing"""
+    async def predict_weather(self, recent_data: List[Dict], days_ahead: int = 7,
+                              horizons: Optional[str] = None, strategy: Optional[str] = None) -> List[Dict]:
+        """Optimized weather prediction at the resolution of a horizon spec
+
+        ``horizons`` (FORECAST_HORIZONS by default, hourly unless set) is
+        parsed by parse_horizons, e.g. ``'1h:24h,3h:7d'``. A coarse step
+        with trained step models is one model evaluation per parameter;
+        without them it falls back to hourly steps that are not emitted.
+        ``strategy`` (FORECAST_STRATEGY by default) ``'direct'`` uses the
+        direct models when they cover every lead, else the recursive
+        rollout runs.
+        """
+        started = time.perf_counter()
         try:
             df = self.prepare_features(recent_data)
             predictions = []
             
             # Pre-allocate features matrix
             current_features = df.iloc[-1:].copy()
-            current_date = pd.to_datetime(df.iloc[-1]['timestamp'])
+            current_date = df.iloc[-1]['datetime']
+            offsets = horizon_offsets(parse_horizons(horizons or self.forecast_horizons), days_ahead * 24)
+            if (strategy or self.forecast_strategy) == 'direct':
+                if self.direct_models and set(offsets) <= set(self.direct_models['leads']):
+                    return self._predict_direct(df, offsets)
+                self.log_warning("Direct models do not cover the requested horizons, using the recursive rollout")
             
-            # Batch predictions for better performance
-            BATCH_SIZE = 24  # Process one day at a time
-            total_hours = days_ahead * 24
-            
-            for batch_start in range(0, total_hours, BATCH_SIZE):
-                batch_end = min(batch_start + BATCH_SIZE, total_hours)
-                batch_predictions = []
-                
-                for hour in range(batch_start, batch_end):
-                    next_date = current_date + timedelta(hours=hour+1)
-                    
+            previous = 0
+            for offset in offsets:
+                step = offset - previous
+                hops = [step] if step == 1 or step in self.step_models else [1] * step
+                lead = previous
+                for hop in hops:
+                    lead += hop
                     # Parallel parameter prediction
                     pred_params = {
-                        param: self._predict_parameter(param, current_features) 
+                        param: self._predict_parameter(param, current_features, hop)
                         for param in self.WEATHER_PARAMS
                     }
-                    
                     prediction = {
-                        'timestamp': next_date.isoformat(),
+                        'timestamp': (current_date + timedelta(hours=lead)).isoformat(),
                         **pred_params
                     }
-                    
-                    # Add derived predictions
-                    prediction['weather_type'] = self._determine_weather_type(prediction)
-                    prediction['confidence'] = self._calculate_confidence(prediction)
-                    
-                    batch_predictions.append(prediction)
-                    current_features = self._update_features(current_features, prediction)
+                    current_features = self._update_features(current_features, prediction, hop)
                 
-                predictions.extend(batch_predictions)
+                # Add derived predictions
+                prediction['weather_type'] = self._determine_weather_type(prediction)
+                prediction['confidence'] = self._calculate_confidence(prediction)
+                predictions.append(prediction)
+                previous = offset
             
             return predictions
                 
         except Exception as e:
             self.log_error(f"Prediction error: {e}")
             return []
+        finally:
+            _PREDICT_FORECAST.observe(time.perf_counter() - started)
     
-    def prepare_features(self, data: List[Dict]) -> pd.DataFrame:
-        """Optimized feature engineering with vectorized operations"""
+    def prepare_features(self, data: Union[List[Dict], Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """Optimized feature engineering with vectorized operations
+
+        Accepts reading dicts or a mapping of column arrays, such as a
+        SharedRingBuffer window; numeric timestamps are epoch seconds.
+        """
         df = pd.DataFrame(data)
-        df['datetime'] = pd.to_datetime(df['timestamp'])
+        if pd.api.types.is_numeric_dtype(df['timestamp']):
+            df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
+        else:
+            df['datetime'] = pd.to_datetime(df['timestamp'])
         
         # Vectorized operations for all parameters at once
         for param in self.WEATHER_PARAMS:
@@ -432,10 +843,20 @@ class EnhancedWeatherPredictor(LoggerMixin):
         
         return df.dropna()
 
-    def _update_features(self, current_features: pd.DataFrame, prediction: Dict) -> pd.DataFrame:
-        """Update features for the next prediction iteration"""
+    def prepare_training_features(self, data: Union[List[Dict], Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """prepare_features, through BatchFeatureBuilder once there are batch_feature_rows readings"""
+        rows = len(data['timestamp']) if isinstance(data, dict) else len(data)
+        if rows >= self.batch_feature_rows:
+            return BatchFeatureBuilder(self.scalers).transform(data)
+        return self.prepare_features(data)
+
+    def _update_features(self, current_features: pd.DataFrame, prediction: Dict, hours: int = 1) -> pd.DataFrame:
+        """Update features for the next prediction iteration, ``hours`` after the current one"""
         try:
             new_features = current_features.copy()
+            # Share of each window the new value replaces
+            day_weight = min(hours, 24) / 24
+            short_weight = min(hours, 6) / 6
             
             # Update base parameters
             for param in ['temperature', 'humidity', 'pressure']:
@@ -444,28 +865,28 @@ class EnhancedWeatherPredictor(LoggerMixin):
                 # Update time-based features
                 new_features[f'{param}_hour_avg'] = new_features[param]  # Single point, use current
                 new_features[f'{param}_day_avg'] = (
-                    new_features[f'{param}_day_avg'] * 23 + new_features[param]
-                ) / 24  # Rolling daily average
+                    new_features[f'{param}_day_avg'] * (1 - day_weight) + new_features[param] * day_weight
+                )  # Rolling daily average
                 
                 # Update rolling statistics
                 new_features[f'{param}_rolling_mean_6h'] = (
-                    new_features[f'{param}_rolling_mean_6h'] * 5 + new_features[param]
-                ) / 6
+                    new_features[f'{param}_rolling_mean_6h'] * (1 - short_weight) + new_features[param] * short_weight
+                )
                 new_features[f'{param}_rolling_mean_24h'] = (
-                    new_features[f'{param}_rolling_mean_24h'] * 23 + new_features[param]
-                ) / 24
+                    new_features[f'{param}_rolling_mean_24h'] * (1 - day_weight) + new_features[param] * day_weight
+                )
                 
                 # Calculate rate of change
                 new_features[f'{param}_rate_1h'] = (
                     new_features[param] - current_features[param].iloc[0]
-                )
+                ) / hours
             
             # Update datetime and derived features
             new_features['datetime'] = pd.to_datetime(prediction['timestamp'])
             new_features['temp_humidity_ratio'] = new_features['temperature'] / new_features['humidity']
             new_features['pressure_change_rate'] = (
                 new_features['pressure'] - current_features['pressure'].iloc[0]
-            )
+            ) / hours
             
             return new_features
                 
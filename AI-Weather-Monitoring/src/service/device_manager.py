@@ -1,10 +1,24 @@
+import asyncio
+import functools
+import json
 import logging
+import time
 from typing import Optional, Dict
-import asyncio
+from src.core.predictor.weather_predictor import DEFAULT_STATION
+from src.utils.executors import get_shared_executor
+from src.utils.metrics import get_registry
+
+READ_SECONDS = get_registry().histogram(
+    'weather_device_read_seconds', 'Time to fetch one reading from the station', ['method'])
+READINGS_DROPPED = get_registry().counter(
+    'weather_readings_dropped_total', 'Readings discarded before prediction', ['reason'])
 
 class DeviceManager:
-    def __init__(self):
+    def __init__(self, station_id: str = DEFAULT_STATION):
+        self.station_id = station_id
         self.connection = None
+        self.method: Optional[str] = None
+        self.base_url: Optional[str] = None
         self.logger = logging.getLogger(__name__)
 
     async def connect(self, method: str, **params) -> bool:
@@ -22,21 +36,29 @@ class DeviceManager:
             self.logger.error(f"Connection error: {e}")
             return False
 
-    async def _connect_serial(self, **params):
+    async def _connect_serial(self, port: str, baudrate: int = 115200, timeout: float = 2.0, **params):
         """Connect to device using serial connection"""
         try:
-            # TODO: Implement serial connection logic here
-            self.connection = None  # Replace with actual serial connection
+            import serial
+
+            loop = asyncio.get_running_loop()
+            self.connection = await loop.run_in_executor(
+                get_shared_executor(), functools.partial(serial.Serial, port, baudrate, timeout=timeout)
+            )
+            self.method = 'serial'
             return True
         except Exception as e:
             self.logger.error(f"Serial connection error: {e}")
             return False
 
-    async def _connect_wifi(self, **params):
+    async def _connect_wifi(self, ip: str, port: int = 80, timeout: float = 10.0, **params):
         """Connect to device using WiFi connection"""
         try:
-            # TODO: Implement WiFi connection logic here
-            self.connection = None  # Replace with actual WiFi connection
+            import aiohttp
+
+            self.connection = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout))
+            self.base_url = f"http://{ip}:{port}"
+            self.method = 'wifi'
             return True
         except Exception as e:
             self.logger.error(f"WiFi connection error: {e}")
@@ -46,22 +68,44 @@ class DeviceManager:
         """Disconnect from device"""
         try:
             if self.connection:
-                self.connection.close()
+                result = self.connection.close()
+                if asyncio.iscoroutine(result):
+                    await result
             self.connection = None
         except Exception as e:
             self.logger.error(f"Disconnect error: {e}")
 
-    async def read_data(self) -> Dict:
-        """Read data from device"""
+    async def read_data(self) -> Optional[Dict]:
+        """Read data from device, tagged with its station_id; None for an empty or malformed reading"""
         if not self.connection:
             raise ConnectionError("Device not connected")
         
+        started = time.perf_counter()
         try:
-            return {
-                'temperature': 20.0,
-                'humidity': 50.0,
-                'pressure': 1013.25
-            }
+            if self.method == 'wifi':
+                async with self.connection.get(f"{self.base_url}/data") as response:
+                    if response.status != 200:
+                        raise ConnectionError(f"Device returned HTTP {response.status}")
+                    return self._tag(await response.json(content_type=None))
+
+            loop = asyncio.get_running_loop()
+            line = await loop.run_in_executor(get_shared_executor(), self.connection.readline)
+            if not line:
+                return None
+            return self._tag(json.loads(line))
+        except (ValueError, UnicodeDecodeError) as e:
+            self.logger.warning(f"Malformed reading: {e}")
+            READINGS_DROPPED.labels(reason='malformed').inc()
+            return None
         except Exception as e:
             self.logger.error(f"Data reading error: {e}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            READ_SECONDS.labels(method=self.method).observe(time.perf_counter() - started)
+
+    def _tag(self, reading) -> Optional[Dict]:
+        if not isinstance(reading, dict):
+            raise ValueError(f"expected a JSON object, got {type(reading).__name__}")
+        # Firmware that reports its own ID wins over the configured one
+        reading.setdefault('station_id', self.station_id)
+        return reading
@@ -0,0 +1,451 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import websockets
+from dotenv import load_dotenv
+
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, VALID_RANGES, WEATHER_PARAMS
+from src.utils.clock import get_clock
+from src.utils.shared_ring_buffer import SharedRingBuffer
+
+# Compact record handed from ingestion to inference workers: index into the
+# payload's station table, epoch timestamp, temperature, humidity, pressure
+READING_FORMAT = struct.Struct('<Hdddd')
+# With shared history the records only locate the rows: station table index
+# and the [start, end) sequence numbers in that station's SharedRingBuffer
+RANGE_FORMAT = struct.Struct('<HQQ')
+# Station table size and the length prefix of each UTF-8 station id in it
+TABLE_FORMAT = struct.Struct('<H')
+MAX_STATION_ID_BYTES = 0xFFFF
+
+
+def shard_for(station_id: str, shards: int) -> int:
+    """Stable shard index for a station (built-in hash() is salted per process)"""
+    return zlib.crc32(station_id.encode('utf-8')) % shards
+
+
+def history_buffer_name(prefix: str, station_id: str) -> str:
+    """Shared-memory name of a station's live history (kept short for macOS)"""
+    return f"{prefix}-{zlib.crc32(station_id.encode('utf-8')):08x}"
+
+
+def station_id_bytes(station_id: str) -> bytes:
+    """UTF-8 station id, rejected when it does not fit the station table"""
+    encoded = station_id.encode('utf-8')
+    if len(encoded) > MAX_STATION_ID_BYTES:
+        raise ValueError(f"Station id longer than {MAX_STATION_ID_BYTES} bytes: {station_id[:32]!r}...")
+    return encoded
+
+
+def _encode_table(stations: Dict[str, int]) -> List[bytes]:
+    if len(stations) > 0xFFFF:
+        raise ValueError(f"Too many stations in one batch: {len(stations)}")
+    table = [TABLE_FORMAT.pack(len(stations))]
+    for station_id in stations:
+        encoded = station_id_bytes(station_id)
+        table += [TABLE_FORMAT.pack(len(encoded)), encoded]
+    return table
+
+
+def _decode_table(payload: bytes) -> Tuple[List[str], int]:
+    """Station ids at the head of ``payload`` and the offset of the records after them"""
+    (count,), offset = TABLE_FORMAT.unpack_from(payload), TABLE_FORMAT.size
+    stations = []
+    for _ in range(count):
+        (length,) = TABLE_FORMAT.unpack_from(payload, offset)
+        offset += TABLE_FORMAT.size
+        stations.append(payload[offset:offset + length].decode('utf-8'))
+        offset += length
+    return stations, offset
+
+
+def encode_readings(readings: List[Tuple[str, float, float, float, float]]) -> bytes:
+    """Pack readings behind a table of their distinct station ids, so ids are never truncated"""
+    stations: Dict[str, int] = {}
+    records = [
+        READING_FORMAT.pack(stations.setdefault(station_id, len(stations)),
+                            timestamp, temperature, humidity, pressure)
+        for station_id, timestamp, temperature, humidity, pressure in readings
+    ]
+    return b''.join(_encode_table(stations) + records)
+
+
+def decode_readings(payload: bytes) -> List[Dict]:
+    stations, offset = _decode_table(payload)
+    return [
+        {
+            'station_id': stations[index],
+            'timestamp': timestamp,
+            'temperature': temperature,
+            'humidity': humidity,
+            'pressure': pressure
+        }
+        for index, timestamp, temperature, humidity, pressure in READING_FORMAT.iter_unpack(payload[offset:])
+    ]
+
+
+def encode_ranges(ranges: List[Tuple[str, int, int]]) -> bytes:
+    """Pack (station id, start sequence, end sequence) references to rows in shared history"""
+    stations: Dict[str, int] = {}
+    records = [RANGE_FORMAT.pack(stations.setdefault(station_id, len(stations)), start, end)
+               for station_id, start, end in ranges]
+    return b''.join(_encode_table(stations) + records)
+
+
+def decode_ranges(payload: bytes) -> List[Tuple[str, int, int]]:
+    stations, offset = _decode_table(payload)
+    return [(stations[index], start, end) for index, start, end in RANGE_FORMAT.iter_unpack(payload[offset:])]
+
+
+def parse_reading(raw: bytes) -> Optional[Tuple[float, float, float]]:
+    """Parse and range-check one firmware JSON line"""
+    try:
+        data = json.loads(raw)
+        values = tuple(float(data[param]) for param in WEATHER_PARAMS)
+    except (ValueError, KeyError, TypeError):
+        return None
+    for value, param in zip(values, WEATHER_PARAMS):
+        min_val, max_val = VALID_RANGES[param]
+        if not min_val <= value <= max_val:
+            return None
+    return values
+
+
+def _ingestion_worker(shard: int, inbox, outbox, stats,
+                      history_prefix: Optional[str] = None, history_capacity: int = 0) -> None:
+    """Validate raw lines and pass them on, as packed readings or as ranges of the stations' shared history
+
+    With shared history the buffers stay alive after the shard's last
+    batch until the supervisor sends a second None, once inference has
+    drained.
+    """
+    accepted = rejected = 0
+    histories: Dict[str, SharedRingBuffer] = {}
+    stats.put(('ready', 'ingestion', shard))
+    try:
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                break
+            readings = []
+            for station_id, raw in batch:
+                values = parse_reading(raw)
+                if values is None:
+                    rejected += 1
+                    continue
+                readings.append((station_id, get_clock().time(), *values))
+            if not readings:
+                continue
+            accepted += len(readings)
+            if not history_capacity:
+                outbox.put(encode_readings(readings))
+                continue
+            rows: Dict[str, List[Tuple]] = {}
+            for reading in readings:
+                rows.setdefault(reading[0], []).append(reading[1:])
+            ranges = []
+            for station_id, station_rows in rows.items():
+                history = histories.get(station_id)
+                if history is None:
+                    history = histories[station_id] = SharedRingBuffer.create(
+                        history_capacity, history_buffer_name(history_prefix, station_id)
+                    )
+                start = history.sequence
+                history.extend(np.array(station_rows))
+                ranges.append((station_id, start, history.sequence))
+            outbox.put(encode_ranges(ranges))
+        # 'done' lets the supervisor stop inference, so everything sent must be in the pipe first
+        outbox.close()
+        outbox.join_thread()
+        stats.put(('done', 'ingestion', shard, {'accepted': accepted, 'rejected': rejected}))
+        if histories:
+            inbox.get()
+    finally:
+        for history in histories.values():
+            history.close()
+            history.unlink()
+
+
+def _inference_worker(index: int, inbox, outbox, stats, predictor_factory: Callable,
+                      history_prefix: Optional[str] = None) -> None:
+    """Predict each batch; with shared history the rows are read in place from the stations' buffers"""
+    predictor = predictor_factory()
+    histories: Dict[str, SharedRingBuffer] = {}
+    processed = overrun = 0
+    stats.put(('ready', 'inference', index))
+    try:
+        while True:
+            payload = inbox.get()
+            if payload is None:
+                break
+            messages = []
+            if history_prefix is None:
+                readings = decode_readings(payload)
+                messages = [
+                    json.dumps({'station_id': reading['station_id'], **result})
+                    for reading, result in zip(readings, predictor.process_sensor_batch(readings))
+                    if result
+                ]
+            else:
+                for station_id, start, end in decode_ranges(payload):
+                    history = histories.get(station_id)
+                    if history is None:
+                        history = histories[station_id] = SharedRingBuffer.attach(
+                            history_buffer_name(history_prefix, station_id)
+                        )
+                    try:
+                        window = history.window(start, end)
+                        results = predictor.process_sensor_columns(window.columns)
+                        # The writer may lap a slow reader; results from overwritten rows are dropped
+                        valid = window.is_valid()
+                        del window
+                    except ValueError:
+                        valid = False
+                    if not valid:
+                        overrun += end - start
+                        continue
+                    messages += [json.dumps({'station_id': station_id, **result}) for result in results]
+            if messages:
+                outbox.put(messages)
+                processed += len(messages)
+    finally:
+        for history in histories.values():
+            history.close()
+    outbox.close()
+    outbox.join_thread()
+    stats.put(('done', 'inference', index, {'processed': processed, 'overrun': overrun}))
+
+
+def _broadcast_worker(inbox, stats, host: str, port: Optional[int]) -> None:
+    asyncio.run(_broadcast_loop(inbox, stats, host, port))
+
+
+async def _broadcast_loop(inbox, stats, host: str, port: Optional[int]) -> None:
+    clients = set()
+
+    async def handle_client(websocket, *args):
+        clients.add(websocket)
+        try:
+            await websocket.wait_closed()
+        finally:
+            clients.discard(websocket)
+
+    server = await websockets.serve(handle_client, host, port) if port else None
+    loop = asyncio.get_running_loop()
+    messages = 0
+    stats.put(('ready', 'broadcast', 0))
+    while True:
+        batch = await loop.run_in_executor(None, inbox.get)
+        if batch is None:
+            break
+        for message in batch:
+            websockets.broadcast(clients, message)
+        messages += len(batch)
+    if server:
+        server.close()
+        await server.wait_closed()
+    stats.put(('done', 'broadcast', 0, {'messages': messages, 'finished_at': time.time()}))
+
+
+class PipelineSupervisor:
+    """Run ingestion, inference and broadcasting in separate processes
+
+    Raw readings are routed to one of N ingestion workers by station ID,
+    validated there and packed into fixed-size binary records for a pool of
+    inference workers; results go to a single broadcaster process that owns
+    the websocket clients. With ``history_capacity`` set, each ingestion
+    worker also keeps a SharedRingBuffer per station that other processes
+    can read through open_history() without pickling, and inference
+    workers are sent only sequence ranges: they predict straight from the
+    buffers' columns. A range overwritten before its worker reads it
+    (capacity smaller than the rows in flight) is counted as ``overrun``
+    and dropped.
+    """
+
+    def __init__(self, ingestion_workers: Optional[int] = None,
+                 inference_workers: Optional[int] = None,
+                 predictor_factory: Callable = EnhancedWeatherPredictor,
+                 websocket_host: str = 'localhost',
+                 websocket_port: Optional[int] = None,
+                 batch_size: int = 64, queue_size: int = 256,
+                 history_capacity: Optional[int] = None):
+        load_dotenv()
+        cpus = os.cpu_count() or 2
+        self.ingestion_count = ingestion_workers or int(os.getenv('INGESTION_WORKERS', max(1, cpus // 4)))
+        self.inference_count = inference_workers or int(os.getenv('INFERENCE_WORKERS', max(1, cpus // 2)))
+        self.predictor_factory = predictor_factory
+        self.websocket_host = websocket_host
+        self.websocket_port = websocket_port
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.history_capacity = history_capacity or int(os.getenv('HISTORY_CAPACITY', '0'))
+        self.history_prefix = f'wx{os.getpid()}'
+        self.logger = logging.getLogger(__name__)
+        self.context = multiprocessing.get_context('spawn')
+        self.processes: List[multiprocessing.Process] = []
+        self.pending: List[List[Tuple[str, bytes]]] = []
+
+    def start(self, ready_timeout: float = 120) -> None:
+        """Start all workers and wait until each has initialised"""
+        ctx = self.context
+        self.stats = ctx.Queue()
+        self.ingestion_queues = [ctx.Queue(self.queue_size) for _ in range(self.ingestion_count)]
+        self.inference_queue = ctx.Queue(self.queue_size)
+        self.broadcast_queue = ctx.Queue(self.queue_size)
+        self.pending = [[] for _ in range(self.ingestion_count)]
+
+        self.ingestion_processes = [
+            ctx.Process(target=_ingestion_worker,
+                        args=(shard, inbox, self.inference_queue, self.stats,
+                              self.history_prefix, self.history_capacity),
+                        name=f'ingestion-{shard}', daemon=True)
+            for shard, inbox in enumerate(self.ingestion_queues)
+        ]
+        self.inference_processes = [
+            ctx.Process(target=_inference_worker,
+                        args=(index, self.inference_queue, self.broadcast_queue, self.stats,
+                              self.predictor_factory, self.history_prefix if self.history_capacity else None),
+                        name=f'inference-{index}', daemon=True)
+            for index in range(self.inference_count)
+        ]
+        self.broadcast_process = ctx.Process(
+            target=_broadcast_worker,
+            args=(self.broadcast_queue, self.stats, self.websocket_host, self.websocket_port),
+            name='broadcast', daemon=True
+        )
+        self.processes = self.ingestion_processes + self.inference_processes + [self.broadcast_process]
+        for process in self.processes:
+            process.start()
+        for _ in self.processes:
+            self.stats.get(timeout=ready_timeout)
+        self.logger.info(
+            f"Pipeline started: {self.ingestion_count} ingestion, "
+            f"{self.inference_count} inference, 1 broadcast worker(s)"
+        )
+
+    def submit(self, station_id: str, raw: bytes) -> None:
+        """Queue one raw firmware line for the station's ingestion shard
+
+        Raises ValueError for a station id too long to encode, before it
+        reaches a worker.
+        """
+        station_id_bytes(station_id)
+        shard = shard_for(station_id, self.ingestion_count)
+        pending = self.pending[shard]
+        pending.append((station_id, raw))
+        if len(pending) >= self.batch_size:
+            self.ingestion_queues[shard].put(pending)
+            self.pending[shard] = []
+
+    def open_history(self, station_id: str) -> SharedRingBuffer:
+        """Attach to a station's live history; raises FileNotFoundError before its first reading"""
+        return SharedRingBuffer.attach(history_buffer_name(self.history_prefix, station_id))
+
+    def flush(self) -> None:
+        for shard, pending in enumerate(self.pending):
+            if pending:
+                self.ingestion_queues[shard].put(pending)
+                self.pending[shard] = []
+
+    def stop(self, timeout: float = 60) -> Dict[str, Dict]:
+        """Drain every stage in order and return per-worker counters"""
+        self.flush()
+        report: Dict[str, Dict] = {}
+        stages = [
+            (self.ingestion_queues, self.ingestion_processes),
+            ([self.inference_queue] * self.inference_count, self.inference_processes),
+            ([self.broadcast_queue], [self.broadcast_process])
+        ]
+        for queues, processes in stages:
+            for queue in queues:
+                queue.put(None)
+            # A worker reports done only once its output is flushed, so the
+            # next stage's sentinel cannot overtake the last batches
+            for _ in processes:
+                _, role, index, counters = self.stats.get(timeout=timeout)
+                report[f'{role}-{index}'] = counters
+            if processes is self.ingestion_processes and self.history_capacity:
+                # Shared history outlives ingestion until inference has read it
+                continue
+            for process in processes:
+                process.join(timeout)
+        if self.history_capacity:
+            for queue in self.ingestion_queues:
+                queue.put(None)
+            for process in self.ingestion_processes:
+                process.join(timeout)
+        self.processes = []
+        return report
+
+
+def _load_test_predictor() -> EnhancedWeatherPredictor:
+    """Predictor with a small fitted model so load tests exercise real inference"""
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(42)
+    features = np.column_stack([
+        rng.normal(25, 5, 2000), rng.normal(60, 15, 2000), rng.normal(1010, 8, 2000)
+    ])
+    predictor = EnhancedWeatherPredictor()
+    predictor.model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=42)
+    predictor.model.fit(features, rng.integers(0, 4, len(features)))
+    return predictor
+
+
+def run_load_test(stations: int, readings_per_station: int, workers: int) -> Dict[str, float]:
+    """Push synthetic readings through a pipeline and measure throughput"""
+    rng = np.random.default_rng(0)
+    lines = [
+        json.dumps({
+            'temperature': round(float(rng.normal(25, 5)), 2),
+            'humidity': round(float(rng.uniform(20, 95)), 2),
+            'pressure': round(float(rng.normal(1010, 8)), 2)
+        }).encode('utf-8')
+        for _ in range(256)
+    ]
+    supervisor = PipelineSupervisor(ingestion_workers=workers, inference_workers=workers,
+                                    predictor_factory=_load_test_predictor)
+    supervisor.start()
+    started = time.time()
+    for i in range(readings_per_station):
+        for station in range(stations):
+            supervisor.submit(f'station-{station:04d}', lines[(i + station) % len(lines)])
+    report = supervisor.stop()
+    total = report['broadcast-0']['messages']
+    elapsed = report['broadcast-0']['finished_at'] - started
+    return {
+        'workers': workers,
+        'readings': total,
+        'seconds': round(elapsed, 3),
+        'readings_per_second': round(total / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test for the multi-process pipeline")
+    parser.add_argument('--stations', type=int, default=200)
+    parser.add_argument('--readings', type=int, default=200, help="readings per station")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help="worker counts to compare (ingestion and inference each)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    baseline = None
+    for workers in args.workers:
+        result = run_load_test(args.stations, args.readings, workers)
+        baseline = baseline or result['readings_per_second'] / workers
+        result['scaling_efficiency'] = round(result['readings_per_second'] / (baseline * workers), 2)
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
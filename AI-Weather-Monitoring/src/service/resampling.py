@@ -0,0 +1,276 @@
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+from src.service.stations import station_of
+from src.utils.clock import get_clock
+from src.utils.metrics import get_registry
+
+PARAMS = EnhancedWeatherPredictor.WEATHER_PARAMS
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+FILL_POLICIES = ('ffill', 'interpolate', 'nan')
+
+RESAMPLED_BINS = get_registry().counter(
+    'weather_resampled_bins_total', 'Grid bins closed by the resampler', ['grid', 'kind'])
+LATE_READINGS = get_registry().counter(
+    'weather_resampler_late_readings_total', 'Readings older than the open bin of their grid', ['grid'])
+
+
+def parse_interval(spec: str) -> int:
+    """Seconds in an interval such as ``'5s'``, ``'1m'`` or ``'1h'``"""
+    match = re.fullmatch(r'\s*(\d+)\s*([smhd])\s*', spec)
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid interval {spec!r}")
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+
+def epoch_seconds(timestamps: Sequence) -> np.ndarray:
+    """Epoch seconds from numbers or ISO 8601 strings"""
+    values = np.asarray(timestamps)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.float64)
+    parsed = pd.to_datetime(values, format='ISO8601', utc=True)
+    return ((parsed - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+
+class TimeGrid:
+    """One station's readings averaged onto a fixed grid of ``interval`` seconds
+
+    A bin stays open until a reading for a later bin arrives; it then
+    closes with the mean of its readings, and the empty bins between it
+    and the previous closed bin are filled by ``fill``: the last value
+    (``'ffill'``), a straight line between the two (``'interpolate'``)
+    or NaN (``'nan'``). Gaps longer than ``max_gap`` bins stay NaN
+    whatever the policy. Readings for bins already closed are dropped.
+
+    Closed bins go into a ring of ``capacity`` rows kept twice over, so
+    window() is one contiguous slice. Batches are grouped by bin with
+    one sort and reduceat, and gaps are filled per parameter with array
+    operations.
+    """
+
+    def __init__(self, interval: int, name: str = '', fill: str = 'ffill', max_gap: Optional[int] = 3,
+                 capacity: int = 2000, params: Sequence[str] = PARAMS):
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy {fill!r}, expected one of {FILL_POLICIES}")
+        self.interval = interval
+        self.name = name or f'{interval}s'
+        self.fill = fill
+        self.max_gap = max_gap
+        self.capacity = capacity
+        self.params = list(params)
+        self._times = np.zeros(2 * capacity)
+        self._values = np.full((len(self.params), 2 * capacity), np.nan)
+        self.count = 0
+        self.open_bin: Optional[int] = None
+        self._open_sums = np.zeros(len(self.params))
+        self._open_counts = np.zeros(len(self.params))
+        self.last_bin: Optional[int] = None
+        # Newest closed bin with a value, and that value, per parameter
+        self._known_bins = np.full(len(self.params), -1, dtype=np.int64)
+        self._known_values = np.full(len(self.params), np.nan)
+        self.late = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def add(self, timestamps: Sequence, values: np.ndarray) -> int:
+        """Add readings (epoch seconds, (rows, params) array with NaN for missing); returns bins closed"""
+        times = epoch_seconds(timestamps)
+        values = np.asarray(values, dtype=np.float64).reshape(len(times), len(self.params))
+        if not len(times):
+            return 0
+        order = np.argsort(times, kind='stable')
+        bins = np.floor(times[order] / self.interval).astype(np.int64)
+        values = values[order]
+        oldest = self.open_bin if self.open_bin is not None else (
+            self.last_bin + 1 if self.last_bin is not None else None)
+        if oldest is not None:
+            late = bins < oldest
+            if late.any():
+                self.late += int(late.sum())
+                LATE_READINGS.labels(grid=self.name).inc(int(late.sum()))
+                bins, values = bins[~late], values[~late]
+                if not len(bins):
+                    return 0
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+        present = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(present, values, 0), starts, axis=0)
+        counts = np.add.reduceat(present.astype(np.float64), starts, axis=0)
+        unique = bins[starts]
+        if self.open_bin is not None and unique[0] == self.open_bin:
+            sums[0] += self._open_sums
+            counts[0] += self._open_counts
+        elif self.open_bin is not None:
+            unique = np.concatenate(([self.open_bin], unique))
+            sums = np.vstack([self._open_sums, sums])
+            counts = np.vstack([self._open_counts, counts])
+
+        self.open_bin = int(unique[-1])
+        self._open_sums, self._open_counts = sums[-1].copy(), counts[-1].copy()
+        if len(unique) > 1:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._close(unique[:-1], sums[:-1] / counts[:-1])
+        return len(unique) - 1
+
+    def add_reading(self, reading: Dict, timestamp: Optional[float] = None) -> int:
+        timestamp = reading.get('timestamp') if timestamp is None else timestamp
+        if timestamp is None:
+            timestamp = get_clock().time()
+        row = [reading.get(param) for param in self.params]
+        return self.add([timestamp], np.array([[np.nan if v is None else v for v in row]], dtype=np.float64))
+
+    def flush(self) -> int:
+        """Close the open bin, e.g. before shutting down; returns bins closed"""
+        if self.open_bin is None:
+            return 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self._open_sums / self._open_counts
+        self._close(np.array([self.open_bin]), means[None, :])
+        self.open_bin = None
+        self._open_sums[:] = 0
+        self._open_counts[:] = 0
+        return 1
+
+    def _close(self, bins: np.ndarray, means: np.ndarray) -> None:
+        """Append closed bins and the filled bins before each of them
+
+        A parameter missing from earlier bins is filled back as far as the
+        ring still holds them, once a value for it arrives.
+        """
+        first = bins[0] if self.last_bin is None else self.last_bin + 1
+        grid = np.arange(first, bins[-1] + 1)
+        rows = np.full((len(grid), len(self.params)), np.nan)
+        observed = np.isin(grid, bins)
+        rows[observed] = means
+        held = min(len(self), first - int(self._known_bins[self._known_bins >= 0].min(initial=first)) - 1)
+        if held > 0 and self.fill != 'nan':
+            grid = np.arange(first - held, bins[-1] + 1)
+            rows = np.vstack([self._values[:, self._end() - held:self._end()].T, rows])
+        present = ~np.isnan(rows)
+        for j in range(len(self.params)):
+            has = ~np.isnan(means[:, j])
+            points, levels = bins[has], means[has, j]
+            if self._known_bins[j] >= 0:
+                points = np.concatenate(([self._known_bins[j]], points))
+                levels = np.concatenate(([self._known_values[j]], levels))
+            if not len(points):
+                continue
+            if self.fill != 'nan':
+                # Only holes with a value on both sides are filled, so nothing is extrapolated
+                holes = ~present[:, j] & (grid > points[0]) & (grid < points[-1])
+                before = np.searchsorted(points, grid[holes], side='right') - 1
+                fillable = np.ones(len(before), dtype=bool)
+                if self.max_gap is not None:
+                    fillable = points[before + 1] - points[before] - 1 <= self.max_gap
+                filled = levels[before] if self.fill == 'ffill' else np.interp(grid[holes], points, levels)
+                column = rows[holes, j]
+                column[fillable] = filled[fillable]
+                rows[holes, j] = column
+            self._known_bins[j], self._known_values[j] = points[-1], levels[-1]
+        if len(grid) > len(observed):
+            held = len(grid) - len(observed)
+            slots = (self.count - held + np.arange(held)) % self.capacity
+            for offset in (0, self.capacity):
+                self._values[:, slots + offset] = rows[:held].T
+            grid, rows = grid[held:], rows[held:]
+        self._append(grid * float(self.interval), rows)
+        self.last_bin = int(bins[-1])
+        empty = np.isnan(rows).all(axis=1)
+        RESAMPLED_BINS.labels(grid=self.name, kind='observed').inc(int(observed.sum()))
+        RESAMPLED_BINS.labels(grid=self.name, kind='filled').inc(int((~observed & ~empty).sum()))
+        RESAMPLED_BINS.labels(grid=self.name, kind='empty').inc(int(empty.sum()))
+
+    def _append(self, times: np.ndarray, rows: np.ndarray) -> None:
+        if len(times) > self.capacity:
+            self.count += len(times) - self.capacity
+            times, rows = times[-self.capacity:], rows[-self.capacity:]
+        slots = (self.count + np.arange(len(times))) % self.capacity
+        for offset in (0, self.capacity):
+            self._times[slots + offset] = times
+            self._values[:, slots + offset] = rows.T
+        self.count += len(times)
+
+    def _end(self) -> int:
+        """Index just past the newest row in the doubled ring; the oldest row is ``capacity`` before it"""
+        return self.count % self.capacity + (self.capacity if self.count >= self.capacity else 0)
+
+    def window(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """The newest ``count`` closed bins as column arrays (bin start in epoch seconds)"""
+        size = len(self) if count is None else min(count, len(self))
+        end = self._end()
+        columns = {'timestamp': self._times[end - size:end].copy()}
+        for j, param in enumerate(self.params):
+            columns[param] = self._values[j, end - size:end].copy()
+        return columns
+
+
+class Resampler:
+    """Per-station time grids for every configured interval, fed at ingestion
+
+    ``grids`` (RESAMPLE_GRIDS, e.g. ``'1m,1h'``) names the intervals;
+    each station gets its own TimeGrid per interval on first use. Fill
+    policy, longest filled gap in bins and ring capacity come from
+    RESAMPLE_FILL, RESAMPLE_MAX_GAP and RESAMPLE_CAPACITY.
+    """
+
+    def __init__(self, grids: Optional[str] = None, fill: Optional[str] = None,
+                 max_gap: Optional[int] = None, capacity: Optional[int] = None):
+        load_dotenv()
+        spec = grids or os.getenv('RESAMPLE_GRIDS', '1m,1h')
+        self.intervals = {name.strip(): parse_interval(name) for name in spec.split(',') if name.strip()}
+        if not self.intervals:
+            raise ValueError("No resampling grids configured")
+        self.fill = fill or os.getenv('RESAMPLE_FILL', 'ffill')
+        if self.fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy {self.fill!r}, expected one of {FILL_POLICIES}")
+        self.max_gap = max_gap if max_gap is not None else int(os.getenv('RESAMPLE_MAX_GAP', '3'))
+        self.capacity = capacity or int(os.getenv('RESAMPLE_CAPACITY', '2000'))
+        self.logger = logging.getLogger(__name__)
+        self.grids: Dict[str, Dict[str, TimeGrid]] = {}
+
+    def grids_for(self, station_id: str) -> Dict[str, TimeGrid]:
+        grids = self.grids.get(station_id)
+        if grids is None:
+            grids = self.grids[station_id] = {
+                name: TimeGrid(interval, name, self.fill, self.max_gap, self.capacity)
+                for name, interval in self.intervals.items()
+            }
+        return grids
+
+    def add(self, reading: Dict, timestamp: Optional[float] = None) -> None:
+        """One reading, at ``timestamp`` (epoch seconds) or its own timestamp"""
+        for grid in self.grids_for(station_of(reading)).values():
+            grid.add_reading(reading, timestamp)
+
+    def add_many(self, readings: Union[List[Dict], Dict[str, np.ndarray]], station_id: str) -> None:
+        """A batch for one station, as reading dicts or column arrays, e.g. to seed the grids from history"""
+        if isinstance(readings, list):
+            if not readings:
+                return
+            readings = pd.DataFrame(readings)
+        values = np.column_stack([pd.to_numeric(np.asarray(readings[param]), errors='coerce') for param in PARAMS])
+        for grid in self.grids_for(station_id).values():
+            grid.add(readings['timestamp'], values)
+
+    def window(self, station_id: str, grid: str, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return self.grids_for(station_id)[grid].window(count)
+
+    def flush(self) -> None:
+        for grids in self.grids.values():
+            for grid in grids.values():
+                grid.flush()
+
+    def info(self) -> Dict:
+        return {
+            station_id: {name: {'bins': len(grid), 'open_bin': grid.open_bin, 'late': grid.late}
+                         for name, grid in grids.items()}
+            for station_id, grids in self.grids.items()
+        }
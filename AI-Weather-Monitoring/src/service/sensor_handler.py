@@ -2,13 +2,14 @@ import asyncio
 import json
 import logging
 from typing import Dict, Set
-from datetime import datetime
 import websockets
 import websockets.legacy
 from websockets.legacy.server import WebSocketServerProtocol
 from collections import deque
 
 import websockets.legacy.server
+from src.utils.clock import get_clock
+from src.utils.logger import setup_logging
 
 class SimpleSensorHandler:
     def __init__(self):
@@ -17,10 +18,7 @@ class SimpleSensorHandler:
         self.setup_logging()
         
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        setup_logging(log_level='INFO')
         self.logger = logging.getLogger(__name__)
 
     async def start(self, serial_port: str = 'COM3'):
@@ -48,7 +46,7 @@ class SimpleSensorHandler:
                     await self.handle_data(data)
             except Exception as e:
                 self.logger.error(f"Serial error: {e}")
-                await asyncio.sleep(5)
+                await get_clock().sleep(5)
 
     async def start_websocket_server(self, port: int = 8765):
         """Simple WebSocket server"""
@@ -71,7 +69,7 @@ class SimpleSensorHandler:
         try:
             data = json.loads(raw_data.decode('utf-8').strip())
             if self.validate_data(data):
-                data['timestamp'] = datetime.now().isoformat()
+                data['timestamp'] = get_clock().now().isoformat()
                 self.data_buffer.append(data)
                 await self.broadcast_data(data)
         except Exception as e:
@@ -1,30 +1,75 @@
 import asyncio
+import json
 import logging
+import os
+import time
 from typing import Dict, Set, Optional
 from collections import deque
-from queue import Queue
-from concurrent.futures import ThreadPoolExecutor
 import websockets
 from src.core.core import WeatherCore
+from src.utils.executors import get_shared_executor
+from src.utils.clock import get_clock
+from src.utils.metrics import MetricsServer, get_registry
+from src.utils.profiler import Profiler
+
+_metrics = get_registry()
+QUEUE_DEPTH = _metrics.gauge('weather_queue_depth', 'Readings waiting in a queue', ['queue'])
+CONNECTED_CLIENTS = _metrics.gauge('weather_websocket_clients', 'Connected websocket clients')
+BROADCAST_SECONDS = _metrics.histogram('weather_broadcast_seconds', 'Time to send one message to all clients')
+CLIENT_SEND_SECONDS = _metrics.histogram('weather_client_send_seconds', 'Per-client websocket send lag')
+SEND_FAILURES = _metrics.counter('weather_client_send_failures_total', 'Websocket sends that failed')
+
+# Topic of clients that receive every station
+ALL_STATIONS = '*'
+
+
+def topic_for(path: Optional[str]) -> str:
+    """Station a websocket path subscribes to: /stations/<id>, anything else is every station"""
+    parts = (path or '/').split('?', 1)[0].strip('/').split('/')
+    if len(parts) == 2 and parts[0] == 'stations' and parts[1]:
+        return parts[1]
+    return ALL_STATIONS
 
 class WeatherService:
-    def __init__(self):
+    def __init__(self, websocket_host: Optional[str] = None, websocket_port: Optional[int] = None,
+                 metrics_port: Optional[int] = None):
         self.core = WeatherCore()
-        self.data_queue = Queue(maxsize=1000)
+        self.websocket_host = websocket_host or os.getenv('WEBSOCKET_HOST', '0.0.0.0')
+        self.websocket_port = (
+            self.core.config['connections']['websocket_port'] if websocket_port is None else websocket_port
+        )
+        self.websocket_server = None
+        self.metrics_server = MetricsServer(
+            host=os.getenv('METRICS_HOST', '127.0.0.1'),
+            port=int(os.getenv('METRICS_PORT', '8766')) if metrics_port is None else metrics_port
+        )
+        self.profiler = Profiler()
+        self.profiler.register_routes(self.metrics_server)
+        self.data_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
         self.data_buffer = deque(maxlen=1000)
         self.connected_clients = set()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Clients per topic and the latest message per station, sent to new subscribers
+        self.subscribers: Dict[str, Set] = {}
+        self.latest: Dict[str, str] = {}
+        QUEUE_DEPTH.labels(queue='service').set_function(self.data_queue.qsize)
+        CONNECTED_CLIENTS.set_function(lambda: len(self.connected_clients))
+        self.executor = get_shared_executor()
+        self.tasks = []
 
     async def start(self, serial_port: Optional[str] = None):
-        """Start all services"""
+        """Start all services as background tasks"""
         try:
             port = serial_port or self.core.config['hardware']['arduino_port']
-            await asyncio.gather(
-                self.start_serial(port),
-                self.start_ble(),
-                self.start_websocket_server(),
-                self.process_data_loop()
-            )
+            await self.start_websocket_server()
+            await self.metrics_server.start()
+            self.profiler.install_signal_handler()
+            self.tasks = [
+                asyncio.create_task(coro) for coro in (
+                    self.start_serial(port),
+                    self.start_ble(),
+                    self.process_data_loop()
+                )
+            ]
         except Exception as e:
             self.core.logger.error(f"Failed to start services: {e}")
             raise
@@ -40,16 +85,44 @@ class WeatherService:
         pass
 
     async def start_websocket_server(self):
-        """Handle WebSocket server"""
-        # WebSocket server implementation
-        pass
+        """Start the WebSocket server; port 0 picks a free port"""
+        self.websocket_server = await websockets.serve(
+            self.handle_client, self.websocket_host, self.websocket_port
+        )
+        self.websocket_port = self.websocket_server.sockets[0].getsockname()[1]
+        self.core.logger.info(f"WebSocket server running on port {self.websocket_port}")
 
-    async def broadcast(self, message):
-        """Broadcast message to all connected clients"""
-        if self.connected_clients:
-            await asyncio.gather(
-                *[client.send(message) for client in self.connected_clients]
-            )
+    async def handle_client(self, websocket, *args):
+        """Track a client until it disconnects; the connection path picks its station topic"""
+        request = getattr(websocket, 'request', None)
+        topic = topic_for(request.path if request is not None else (args[0] if args else None))
+        self.connected_clients.add(websocket)
+        self.subscribers.setdefault(topic, set()).add(websocket)
+        try:
+            if topic != ALL_STATIONS and topic in self.latest:
+                await self._send(websocket, self.latest[topic])
+            await websocket.wait_closed()
+        finally:
+            self.connected_clients.discard(websocket)
+            self.subscribers[topic].discard(websocket)
+
+    async def broadcast(self, message, clients: Optional[Set] = None):
+        """Broadcast message to ``clients``, all connected clients by default"""
+        clients = self.connected_clients if clients is None else clients
+        if clients:
+            with BROADCAST_SECONDS.time():
+                await asyncio.gather(
+                    *[self._send(client, message) for client in list(clients)]
+                )
+
+    async def _send(self, client, message):
+        started = time.perf_counter()
+        try:
+            await client.send(message)
+        except websockets.ConnectionClosed:
+            SEND_FAILURES.inc()
+        finally:
+            CLIENT_SEND_SECONDS.observe(time.perf_counter() - started)
 
     async def process_data_loop(self):
         """Process incoming data"""
@@ -61,12 +134,35 @@ class WeatherService:
                     await self.broadcast(processed_data)
             except Exception as e:
                 self.core.logger.error(f"Error processing data: {e}")
-            await asyncio.sleep(0.1)
+            await get_clock().sleep(0.1)
 
     async def stop(self):
-        # Stop service
-        pass
+        """Cancel background tasks"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.websocket_server:
+            self.websocket_server.close()
+            await self.websocket_server.wait_closed()
+            self.websocket_server = None
+        await self.metrics_server.stop()
+        await self.profiler.close()
 
     async def broadcast_data(self, data):
-        # Broadcast weather data
-        pass
\ No newline at end of file
+        """Keep processed data for new clients and send it to its station's subscribers
+
+        Clients on the every-station topic get all messages; data without a
+        station_id goes to every client.
+        """
+        if not data:
+            return
+        self.data_buffer.append(data)
+        message = json.dumps(data)
+        station_id = data.get('station_id')
+        if station_id is None:
+            await self.broadcast(message)
+            return
+        self.latest[station_id] = message
+        clients = self.subscribers.get(station_id, set()) | self.subscribers.get(ALL_STATIONS, set())
+        await self.broadcast(message, clients)
\ No newline at end of file
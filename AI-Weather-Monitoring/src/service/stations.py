@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.core.predictor.weather_predictor import DEFAULT_STATION, station_path
+from src.utils.metrics import get_registry
+
+QUEUE_DEPTH = get_registry().gauge('weather_queue_depth', 'Readings waiting in a queue', ['queue'])
+READINGS_DROPPED = get_registry().counter(
+    'weather_readings_dropped_total', 'Readings discarded before prediction', ['reason'])
+
+
+def station_of(reading: Dict) -> str:
+    return str(reading.get('station_id') or DEFAULT_STATION)
+
+
+def parse_stations(spec: Optional[str] = None) -> Dict[str, List[Tuple[str, Dict]]]:
+    """Connection methods per station from STATIONS
+
+    The format is ``id=method:address`` separated by commas, e.g.
+    ``north=wifi:192.168.4.10,south=serial:COM3``. A station may be listed
+    more than once to try several connections in turn. Without STATIONS
+    there is a single DEFAULT_STATION whose connections the app discovers.
+    """
+    spec = os.getenv('STATIONS', '') if spec is None else spec
+    stations: Dict[str, List[Tuple[str, Dict]]] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        station_id, _, connection = entry.partition('=')
+        method, _, address = connection.partition(':')
+        if not station_id or method not in ('serial', 'wifi') or not address:
+            raise ValueError(f"Invalid STATIONS entry {entry!r}, expected id=serial:PORT or id=wifi:HOST")
+        stations.setdefault(station_id, []).append(
+            (method, {'port': address} if method == 'serial' else {'ip': address})
+        )
+    return stations or {DEFAULT_STATION: []}
+
+
+class StationRouter:
+    """Per-station queues, each drained in arrival order by its own task
+
+    Readings of one station are handled strictly one after another, while
+    different stations never wait on each other: a slow station only
+    backs up its own queue. Partitions are created the first time a
+    station ID is seen and are only touched from the event loop, so the
+    hot path takes no locks.
+    """
+
+    def __init__(self, handler: Callable[[Dict], Awaitable], queue_size: Optional[int] = None):
+        self.handler = handler
+        self.queue_size = queue_size or int(os.getenv('STATION_QUEUE_SIZE', '100'))
+        self.logger = logging.getLogger(__name__)
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def _partition(self, station_id: str) -> asyncio.Queue:
+        queue = self.queues.get(station_id)
+        if queue is None:
+            queue = self.queues[station_id] = asyncio.Queue(maxsize=self.queue_size)
+            QUEUE_DEPTH.labels(queue=f'station:{station_id}').set_function(queue.qsize)
+            self.tasks[station_id] = asyncio.create_task(self._drain(station_id, queue))
+        return queue
+
+    def submit(self, reading: Dict) -> bool:
+        """Queue a reading for its station; False when that station's backlog is full"""
+        try:
+            self._partition(station_of(reading)).put_nowait(reading)
+            return True
+        except asyncio.QueueFull:
+            READINGS_DROPPED.labels(reason='station_backlog').inc()
+            return False
+
+    async def put(self, reading: Dict) -> None:
+        """Queue a reading for its station, waiting while that station's backlog is full
+
+        For producers that can slow down, such as a station's read loop:
+        only the producer of the backed-up station waits.
+        """
+        await self._partition(station_of(reading)).put(reading)
+
+    async def _drain(self, station_id: str, queue: asyncio.Queue) -> None:
+        while True:
+            reading = await queue.get()
+            try:
+                await self.handler(reading)
+            except Exception as e:
+                self.logger.error(f"Station {station_id} processing error: {e}")
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued reading has been handled"""
+        await asyncio.gather(*(queue.join() for queue in list(self.queues.values())))
+
+    async def close(self, drain: bool = True) -> None:
+        if drain:
+            await self.join()
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+        self.queues.clear()
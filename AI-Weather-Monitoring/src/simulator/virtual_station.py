@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.utils.clock import get_clock
+
+
+class VirtualStation:
+    """Simulated ESP32 weather station
+
+    Emits the firmware's JSON lines on a pseudo-terminal (open the
+    ``serial_path`` end with pyserial like a real COM port) and serves
+    ``/data`` and ``/history`` over local HTTP. Readings follow a diurnal
+    cycle with Gaussian noise; ``dropout_rate`` skips readings and
+    ``malformed_rate`` emits broken lines, as flaky hardware does.
+    """
+
+    def __init__(self, station_id: str, interval: float = 5.0, noise: float = 0.5,
+                 dropout_rate: float = 0.0, malformed_rate: float = 0.0,
+                 history_size: int = 60, http_host: str = '127.0.0.1', http_port: int = 0,
+                 use_pty: bool = True, seed: Optional[int] = None):
+        self.station_id = station_id
+        self.interval = interval
+        self.noise = noise
+        self.dropout_rate = dropout_rate
+        self.malformed_rate = malformed_rate
+        self.http_host = http_host
+        self.http_port = http_port
+        self.use_pty = use_pty and sys.platform != 'win32'
+        self.rng = random.Random(seed)
+        self.history = deque(maxlen=history_size)
+        self.latest: Optional[Dict] = None
+        self.serial_path: Optional[str] = None
+        self.counters = {'emitted': 0, 'dropped': 0, 'malformed': 0, 'overflowed': 0, 'http_requests': 0}
+        self.logger = logging.getLogger(__name__)
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._started_at = time.monotonic()
+        # Stations start at different points of the day so they don't move in lockstep
+        self._phase = self.rng.uniform(0, 2 * math.pi)
+
+    @property
+    def http_url(self) -> str:
+        return f'http://{self.http_host}:{self.http_port}'
+
+    async def start(self) -> None:
+        if self.use_pty:
+            import tty
+            self._master_fd, self._slave_fd = os.openpty()
+            tty.setraw(self._slave_fd)
+            os.set_blocking(self._master_fd, False)
+            self.serial_path = os.ttyname(self._slave_fd)
+        self._server = await asyncio.start_server(self._handle_http, self.http_host, self.http_port)
+        self.http_port = self._server.sockets[0].getsockname()[1]
+        self._task = asyncio.create_task(self._emit_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = self._slave_fd = None
+
+    def uptime_ms(self) -> float:
+        """Milliseconds since start, the clock behind the firmware's millis() timestamps"""
+        return (time.monotonic() - self._started_at) * 1000
+
+    def next_reading(self) -> Dict:
+        """Produce the next sensor reading in the firmware's JSON shape"""
+        millis = int(self.uptime_ms())
+        now = get_clock().now()
+        day_phase = 2 * math.pi * (now.hour * 3600 + now.minute * 60 + now.second) / 86400 + self._phase
+        return {
+            'temperature': round(22 + 6 * math.sin(day_phase) + self.rng.gauss(0, self.noise), 2),
+            'humidity': round(min(100.0, max(0.0, 65 - 15 * math.sin(day_phase)
+                                             + self.rng.gauss(0, 2 * self.noise))), 2),
+            'pressure': round(1012 + 3 * math.sin(day_phase / 3) + self.rng.gauss(0, self.noise / 2), 2),
+            'timestamp': millis
+        }
+
+    def render_line(self, reading: Dict) -> bytes:
+        if self.rng.random() < self.malformed_rate:
+            self.counters['malformed'] += 1
+            line = self.rng.choice([
+                json.dumps(reading)[:self.rng.randint(1, 20)],
+                json.dumps({k: v for k, v in reading.items() if k != 'pressure'}),
+                json.dumps({**reading, 'temperature': 'nan'}),
+                'BMP180 Error!'
+            ])
+        else:
+            line = json.dumps(reading)
+        return line.encode('utf-8') + b'\r\n'
+
+    async def _emit_loop(self) -> None:
+        clock = get_clock()
+        while True:
+            await clock.sleep(self.interval)
+            if self.rng.random() < self.dropout_rate:
+                self.counters['dropped'] += 1
+                continue
+            reading = self.next_reading()
+            self.latest = reading
+            self.history.append(reading)
+            self.counters['emitted'] += 1
+            if self._master_fd is not None:
+                try:
+                    os.write(self._master_fd, self.render_line(reading))
+                except BlockingIOError:
+                    # Nobody is reading the serial end; a real UART drops bytes too
+                    self.counters['overflowed'] += 1
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            self.counters['http_requests'] += 1
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else ''
+            if path == '/data' and self.latest is not None:
+                status, body = '200 OK', json.dumps(self.latest)
+            elif path == '/history':
+                status, body = '200 OK', json.dumps(list(self.history))
+            else:
+                status, body = '404 Not Found', json.dumps({'error': 'not found'})
+            payload = body.encode('utf-8')
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def describe(self) -> Dict:
+        return {
+            'station_id': self.station_id,
+            'serial_path': self.serial_path,
+            'http_url': self.http_url,
+            **self.counters
+        }
+
+
+class StationSimulator:
+    """Run a fleet of virtual stations in one event loop"""
+
+    def __init__(self, count: int, base_port: int = 0, seed: Optional[int] = None, **station_options):
+        self.stations: List[VirtualStation] = [
+            VirtualStation(
+                f'station-{index:04d}',
+                http_port=base_port + index if base_port else 0,
+                seed=None if seed is None else seed + index,
+                **station_options
+            )
+            for index in range(count)
+        ]
+
+    async def start(self) -> None:
+        await asyncio.gather(*(station.start() for station in self.stations))
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(station.stop() for station in self.stations))
+
+    def describe(self) -> List[Dict]:
+        return [station.describe() for station in self.stations]
+
+
+async def run_simulator(args) -> None:
+    simulator = StationSimulator(
+        args.stations, base_port=args.base_port, seed=args.seed,
+        interval=args.interval, noise=args.noise,
+        dropout_rate=args.dropout, malformed_rate=args.malformed
+    )
+    await simulator.start()
+    print(json.dumps(simulator.describe(), indent=2), flush=True)
+    try:
+        if args.duration:
+            await asyncio.sleep(args.duration)
+        else:
+            await asyncio.Future()
+    finally:
+        summary = simulator.describe()
+        await simulator.stop()
+        totals = {key: sum(station[key] for station in summary)
+                  for key in ('emitted', 'dropped', 'malformed', 'overflowed', 'http_requests')}
+        print(json.dumps({'stations': len(summary), **totals}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run virtual ESP32 weather stations")
+    parser.add_argument('--stations', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=5.0, help="seconds between readings per station")
+    parser.add_argument('--noise', type=float, default=0.5, help="sensor noise standard deviation")
+    parser.add_argument('--dropout', type=float, default=0.0, help="probability a reading is skipped")
+    parser.add_argument('--malformed', type=float, default=0.0, help="probability a line is malformed")
+    parser.add_argument('--base-port', type=int, default=0, help="first HTTP port (0 picks free ports)")
+    parser.add_argument('--duration', type=float, default=0, help="seconds to run (0 runs until interrupted)")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_simulator(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
 from typing import Dict, Optional
-import time
 import json
 import os
 from threading import Lock
+from src.utils.clock import get_clock
 
 class DataCache:
     def __init__(self, cache_size: int = 1000, cache_file: str = 'data/cache.json'):
@@ -14,11 +14,20 @@ class DataCache:
 
     def add_data(self, data: Dict) -> None:
         with self.cache_lock:
-            self.data_cache.append({**data, 'timestamp': time.time()})
-            if len(self.data_cache) > self.cache_size:
-                self.data_cache.pop(0)
+            self._append(data)
             self.save_cache()
 
+    def append(self, data: Dict) -> list:
+        """Record a reading in memory only, returning a copy of the entries for a later save"""
+        with self.cache_lock:
+            self._append(data)
+            return list(self.data_cache)
+
+    def _append(self, data: Dict) -> None:
+        self.data_cache.append({**data, 'timestamp': get_clock().time()})
+        if len(self.data_cache) > self.cache_size:
+            self.data_cache.pop(0)
+
     def get_recent_data(self, count: int) -> list:
         with self.cache_lock:
             return self.data_cache[-count:]
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class SystemClock:
+    """Wall-clock time and real sleeps"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """Clock that only moves when told to, for replays and tests
+
+    sleep() advances virtual time and yields to the loop once instead of
+    waiting, so a recorded month runs as fast as the CPU allows.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._now = start or datetime(2000, 1, 1)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def time(self) -> float:
+        return self._now.timestamp()
+
+    def advance(self, seconds: float) -> None:
+        self._now += timedelta(seconds=seconds)
+
+    def set(self, moment: datetime) -> None:
+        """Jump forward to ``moment``; virtual time never goes backwards"""
+        if moment > self._now:
+            self._now = moment
+
+    async def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+        await asyncio.sleep(0)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """Return the clock every component should use instead of datetime.now/asyncio.sleep"""
+    return _clock
+
+
+def set_clock(clock) -> None:
+    global _clock
+    _clock = clock
@@ -0,0 +1,23 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_shared_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool for blocking I/O
+
+    Components share one pool instead of each creating their own, so the
+    number of threads contending for the GIL stays fixed.
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('IO_THREADS', '4')),
+                thread_name_prefix='weather-io'
+            )
+        return _shared_executor
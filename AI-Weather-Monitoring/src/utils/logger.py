@@ -1,46 +1,188 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import re
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+_NUMBER = re.compile(r'-?\d+(\.\d+)?')
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['RateLimitedQueueHandler'] = None
+
+
+class RateLimitedQueueHandler(logging.handlers.QueueHandler):
+    """Queue records for a writer thread, collapsing repeats of the same message
+
+    Messages are keyed by logger, level and text with numbers masked, so
+    "Invalid temperature value: 150.3" and "...: 151.0" count as one. The
+    first occurrence in each ``window`` is passed on; the rest are counted
+    and reported as "suppressed N times" with the next one let through, or
+    by the sweeper thread once a window ends if the message stops recurring.
+    """
+
+    def __init__(self, log_queue: queue.Queue, window: float = 60.0, max_keys: int = 10000):
+        super().__init__(log_queue)
+        self.window = window
+        self.max_keys = max_keys
+        self._seen: Dict[Tuple[str, int, str], List] = {}
+        self._seen_lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stop_sweeper = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def start_sweeper(self) -> None:
+        """Sweep expired windows from a timer thread, so quiet messages still get their summary"""
+        if self._sweeper is not None:
+            return
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(target=self._run_sweeper, name='log-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _run_sweeper(self) -> None:
+        while not self._stop_sweeper.wait(self.window):
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Emit summaries for messages whose window has ended"""
+        with self._seen_lock:
+            summaries = self._sweep(time.monotonic())
+        for summary in summaries:
+            super().emit(summary)
+
+    def close(self) -> None:
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+        super().close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        now = time.monotonic()
+        key = (record.name, record.levelno, _NUMBER.sub('#', record.getMessage()))
+        with self._seen_lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                entry[2] = record
+                suppressed, pending = -1, []
+            else:
+                suppressed = entry[1] if entry else 0
+                if len(self._seen) >= self.max_keys:
+                    self._seen.clear()
+                self._seen[key] = [now, 0, None]
+                pending = self._sweep(now) if now - self._last_sweep >= self.window else []
+        for summary in pending:
+            super().emit(summary)
+        if suppressed < 0:
+            return
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} times in the last {self.window:g}s)"
+            record.args = None
+        super().emit(record)
+
+    def _sweep(self, now: float) -> List[logging.LogRecord]:
+        """Summaries for keys whose window ended with suppressed repeats; caller holds the lock"""
+        self._last_sweep = now
+        summaries = []
+        for key, (started, count, last) in list(self._seen.items()):
+            if now - started < self.window:
+                continue
+            del self._seen[key]
+            if count:
+                summaries.append(self._summary(last, count))
+        return summaries
+
+    def _summary(self, record: logging.LogRecord, count: int) -> logging.LogRecord:
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.msg = f"{record.getMessage()} (suppressed {count} times in the last {self.window:g}s)"
+        summary.args = None
+        return summary
+
+    def flush_suppressed(self) -> None:
+        """Emit summaries for every pending suppressed message"""
+        with self._seen_lock:
+            summaries = [self._summary(last, count) for _, count, last in self._seen.values() if count]
+            self._seen.clear()
+        for summary in summaries:
+            super().emit(summary)
+
 
 def setup_logging(log_level: str = "INFO", 
-                 log_file: Optional[str] = None) -> logging.Logger:
+                 log_file: Optional[str] = None,
+                 force: bool = False) -> logging.Logger:
     """
     Configure and return a logger instance
+
+    Records are put on a queue by the calling thread and written by a
+    QueueListener thread, so file I/O never runs on the event loop. Like
+    ``basicConfig``, the first call wins unless ``force`` is set.
     
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        log_file: Optional file path for logging to file
+        log_file: Optional file path for logging to file, rotated by size
+        force: Replace an existing configuration
     
     Returns:
         logging.Logger: Configured logger instance
     """
-    # Create logs directory if logging to file
-    if log_file:
-        os.makedirs('logs', exist_ok=True)
-        if not log_file.startswith('logs/'):
-            log_file = f'logs/{log_file}'
-            
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if _listener is not None:
+        if not force:
+            return logging.getLogger('WeatherStation')
+        stop_logging()
+
     # Set up logging format
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
 
-    # Configure logging
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format=log_format,
-        datefmt=date_format,
-        filename=log_file
-    )
+    # Create logs directory if logging to file
+    if log_file:
+        # Bare file names go to logs/, explicit paths are kept as given
+        if not os.path.dirname(log_file):
+            log_file = os.path.join('logs', log_file)
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        output = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+            encoding='utf-8'
+        )
+    else:
+        output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter(log_format, date_format))
 
-    # Create console handler if not logging to file
-    if not log_file:
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(logging.Formatter(log_format, date_format))
-        logging.getLogger().addHandler(console_handler)
+    log_queue: queue.Queue = queue.Queue(int(os.getenv('LOG_QUEUE_SIZE', '-1')))
+    _queue_handler = RateLimitedQueueHandler(log_queue, window=float(os.getenv('LOG_DEDUP_WINDOW', '60')))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _queue_handler.start_sweeper()
 
+    root.setLevel(getattr(logging, log_level.upper()))
+    root.addHandler(_queue_handler)
     return logging.getLogger('WeatherStation')
 
+
+def stop_logging() -> None:
+    """Flush suppressed-message summaries and stop the writer thread"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _queue_handler.close()
+    _queue_handler.flush_suppressed()
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+atexit.register(stop_logging)
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import List, Optional
+
+
+class LoopLagProbe:
+    """Measure how late the event loop wakes up a periodic sleeper
+
+    A blocked loop (CPU-bound work, synchronous I/O) shows up as the
+    difference between the requested sleep and the time actually elapsed.
+    """
+
+    def __init__(self, interval: float = 0.005, max_samples: int = 10000):
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples: List[float] = []
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'LoopLagProbe':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        """Start sampling on the running loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.max_lag = max(self.max_lag, lag)
+            if len(self.samples) < self.max_samples:
+                self.samples.append(lag)
+
+    def percentile(self, pct: float) -> float:
+        """Return the given lag percentile in seconds"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            'samples': len(self.samples),
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max_lag * 1000, 3)
+        }
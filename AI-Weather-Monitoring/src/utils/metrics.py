@@ -0,0 +1,302 @@
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_func', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._func: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        if self._func is not None:
+            try:
+                return float(self._func())
+            except Exception:
+                return math.nan
+        return self._value
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, func: Callable[[], float]) -> None:
+        """Read the value from ``func`` at scrape time, e.g. a queue's qsize"""
+        self._func = func
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """Return the child series for these label values, creating it once"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield from self._child_samples(key, child)
+
+    def _child_samples(self, key, child):
+        yield self.name, _format_labels(self.labelnames, key), child.value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. readings dropped"""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth"""
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set_function(self, func: Callable[[], float]) -> None:
+        self._default.set_function(func)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket distribution; observe() is a bisect and two additions"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _child_samples(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            yield f'{self.name}_bucket', _format_labels(self.labelnames, key, le), cumulative
+        labels = _format_labels(self.labelnames, key)
+        yield f'{self.name}_sum', labels, total
+        yield f'{self.name}_count', labels, cumulative
+
+
+class MetricsRegistry:
+    """Named metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide registry components record into"""
+    return _registry
+
+
+Handler = Callable[[Dict[str, str]], Awaitable[Tuple[str, str, str]]]
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving /metrics; more routes can be added"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = '127.0.0.1', port: int = 8766):
+        self.registry = registry or get_registry()
+        self.host = host
+        self.port = port
+        self.logger = logging.getLogger(__name__)
+        self.routes: Dict[Tuple[str, str], Handler] = {('GET', '/metrics'): self._metrics}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def add_route(self, method: str, path: str, handler: Handler) -> None:
+        """Serve ``handler(query) -> (status, content_type, body)`` at ``path``"""
+        self.routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _metrics(self, query: Dict[str, str]) -> Tuple[str, str, str]:
+        return '200 OK', 'text/plain; version=0.0.4; charset=utf-8', self.registry.render()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            method, target = (parts[0], parts[1]) if len(parts) > 1 else ('', '')
+            url = urlsplit(target)
+            handler = self.routes.get((method, url.path))
+            if handler is None:
+                status, content_type, body = '404 Not Found', 'text/plain', 'not found\n'
+            else:
+                try:
+                    status, content_type, body = await handler(dict(parse_qsl(url.query)))
+                except Exception as e:
+                    self.logger.error(f"Admin endpoint {url.path} failed: {e}")
+                    status, content_type, body = '500 Internal Server Error', 'text/plain', f'{e}\n'
+            payload = body.encode('utf-8')
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
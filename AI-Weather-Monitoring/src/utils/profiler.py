@@ -0,0 +1,319 @@
+import asyncio
+import asyncio.events
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MODES = ('cpu', 'memory', 'slow')
+
+# The pipeline stage of the running task or thread; a context variable so
+# coroutines interleaving on the loop thread each keep their own
+_stage: ContextVar[Optional[str]] = ContextVar('profiler_stage', default=None)
+# Thread ident -> stage of the code running on it now, mirrored from _stage
+# for the sampler thread, which cannot read other threads' contexts
+_stages: Dict[int, str] = {}
+_tagging = False
+_handle_run = None
+
+
+def _mirror(stage: Optional[str]) -> None:
+    ident = threading.get_ident()
+    if stage is None:
+        _stages.pop(ident, None)
+    else:
+        _stages[ident] = stage
+
+
+def enter_stage(stage: str) -> Optional[Token]:
+    """Tag the current task's samples with ``stage``; a no-op unless profiling"""
+    if not _tagging:
+        return None
+    token = _stage.set(stage)
+    _mirror(stage)
+    return token
+
+
+def exit_stage(token: Optional[Token]) -> None:
+    if token is None:
+        return
+    _stage.reset(token)
+    if _tagging:
+        _mirror(_stage.get())
+
+
+def _install_stage_mirror() -> None:
+    """Wrap ``asyncio.Handle._run`` so each task step mirrors its own stage"""
+    global _handle_run
+    original = _handle_run = asyncio.events.Handle._run
+
+    def run_in_stage(handle):
+        previous = _stages.get(threading.get_ident())
+        _mirror(handle._context.get(_stage))
+        try:
+            return original(handle)
+        finally:
+            _mirror(previous)
+
+    asyncio.events.Handle._run = run_in_stage
+
+
+def _remove_stage_mirror() -> None:
+    global _handle_run
+    if _handle_run is not None:
+        asyncio.events.Handle._run = _handle_run
+        _handle_run = None
+
+
+class StackSampler:
+    """Periodically sample every thread's Python stack into folded-stack counts
+
+    The output is Brendan Gregg's collapsed format, one
+    ``thread;stage:<name>;frame;frame count`` line per distinct stack,
+    ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                    frame = frame.f_back
+                prefix = [names.get(ident, str(ident))]
+                stage = _stages.get(ident)
+                if stage:
+                    prefix.append(f'stage:{stage}')
+                self.stacks[';'.join(prefix + frames[::-1])] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class SlowCallbackMonitor:
+    """Record event-loop callbacks that run longer than ``threshold`` seconds
+
+    Wraps ``asyncio.Handle._run`` while active, so every task step is
+    timed and attributed to its coroutine; the original is restored on stop.
+    """
+
+    def __init__(self, threshold: float = 0.05):
+        self.threshold = threshold
+        self.records: List[Dict] = []
+        self._original = None
+
+    def start(self) -> None:
+        original = self._original = asyncio.events.Handle._run
+        threshold, records = self.threshold, self.records
+
+        def timed_run(handle):
+            # The stage the task resumed in, unless the step left it in another
+            resumed_in = handle._context.get(_stage)
+            started = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed = time.perf_counter() - started
+                if elapsed >= threshold:
+                    records.append({
+                        'callback': _describe_callback(handle._callback),
+                        'seconds': round(elapsed, 6),
+                        'stage': handle._context.get(_stage) or resumed_in,
+                        'at': datetime.now().isoformat(timespec='milliseconds')
+                    })
+
+        asyncio.events.Handle._run = timed_run
+
+    def stop(self) -> None:
+        if self._original is not None:
+            asyncio.events.Handle._run = self._original
+            self._original = None
+
+
+def _describe_callback(callback) -> str:
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f'{owner.get_name()} {getattr(coro, "__qualname__", repr(coro))}'
+    return getattr(callback, '__qualname__', repr(callback))
+
+
+class Profiler:
+    """Start and stop bounded profiling sessions on the live process
+
+    Nothing is installed until a session starts, so the only cost while
+    idle is the ``enter_stage`` flag check in StageTimer.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, sample_interval: Optional[float] = None,
+                 slow_callback_threshold: Optional[float] = None, max_seconds: Optional[float] = None):
+        self.output_dir = output_dir or os.getenv('PROFILE_DIR', 'profiles')
+        self.sample_interval = sample_interval or float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+        self.slow_callback_threshold = slow_callback_threshold or float(os.getenv('SLOW_CALLBACK_SECONDS', '0.05'))
+        self.max_seconds = max_seconds or float(os.getenv('PROFILE_MAX_SECONDS', '300'))
+        self.logger = logging.getLogger(__name__)
+        self.active = False
+        self.last_files: Dict[str, str] = {}
+        self._session: Dict = {}
+        self._task: Optional[asyncio.Task] = None
+        self._signum: Optional[int] = None
+
+    def start(self, modes: Iterable[str] = MODES, tag: str = 'manual') -> None:
+        global _tagging
+        if self.active:
+            raise RuntimeError("A profiling session is already running")
+        modes = [mode for mode in modes if mode in MODES]
+        session = {'modes': modes, 'tag': tag, 'started': datetime.now()}
+        if 'cpu' in modes:
+            session['sampler'] = StackSampler(self.sample_interval)
+            session['sampler'].start()
+        if 'memory' in modes:
+            session['owns_tracemalloc'] = not tracemalloc.is_tracing()
+            if session['owns_tracemalloc']:
+                tracemalloc.start(int(os.getenv('TRACEMALLOC_FRAMES', '10')))
+            session['snapshot'] = tracemalloc.take_snapshot()
+        if 'slow' in modes:
+            # Wraps the stage mirror installed below, and is removed before it
+            session['slow'] = SlowCallbackMonitor(self.slow_callback_threshold)
+        self._session = session
+        _install_stage_mirror()
+        if 'slow' in session:
+            session['slow'].start()
+        _tagging = True
+        self.active = True
+        self.logger.info(f"Profiling started: {', '.join(modes)} ({tag})")
+
+    def stop(self) -> Dict[str, str]:
+        """End the session and write its profiles; returns mode -> file path"""
+        global _tagging
+        if not self.active:
+            return {}
+        session, self._session = self._session, {}
+        _tagging = False
+        if 'slow' in session:
+            session['slow'].stop()
+        _remove_stage_mirror()
+        _stages.clear()
+        self.active = False
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_tag = ''.join(c if c.isalnum() or c in '-_' else '_' for c in session['tag'])
+        stem = os.path.join(self.output_dir, f"{session['started']:%Y%m%d-%H%M%S}-{safe_tag}")
+        files = {}
+        if 'sampler' in session:
+            session['sampler'].stop()
+            files['cpu'] = f'{stem}-cpu.folded'
+            with open(files['cpu'], 'w') as f:
+                f.write(session['sampler'].folded())
+        if 'snapshot' in session:
+            snapshot = tracemalloc.take_snapshot()
+            if session['owns_tracemalloc']:
+                tracemalloc.stop()
+            files['memory'] = f'{stem}-memory.txt'
+            with open(files['memory'], 'w') as f:
+                f.write(f"# allocation growth during '{session['tag']}', top 50 by size\n")
+                for stat in snapshot.compare_to(session['snapshot'], 'lineno')[:50]:
+                    f.write(f'{stat}\n')
+            files['memory_snapshot'] = f'{stem}-memory.snapshot'
+            snapshot.dump(files['memory_snapshot'])
+        if 'slow' in session:
+            files['slow'] = f'{stem}-slow-callbacks.json'
+            with open(files['slow'], 'w') as f:
+                json.dump({'threshold_s': session['slow'].threshold, 'tag': session['tag'],
+                           'callbacks': session['slow'].records}, f, indent=2)
+        self.last_files = files
+        self.logger.info(f"Profiling finished, wrote {', '.join(files.values())}")
+        return files
+
+    async def run(self, seconds: float, modes: Iterable[str] = MODES, tag: str = 'manual') -> Dict[str, str]:
+        """Profile for ``seconds`` (capped at max_seconds) and write the results"""
+        self.start(modes, tag)
+        try:
+            await asyncio.sleep(min(seconds, self.max_seconds))
+        finally:
+            files = self.stop()
+        return files
+
+    def trigger(self, seconds: float, modes: Iterable[str] = MODES, tag: str = 'manual') -> bool:
+        """Run a session in the background; False if one is already running"""
+        if self.active or (self._task and not self._task.done()):
+            return False
+        self._task = asyncio.get_running_loop().create_task(self.run(seconds, modes, tag))
+        return True
+
+    def install_signal_handler(self, signum: Optional[int] = None) -> bool:
+        """Profile for PROFILE_SECONDS when the process receives SIGUSR1"""
+        signum = signum or getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+        seconds = float(os.getenv('PROFILE_SECONDS', '30'))
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signum, lambda: self.trigger(seconds, tag='signal')
+            )
+            self._signum = signum
+            return True
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+
+    async def close(self) -> None:
+        """Finish any running session early and remove the signal handler"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.stop()
+        if self._signum is not None:
+            asyncio.get_running_loop().remove_signal_handler(self._signum)
+            self._signum = None
+
+    def register_routes(self, server) -> None:
+        """Expose GET/POST /profile on a MetricsServer"""
+        server.add_route('GET', '/profile', self._status)
+        server.add_route('POST', '/profile', self._start_request)
+
+    async def _status(self, query: Dict[str, str]) -> Tuple[str, str, str]:
+        body = {'active': self.active, 'last_files': self.last_files}
+        return '200 OK', 'application/json', json.dumps(body)
+
+    async def _start_request(self, query: Dict[str, str]) -> Tuple[str, str, str]:
+        seconds = float(query.get('seconds', os.getenv('PROFILE_SECONDS', '30')))
+        modes = [mode for mode in query.get('modes', ','.join(MODES)).split(',') if mode in MODES]
+        tag = query.get('tag', 'admin')
+        if not modes:
+            return '400 Bad Request', 'application/json', json.dumps({'error': f'modes must be from {MODES}'})
+        if not self.trigger(seconds, modes, tag):
+            return '409 Conflict', 'application/json', json.dumps({'error': 'profiling already running'})
+        body = {'started': True, 'seconds': min(seconds, self.max_seconds), 'modes': modes, 'tag': tag}
+        return '202 Accepted', 'application/json', json.dumps(body)
@@ -0,0 +1,160 @@
+import json
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_COLUMNS = ('timestamp', 'temperature', 'humidity', 'pressure')
+
+# Header: published sequence, slot count, column count, reserved sequence,
+# then the column names as JSON
+_HEADER_BYTES = 512
+_NAMES_OFFSET = 32
+
+_attach_lock = threading.Lock()
+
+
+class RingWindow:
+    """Zero-copy view of consecutive rows in a SharedRingBuffer
+
+    The arrays alias shared memory, so the writer may overwrite them once
+    it laps the window; call is_valid() after using the data (and before
+    trusting results derived from it), or copy() to keep a stable snapshot.
+    """
+
+    def __init__(self, buffer: 'SharedRingBuffer', start_seq: int, columns: Dict[str, np.ndarray]):
+        self.buffer = buffer
+        self.start_seq = start_seq
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def is_valid(self) -> bool:
+        """True while none of the window's rows have been overwritten"""
+        return self.buffer.reserved - self.start_seq <= self.buffer.slots
+
+    def copy(self) -> Dict[str, np.ndarray]:
+        return {name: values.copy() for name, values in self.columns.items()}
+
+
+class SharedRingBuffer:
+    """Columnar float64 ring buffer in shared memory
+
+    One process writes, any number of processes attach by name and read.
+    Each row is stored twice, at slot i and slot i + slots, so any window of
+    up to ``capacity`` rows is contiguous and readers get plain NumPy views
+    without copying or pickling. The writer reserves the rows it is about
+    to fill, writes them, then publishes the new sequence; readers compare
+    their window against the reservation to detect overwrites. One spare
+    slot keeps a full-capacity window clear of a single in-flight row.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self._header = np.ndarray((4,), dtype=np.uint64, buffer=shm.buf)
+        self.slots = int(self._header[1])
+        self.capacity = self.slots - 1
+        names_raw = bytes(shm.buf[_NAMES_OFFSET:_HEADER_BYTES]).rstrip(b'\0')
+        self.column_names = tuple(json.loads(names_raw.decode('utf-8')))
+        self._data = np.ndarray(
+            (len(self.column_names), 2 * self.slots), dtype=np.float64,
+            buffer=shm.buf, offset=_HEADER_BYTES
+        )
+        self._index = {name: i for i, name in enumerate(self.column_names)}
+
+    @classmethod
+    def create(cls, capacity: int, name: Optional[str] = None,
+               columns: Sequence[str] = DEFAULT_COLUMNS) -> 'SharedRingBuffer':
+        """Allocate a new buffer; the creating process is the single writer"""
+        names = json.dumps(list(columns)).encode('utf-8')
+        if len(names) > _HEADER_BYTES - _NAMES_OFFSET:
+            raise ValueError("Too many columns for the ring buffer header")
+        slots = capacity + 1
+        size = _HEADER_BYTES + len(columns) * 2 * slots * 8
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((4,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = (0, slots, len(columns), 0)
+        shm.buf[_NAMES_OFFSET:_NAMES_OFFSET + len(names)] = names
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedRingBuffer':
+        """Attach to an existing buffer as a reader"""
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), owner=False)
+        # Before 3.13 attaching registers the segment with the resource tracker,
+        # which unlinks it when the reader exits (bpo-39959); skip registration
+        with _attach_lock:
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(shm, owner=False)
+
+    @property
+    def sequence(self) -> int:
+        """Total number of rows written so far"""
+        return int(self._header[0])
+
+    @property
+    def reserved(self) -> int:
+        """End of the rows the writer has started to overwrite"""
+        return int(self._header[3])
+
+    def append(self, row) -> None:
+        """Write one row, given as a mapping or a sequence in column order"""
+        seq = self.sequence
+        slot = seq % self.slots
+        values = [row[name] for name in self.column_names] if isinstance(row, dict) else row
+        self._header[3] = seq + 1
+        self._data[:, slot] = values
+        self._data[:, slot + self.slots] = values
+        self._header[0] = seq + 1
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Write a (n_rows, n_columns) block of rows"""
+        rows = np.asarray(rows, dtype=np.float64)
+        # Rows that would be overwritten within this call are never stored
+        skipped = max(0, len(rows) - self.capacity)
+        rows = rows[skipped:]
+        seq = self.sequence + skipped
+        slots = (seq + np.arange(len(rows))) % self.slots
+        self._header[3] = seq + len(rows)
+        self._data[:, slots] = rows.T
+        self._data[:, slots + self.slots] = rows.T
+        self._header[0] = seq + len(rows)
+
+    def latest(self, n: int) -> RingWindow:
+        """Views of the most recent ``n`` rows (fewer if not yet written)"""
+        end = self.sequence
+        return self.window(max(0, end - min(n, self.capacity)), end)
+
+    def window(self, start_seq: int, end_seq: int) -> RingWindow:
+        """Views of rows [start_seq, end_seq), e.g. for replaying from a sequence"""
+        if end_seq - start_seq > self.capacity or self.reserved - start_seq > self.slots:
+            raise ValueError(f"Rows {start_seq}..{end_seq} are no longer in the buffer")
+        first = start_seq % self.slots
+        last = first + (end_seq - start_seq)
+        return RingWindow(self, start_seq, {
+            name: self._data[i, first:last] for name, i in self._index.items()
+        })
+
+    def close(self) -> None:
+        # Drop our own views before releasing the mapping
+        self._header = self._data = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        if self.owner:
+            self.shm.unlink()
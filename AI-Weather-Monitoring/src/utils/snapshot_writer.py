@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from src.utils.clock import get_clock
+from src.utils.executors import get_shared_executor
+from src.utils.metrics import get_registry
+
+SNAPSHOT_UPDATES = get_registry().counter(
+    'weather_snapshot_updates_total', 'State snapshots handed to the snapshot writer')
+SNAPSHOT_WRITES = get_registry().counter(
+    'weather_snapshot_writes_total', 'Snapshot files actually written')
+
+
+def write_json_atomic(path: str, payload, fsync: bool = True) -> None:
+    """Write JSON next to ``path`` and rename it into place, so readers never see a partial file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Per process and thread, so concurrent writers never share a temp file
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotWriter:
+    """Write-behind writer for the latest state snapshot
+
+    update() only records the newest state and returns; a background task
+    writes at most once per ``min_interval`` seconds, so bursts of updates
+    coalesce into one write. With ``keyed`` the file holds every station's
+    latest state and all stations go out in a single write per pass.
+    """
+
+    def __init__(self, path: str, min_interval: Optional[float] = None, keyed: bool = False,
+                 fsync: bool = True):
+        self.path = path
+        self.min_interval = float(os.getenv('SNAPSHOT_INTERVAL', '1.0')) if min_interval is None else min_interval
+        self.keyed = keyed
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+        self._states: Dict[str, Dict] = {}
+        self._state: Optional[Dict] = None
+        self._dirty = False
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Task] = None
+        self._last_write = float('-inf')
+
+    def update(self, state: Dict, key: Optional[str] = None) -> None:
+        """Replace the pending snapshot (or one station's entry when keyed)"""
+        if self.keyed:
+            self._states[str(key)] = state
+        else:
+            self._state = state
+        self._dirty = True
+        SNAPSHOT_UPDATES.inc()
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self) -> None:
+        # A task left done by a closed event loop is replaced on the current one
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            if self._dirty:
+                self._wake.set()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background task and write anything still pending"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wake = None
+        # A write the task had started is shielded from the cancel; let it land
+        if self._writing is not None:
+            await asyncio.gather(self._writing, return_exceptions=True)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write the pending snapshot now"""
+        if not self._dirty:
+            return
+        if self.keyed:
+            payload = {'updated': get_clock().time(), 'stations': dict(self._states)}
+        else:
+            payload = self._state
+        self._dirty = False
+        self._writing = asyncio.get_running_loop().create_task(self._write(payload))
+        await asyncio.shield(self._writing)
+
+    async def _write(self, payload) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                get_shared_executor(), write_json_atomic, self.path, payload, self.fsync
+            )
+            SNAPSHOT_WRITES.inc()
+        except Exception as e:
+            self._dirty = True
+            self.logger.error(f"Error writing snapshot {self.path}: {e}")
+            if self._wake is not None:
+                self._wake.set()
+        self._last_write = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            delay = self._last_write + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.flush()
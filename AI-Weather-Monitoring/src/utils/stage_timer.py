@@ -0,0 +1,53 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from src.utils.profiler import enter_stage, exit_stage
+
+
+class StageTimer:
+    """Accumulate wall time spent in named pipeline stages
+
+    Durations are also observed into ``histogram`` (labelled by stage)
+    when one is given, so they show up on the metrics endpoint.
+    """
+
+    def __init__(self, histogram=None):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.histogram = histogram
+
+    @contextmanager
+    def track(self, stage: str):
+        started = time.perf_counter()
+        token = enter_stage(stage)
+        try:
+            yield
+        finally:
+            exit_stage(token)
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage: str, seconds: float) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = {'count': 0, 'total': 0.0, 'max': 0.0}
+        stats['count'] += 1
+        stats['total'] += seconds
+        if seconds > stats['max']:
+            stats['max'] = seconds
+        if self.histogram is not None:
+            self.histogram.labels(stage=stage).observe(seconds)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, total seconds, mean and max in milliseconds"""
+        return {
+            stage: {
+                'count': int(stats['count']),
+                'total_s': round(stats['total'], 3),
+                'mean_ms': round(stats['total'] / stats['count'] * 1000, 4) if stats['count'] else 0.0,
+                'max_ms': round(stats['max'] * 1000, 3)
+            }
+            for stage, stats in self.stages.items()
+        }
+
+    def reset(self) -> None:
+        self.stages.clear()
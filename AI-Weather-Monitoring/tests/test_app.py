@@ -0,0 +1,161 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sklearn.linear_model import Ridge
+
+from app import WeatherApp
+from benchmarks.bench_features import hourly_columns, hourly_readings
+from src.core.predictor.weather_predictor import DEFAULT_STATION
+from src.utils.cache_manager import DataCache
+from src.utils.clock import SystemClock, VirtualClock, set_clock
+
+
+class RecordingService:
+    def __init__(self):
+        self.broadcasts = []
+
+    async def broadcast_data(self, data):
+        self.broadcasts.append(data)
+
+
+class TestWeatherApp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {'LOG_DIR': os.path.join(self.tmp.name, 'logs')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_app(self, **env) -> WeatherApp:
+        with mock.patch.dict(os.environ, env):
+            app = WeatherApp()
+        app.cache = DataCache(cache_file=os.path.join(self.tmp.name, 'cache.json'))
+        app.service = RecordingService()
+        self.addCleanup(lambda: asyncio.run(app.prediction_executor.shutdown()))
+        return app
+
+    async def feed(self, app: WeatherApp, hours: int, start: int = 0, warming: float = 0.0) -> None:
+        """Send hourly readings through process_reading on a virtual clock
+
+        Hours ``start`` to ``start + hours`` of the synthetic series are
+        sent, with ``warming`` degrees added to every temperature.
+        """
+        columns = hourly_columns(start + hours)
+        clock = VirtualClock(datetime(2024, 1, 1) + timedelta(hours=start))
+        set_clock(clock)
+        self.addCleanup(set_clock, SystemClock())
+        for i in range(start, start + hours):
+            clock.set(datetime(2024, 1, 1) + timedelta(hours=i))
+            await app.process_reading({'temperature': float(columns['temperature'][i]) + warming,
+                                       'humidity': float(columns['humidity'][i]),
+                                       'pressure': float(columns['pressure'][i])})
+
+    def test_rejected_reading_is_not_broadcast_or_stored(self):
+        app = self.make_app()
+        reading = {'temperature': 21.0, 'humidity': 60.0, 'pressure': 1010.0}
+        with mock.patch.object(app.prediction_executor, 'process_sensor_data',
+                               mock.AsyncMock(return_value=None)):
+            self.assertIsNone(asyncio.run(app.process_reading(dict(reading))))
+        self.assertEqual(app.service.broadcasts, [])
+        self.assertEqual(app.cache.get_recent_data(10), [])
+
+        result = asyncio.run(app.process_reading(dict(reading)))
+        self.assertEqual(app.service.broadcasts, [result])
+        self.assertEqual(len(app.cache.get_recent_data(10)), 1)
+
+
+    def test_station_models_dir_enables_the_model_registry(self):
+        self.assertIsNone(self.make_app().prediction_executor.model_registry)
+        root = os.path.join(self.tmp.name, 'stations')
+        registry = self.make_app(STATION_MODELS_DIR=root).prediction_executor.model_registry
+        self.assertEqual(registry.root, root)
+        self.assertIsNone(registry.version_for('..'))
+
+    def test_retraining_is_scheduled_and_hot_swapped(self):
+        app = self.make_app(RETRAINING_ENABLED='1', TRAINING_INTERVAL='150', MIN_DATA_POINTS='100',
+                            MODEL_VERSIONS_DIR=os.path.join(self.tmp.name, 'versions'),
+                            ENSEMBLE_PATH=os.path.join(self.tmp.name, 'ensemble.joblib'))
+        self.assertIsNotNone(app.retraining)
+        # The full ensemble takes minutes to fit; the retraining flow is the same
+        app.predictor.models = {param: Ridge() for param in app.predictor.WEATHER_PARAMS}
+        served = app.predictor.models
+
+        async def scenario():
+            await self.feed(app, 150)
+            return await app.retraining._task
+
+        report = asyncio.run(scenario())
+        self.assertEqual((report['outcome'], report['reason']), ('promoted', 'volume'))
+        self.assertIsNot(app.predictor.models, served)
+        self.assertEqual(app.predictor.models_meta['version'], report['version'])
+        self.assertTrue(os.path.exists(app.predictor.models_path))
+
+    def test_forecast_drift_triggers_retraining(self):
+        models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        app = self.make_app(RETRAINING_ENABLED='1', TRAINING_INTERVAL='100000', MIN_DATA_POINTS='24',
+                            DRIFT_WINDOW='6', DRIFT_THRESHOLD='0.5', FORECAST_SCHEDULER='1',
+                            FORECAST_MIN_NEW_READINGS='1000', PREDICTION_PROCESSES='1', ENSEMBLE_PATH=models_path,
+                            MODEL_VERSIONS_DIR=os.path.join(self.tmp.name, 'versions'))
+        app.predictor.models = {param: Ridge() for param in app.predictor.WEATHER_PARAMS}
+        asyncio.run(app.predictor.train_model(hourly_readings(400)))
+        app.predictor.save_models(models_path)
+
+        async def scenario():
+            await self.feed(app, 101)
+            # Each hour's fresh forecast is scored by the reading that follows it
+            for hour in range(101, 107):
+                await app.forecasts.refresh(DEFAULT_STATION)
+                await self.feed(app, 1, start=hour)
+            self.assertIsNone(app.retraining._task)
+            self.assertIsNotNone(app.retraining.baseline_error)
+            # Readings leave the forecasts behind: a warmer sensor
+            for hour in range(107, 110):
+                await app.forecasts.refresh(DEFAULT_STATION)
+                await self.feed(app, 1, start=hour, warming=15.0)
+            self.assertIsNotNone(app.retraining._task)
+            return await app.retraining._task
+
+        report = asyncio.run(scenario())
+        self.assertEqual(report['reason'], 'drift')
+        self.assertEqual(report['outcome'], 'promoted')
+
+    def test_online_learner_updates_served_models(self):
+        models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        app = self.make_app(ONLINE_LEARNING_MODE='sgd', ONLINE_BATCH_SIZE='24', ONLINE_MIN_UPDATES='0',
+                            ONLINE_PUBLISH_EVERY='1', ENSEMBLE_PATH=models_path)
+        self.assertIsNotNone(app.online_learner)
+        asyncio.run(self.feed(app, 96))
+        self.assertGreater(app.online_learner.updates, 0)
+        self.assertIs(app.predictor.models['temperature'], app.online_learner.learners['temperature'])
+        # Published models are the online ones, never the untrained ensemble
+        published = app.predictor._read_bundle(models_path)
+        self.assertEqual(type(published['models']['temperature']).__name__, 'OnlineSGDRegressor')
+
+    def test_forecast_scheduler_serves_forecasts_from_the_hourly_grid(self):
+        models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        app = self.make_app(FORECAST_SCHEDULER='1', RESAMPLE_GRIDS='1h', FORECAST_MIN_NEW_READINGS='1000',
+                            ENSEMBLE_PATH=models_path, PREDICTION_PROCESSES='1')
+        self.assertIsNotNone(app.forecasts)
+        # Forecast workers load the models saved at ENSEMBLE_PATH
+        app.predictor.models = {param: Ridge() for param in app.predictor.WEATHER_PARAMS}
+        asyncio.run(app.predictor.train_model(hourly_readings(400)))
+        app.predictor.save_models(models_path)
+
+        async def scenario():
+            await self.feed(app, 100)
+            return await app.forecasts.get(DEFAULT_STATION)
+
+        entry = asyncio.run(scenario())
+        self.assertEqual(entry['data_seq'], 100)
+        self.assertEqual(len(entry['forecast']), 7 * 24)
+        self.assertEqual(app.service.broadcasts[-1], entry)
+        # The rollout started from the closed hourly bins, not the raw cache
+        self.assertEqual(len(app.forecasts.history(DEFAULT_STATION)['timestamp']), 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
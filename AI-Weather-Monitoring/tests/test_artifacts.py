@@ -0,0 +1,62 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.artifacts import compact_artifact, compact_model, load_artifact
+from src.core.predictor.model_search import load_features, training_matrices
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, build_ensemble
+
+SMALL_ENSEMBLE = {'rf_estimators': 40, 'rf_max_depth': 8, 'xgb_estimators': 30, 'gbm_estimators': 30}
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        history = os.path.join(self.tmp.name, 'history.csv')
+        pd.DataFrame(hourly_columns(900)).to_csv(history, index=False)
+        data = training_matrices(load_features([history]), horizon=0)
+        self.validation = {param: (X[600:], y[600:]) for param, (X, y) in data.items()}
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        for param, (X, y) in data.items():
+            self.predictor.models[param] = build_ensemble(SMALL_ENSEMBLE).fit(X[:600], y[:600])
+        self.predictor.save_models()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_float32_trees_predict_like_originals(self):
+        X = self.validation['temperature'][0]
+        model = self.predictor.models['temperature']
+        compact = compact_model(model)
+        for original, member in zip(model.estimators_, compact.estimators_):
+            np.testing.assert_allclose(member.predict(X), original.predict(X), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(compact.predict(X), model.predict(X), rtol=1e-5, atol=1e-6)
+
+    def test_compaction_report(self):
+        output = os.path.join(self.tmp.name, 'ensemble.wma')
+        report = compact_artifact(self.predictor.models_path, output, self.validation, tolerance=0.02)
+        self.assertLess(report['size_bytes']['after'], report['size_bytes']['before'] / 5)
+        # The unfitted templates are identical for the three parameters
+        self.assertGreaterEqual(report['shared_blobs'], 2)
+        for param, trees in report['trees'].items():
+            self.assertLessEqual(trees['after'], trees['before'])
+            accuracy = report['accuracy'][param]
+            self.assertLess(accuracy['rmse_after'], accuracy['rmse_before'] * 1.1)
+
+        predictor = EnhancedWeatherPredictor()
+        self.assertTrue(predictor.load_models(output))
+        X = self.validation['humidity'][0]
+        np.testing.assert_allclose(predictor.models['humidity'].predict(X),
+                                   load_artifact(output)['models']['humidity'].predict(X))
+        forecast = asyncio.run(predictor.predict_weather(hourly_columns(100), days_ahead=1))
+        self.assertEqual(len(forecast), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.backtest import WalkForwardBacktest
+from src.core.predictor.feature_store import FeatureStore
+from src.core.predictor.forecast_strategies import slice_columns
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+
+class TestWalkForwardBacktest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.models_path = os.path.join(cls.tmp.name, 'ensemble.joblib')
+        cls.data = hourly_columns(900)
+        predictor = EnhancedWeatherPredictor()
+        predictor.models = {param: Ridge() for param in predictor.WEATHER_PARAMS}
+        train = slice_columns(cls.data, 0, 400)
+        asyncio.run(predictor.train_model(train))
+        asyncio.run(predictor.train_direct_models(train, '1h:6h,6h:1d', 1, model_factory=Ridge))
+        predictor.save_models(cls.models_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def backtest(self, workers: int) -> WalkForwardBacktest:
+        return WalkForwardBacktest(self.data, self.models_path, '1h:6h,6h:1d', days_ahead=1, window=168,
+                                   strategy='direct', workers=workers)
+
+    def test_cutoffs_leave_room_for_window_and_leads(self):
+        cutoffs = self.backtest(1).cutoffs(every=24)
+        self.assertEqual(cutoffs[0], 168)
+        self.assertLessEqual(cutoffs[-1] - 1 + 24, 899)
+        self.assertEqual(cutoffs[1] - cutoffs[0], 24)
+
+    def test_pool_matches_single_process(self):
+        single = self.backtest(1)
+        cutoffs = single.cutoffs(every=12)[-20:]
+        expected = single.run(cutoffs)
+        pooled = WalkForwardBacktest(self.data, self.models_path, '1h:6h,6h:1d', days_ahead=1, window=168,
+                                     strategy='direct', workers=2, chunk_size=3).run(cutoffs)
+        self.assertEqual((expected['cutoffs'], expected['failed']), (20, 0))
+        self.assertEqual(list(expected['leads']), ['1', '2', '3', '4', '5', '6', '12', '18', '24'])
+        for lead, row in expected['leads'].items():
+            for param, scores in row.items():
+                self.assertAlmostEqual(pooled['leads'][lead][param]['rmse'], scores['rmse'], places=6)
+        self.assertEqual(pooled['bands'], expected['bands'])
+        # Synthetic temperature swings +-6 around its mean; a useful forecast does much better
+        self.assertLess(expected['bands']['day1']['temperature'], 3)
+        self.assertTrue(np.isfinite(expected['leads']['24']['pressure']['mae']))
+
+    def test_replays_history_from_the_feature_store(self):
+        history = os.path.join(self.tmp.name, 'history.csv')
+        pd.DataFrame(self.data).to_csv(history, index=False)
+        store = FeatureStore(os.path.join(self.tmp.name, 'store'))
+        store.ingest('roof', [history])
+        columns = store.columns('roof')
+        np.testing.assert_allclose(columns['timestamp'], self.data['timestamp'])
+        np.testing.assert_allclose(columns['pressure'], self.data['pressure'], rtol=1e-6)
+
+        cutoffs = self.backtest(1).cutoffs(every=48)[-5:]
+        expected = self.backtest(1).run(cutoffs)
+        stored = WalkForwardBacktest(columns, self.models_path, '1h:6h,6h:1d', days_ahead=1, window=168,
+                                     strategy='direct', workers=1).run(cutoffs)
+        for band, row in expected['bands'].items():
+            for param, rmse in row.items():
+                self.assertAlmostEqual(stored['bands'][band][param], rmse, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
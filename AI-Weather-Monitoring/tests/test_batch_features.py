@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.batch_features import BatchFeatureBuilder, fit_robust_scaler
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+from tests.test_prediction_executor import make_history
+
+RATIO = 'temp_humidity_ratio'
+
+
+class TestBatchFeatures(unittest.TestCase):
+    def assert_matches_pandas(self, data):
+        predictor = EnhancedWeatherPredictor()
+        expected = predictor.prepare_features(data)
+        builder = BatchFeatureBuilder()
+        actual = builder.transform(data)
+
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        self.assertEqual(len(actual), len(expected))
+        self.assertTrue((actual['datetime'].to_numpy() == expected['datetime'].to_numpy()).all())
+        numeric = [column for column in expected.columns if column not in ('timestamp', 'datetime', RATIO)]
+        np.testing.assert_allclose(actual[numeric].to_numpy(dtype=float), expected[numeric].to_numpy(),
+                                   rtol=1e-4, atol=1e-4)
+        # The ratio divides by scaled humidity, which passes near zero; check it against its float32 inputs
+        np.testing.assert_allclose(actual[RATIO], actual['temperature'] / actual['humidity'], rtol=1e-5)
+        for param in predictor.WEATHER_PARAMS:
+            self.assertAlmostEqual(builder.scalers[param].center_[0], predictor.scalers[param].center_[0], places=4)
+            self.assertAlmostEqual(builder.scalers[param].scale_[0], predictor.scalers[param].scale_[0], places=4)
+
+    def test_matches_prepare_features_on_column_arrays(self):
+        self.assert_matches_pandas(hourly_columns(5_000))
+
+    def test_matches_prepare_features_with_gaps(self):
+        data = hourly_columns(3_000)
+        for param, rows in (('temperature', [100, 101]), ('humidity', [1_500]), ('pressure', [2_000, 2_900])):
+            data[param][rows] = np.nan
+        self.assert_matches_pandas(data)
+
+    def test_matches_prepare_features_on_readings(self):
+        self.assert_matches_pandas(make_history(300))
+        self.assert_matches_pandas(make_history(10))
+
+    def test_scaler_fit_matches_robust_scaler(self):
+        column = np.random.default_rng(1).normal(20, 5, 10_001).astype(np.float32)
+        column[::7] = np.nan
+        fitted = fit_robust_scaler(EnhancedWeatherPredictor().scalers['temperature'], column)
+        reference = pd.Series(column).quantile([0.25, 0.5, 0.75]).to_numpy()
+        self.assertAlmostEqual(fitted.center_[0], reference[1], places=4)
+        self.assertAlmostEqual(fitted.scale_[0], reference[2] - reference[0], places=4)
+
+    def test_large_training_sets_use_batch_builder(self):
+        predictor = EnhancedWeatherPredictor()
+        predictor.models = {param: Ridge() for param in predictor.WEATHER_PARAMS}
+        predictor.batch_feature_rows = 1_000
+        data = hourly_columns(2_000)
+        features = predictor.prepare_training_features(data)
+        self.assertEqual(features['temperature'].dtype, np.float32)
+        self.assertEqual(predictor.prepare_training_features(hourly_columns(500))['temperature'].dtype, np.float64)
+        self.assertTrue(asyncio.run(predictor.train_model(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.bench_fanout import fanout
+from benchmarks.bench_pipeline import pipeline
+from benchmarks.harness import compare, summarize
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_summarize_reports_percentiles_in_ms(self):
+        summary = summarize([i / 1000 for i in range(1, 101)], items=100, wall_seconds=2.0)
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p99_ms'], 99.01)
+        self.assertEqual(summary['throughput_per_s'], 50.0)
+
+    def test_compare_flags_only_regressions_beyond_threshold(self):
+        baseline = {'a': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'throughput_per_s': 100.0},
+                    'gone': {'p50_ms': 1.0}}
+        current = {'a': {'p50_ms': 10.5, 'p95_ms': 25.0, 'p99_ms': 20.0, 'throughput_per_s': 80.0},
+                   'new': {'p50_ms': 99.0}}
+        regressions = compare(current, baseline, threshold=0.10)
+        self.assertEqual([(r['benchmark'], r['metric']) for r in regressions],
+                         [('a', 'p95_ms'), ('a', 'throughput_per_s')])
+
+    def test_fanout_delivers_every_message_to_every_client(self):
+        report = asyncio.run(fanout(clients=5, messages=3))
+        self.assertEqual(report['delivery']['count'], 15)
+        self.assertEqual(report['broadcast_call']['count'], 3)
+
+    @unittest.skipIf(sys.platform == 'win32', "the virtual station needs a pty")
+    def test_pipeline_measures_station_to_client_latency(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {'LOG_DIR': os.path.join(tmp, 'logs')}):
+            report = asyncio.run(pipeline(readings=3, interval=0.05))
+        self.assertEqual(report['count'], 3)
+        self.assertGreaterEqual(report['p50_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sklearn.linear_model import Ridge
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.forecast_strategies import compare_strategies, slice_columns
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, multi_output
+from tests.test_prediction_executor import make_history
+
+
+class CountingRidge(Ridge):
+    """Ridge that counts predict calls"""
+    calls = 0
+
+    def predict(self, X):
+        CountingRidge.calls += 1
+        return super().predict(X)
+
+
+class TestDirectForecast(unittest.TestCase):
+    def setUp(self):
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models = {param: Ridge() for param in self.predictor.WEATHER_PARAMS}
+        self.history = make_history(400)
+        asyncio.run(self.predictor.train_model(self.history))
+
+    def test_all_leads_from_one_call_per_parameter(self):
+        metrics = asyncio.run(self.predictor.train_direct_models(self.history, '1h:24h,3h:7d', 2,
+                                                                 model_factory=CountingRidge))
+        self.assertEqual(set(metrics), set(self.predictor.WEATHER_PARAMS))
+        self.assertEqual(self.predictor.direct_models['leads'][-3:], [42, 45, 48])
+
+        CountingRidge.calls = 0
+        direct = asyncio.run(self.predictor.predict_weather(self.history[-200:], 2, '1h:24h,3h:7d', 'direct'))
+        recursive = asyncio.run(self.predictor.predict_weather(self.history[-200:], 2, '1h:24h,3h:7d'))
+        self.assertEqual(CountingRidge.calls, len(self.predictor.WEATHER_PARAMS))
+        self.assertEqual(len(direct), 24 + 8)
+        self.assertEqual([step['timestamp'] for step in direct], [step['timestamp'] for step in recursive])
+        self.assertNotEqual(direct[-1]['temperature'], recursive[-1]['temperature'])
+
+    def test_uncovered_horizons_fall_back_to_recursive(self):
+        asyncio.run(self.predictor.train_direct_models(self.history, '1h:24h,6h:7d', 2,
+                                                       model_factory=Ridge))
+        self.predictor.forecast_strategy = 'direct'
+        fallback = asyncio.run(self.predictor.predict_weather(self.history[-200:], 2, '1h'))
+        self.predictor.forecast_strategy = 'recursive'
+        recursive = asyncio.run(self.predictor.predict_weather(self.history[-200:], 2, '1h'))
+        self.assertEqual(fallback, recursive)
+
+    def test_direct_models_persist_and_report_compares_strategies(self):
+        asyncio.run(self.predictor.train_direct_models(self.history, '1h:24h,6h:7d', 2, model_factory=Ridge))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ensemble.joblib')
+            self.assertTrue(self.predictor.save_models(path))
+            loaded = EnhancedWeatherPredictor()
+            self.assertTrue(loaded.load_models(path))
+        self.assertEqual(loaded.direct_models['leads'], self.predictor.direct_models['leads'])
+        self.assertIsInstance(multi_output(Ridge()), Ridge)
+
+        data = hourly_columns(1200)
+        train = slice_columns(data, 0, 500)
+        asyncio.run(self.predictor.train_model(train))
+        asyncio.run(self.predictor.train_direct_models(train, '1h:24h,6h:7d', model_factory=Ridge))
+        report = compare_strategies(self.predictor, data, '1h:24h,6h:7d', origins=3, repeats=1)
+        self.assertEqual(set(report), {'recursive', 'direct'})
+        for row in report.values():
+            self.assertGreater(row['latency_ms_p50'], 0)
+            self.assertGreaterEqual(row['rmse_days2_7'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
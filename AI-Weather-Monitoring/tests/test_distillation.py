@@ -0,0 +1,67 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.distillation import distill, save_student, synthesize
+from src.core.predictor.model_search import load_features, training_matrices
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, build_ensemble
+
+SMALL_TEACHER = {'rf_estimators': 20, 'rf_max_depth': 8, 'xgb_estimators': 20, 'gbm_estimators': 20}
+
+
+class TestDistillation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        history = os.path.join(self.tmp.name, 'history.csv')
+        pd.DataFrame(hourly_columns(900)).to_csv(history, index=False)
+        self.features = load_features([history])
+        self.teacher = EnhancedWeatherPredictor()
+        self.teacher.models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        self.teacher.student_path = os.path.join(self.tmp.name, 'student.joblib')
+        for param, (X, y) in training_matrices(self.features, horizon=0).items():
+            self.teacher.models[param] = build_ensemble(SMALL_TEACHER).fit(X[:600], y[:600])
+        self.teacher.save_models()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_synthetic_rows_stay_near_real_rows(self):
+        X = training_matrices(self.features, horizon=0)['temperature'][0]
+        rows = synthesize(X, 1000, np.random.default_rng(0))
+        self.assertEqual(rows.shape, (1000, X.shape[1]))
+        self.assertTrue(np.all(rows.mean(axis=0) - X.mean(axis=0) < X.std(axis=0)))
+
+    def test_students_are_faster_and_close_to_teacher(self):
+        result = distill(self.teacher.models, self.features, synthetic_rows=2000, holdout=0.3)
+        report = result['report']
+        self.assertEqual(set(report['students']), {'gbm', 'linear', 'tree'})
+        self.assertEqual(set(result['models']), {'temperature', 'humidity', 'pressure'})
+        for student in report['students'].values():
+            self.assertGreater(student['speedup'], 1)
+            self.assertLess(student['size_ratio'], 1)
+            self.assertLess(abs(student['rmse_delta']), 0.5)
+        self.assertGreater(report['labelled_rows'], 3 * 2000)
+
+    def test_latency_budget_selects_student(self):
+        result = distill(self.teacher.models, self.features, synthetic_rows=500, students=['tree'])
+        report = result['report']
+        self.assertTrue(save_student(self.teacher.student_path, result['models'], self.teacher.scalers, report))
+
+        predictor = EnhancedWeatherPredictor()
+        predictor.models_path, predictor.student_path = self.teacher.models_path, self.teacher.student_path
+        self.assertEqual(predictor.select_models(), 'teacher')
+        teacher_ms = report['teacher']['latency_ms']
+        self.assertEqual(predictor.select_models(budget_ms=teacher_ms * 2), 'teacher')
+        self.assertEqual(predictor.select_models(budget_ms=teacher_ms / 2), 'student')
+        self.assertEqual(predictor.models_meta['kind'], 'tree')
+        forecast = asyncio.run(predictor.predict_weather(hourly_columns(100), days_ahead=1))
+        self.assertEqual(len(forecast), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
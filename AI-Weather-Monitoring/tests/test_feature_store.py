@@ -0,0 +1,104 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_features import hourly_columns, make_predictor
+from src.core.predictor.feature_store import FEATURE_ROWS, FEATURE_VERSION, FeatureStore
+from src.core.predictor.offline_training import train_out_of_core
+from src.core.predictor.streaming_features import iter_history
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'store')
+        self.columns = hourly_columns(1500)
+        self.history = os.path.join(self.tmp.name, 'history.csv')
+        pd.DataFrame(self.columns).to_csv(self.history, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_matches_prepare_features(self):
+        store = FeatureStore(self.root, segment_rows=400)
+        self.assertEqual(store.ingest('roof', [self.history], chunk_rows=137), 1500)
+        scalers = {}
+        loaded = store.load('roof', scalers=scalers)
+        expected = EnhancedWeatherPredictor().prepare_features(self.columns).reset_index(drop=True)
+
+        self.assertEqual(list(loaded.columns), list(expected.columns))
+        numeric = [col for col in expected.columns if col not in ('datetime', 'temp_humidity_ratio')]
+        np.testing.assert_allclose(loaded[numeric].to_numpy(), expected[numeric].to_numpy(), rtol=1e-5, atol=1e-4)
+        # A ratio of two scaled values near zero magnifies float32 rounding
+        np.testing.assert_allclose(loaded['temp_humidity_ratio'], expected['temp_humidity_ratio'], rtol=1e-3)
+        self.assertEqual(set(scalers), {'temperature', 'humidity', 'pressure'})
+
+        # A time range keeps its rolling warm-up from the stored readings before it
+        start = float(self.columns['timestamp'][1000])
+        window = store.load('roof', start=start)
+        self.assertEqual(len(window), 500)
+        self.assertEqual(window['timestamp'].iloc[0], start)
+
+    def test_only_new_rows_are_computed(self):
+        store = FeatureStore(self.root, segment_rows=400)
+        chunks = list(iter_history([self.history], chunk_rows=1000))
+        self.assertEqual(store.update('roof', chunks[0]), 1000)
+
+        computed = FEATURE_ROWS.labels(op='computed').value
+        # The overlapping re-delivery of the first chunk is skipped
+        self.assertEqual(store.update('roof', pd.concat([chunks[0], chunks[1]], ignore_index=True)), 500)
+        self.assertEqual(FEATURE_ROWS.labels(op='computed').value - computed, 500)
+        self.assertEqual(store.ingest('roof', [self.history]), 0)
+
+        whole = FeatureStore(os.path.join(self.tmp.name, 'whole'))
+        whole.ingest('roof', [self.history])
+        pd.testing.assert_frame_equal(store.load('roof'), whole.load('roof'))
+        self.assertEqual(store.info('roof')['segments'], 4)
+
+    def test_evicts_least_recently_used_dataset(self):
+        store = FeatureStore(self.root)
+        store.ingest('a', [self.history])
+        size = store.info('a')['bytes']
+        store.max_bytes = int(size * 2.5)
+        stale = os.path.join(self.root, 'a', 'old-version')
+        os.makedirs(stale)
+        with open(os.path.join(stale, 'x.bin'), 'wb') as f:
+            f.write(b'\0' * size)
+        store.ingest('b', [self.history])
+        self.assertFalse(os.path.exists(stale))
+
+        store.load('a')
+        store.ingest('c', [self.history])
+        self.assertEqual(store.stations(), ['a', 'c'])
+        self.assertTrue(os.path.isdir(os.path.join(self.root, 'a', FEATURE_VERSION)))
+
+    def test_station_ids_stay_inside_the_root(self):
+        store = FeatureStore(self.root)
+        chunk = next(iter_history([self.history], chunk_rows=100))
+        store.update('../escape', chunk)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'escape')))
+        self.assertEqual(store.info('../escape')['rows'], 100)
+        self.assertEqual(len(store.columns('../escape')['timestamp']), 100)
+
+    def test_training_reuses_stored_features(self):
+        output = os.path.join(self.tmp.name, 'ensemble.joblib')
+        kwargs = dict(chunk_rows=300, horizon=1, rounds=3, feature_store=self.root, station='roof')
+        first = train_out_of_core([self.history], output, **kwargs)
+        second = train_out_of_core([self.history], output, **kwargs)
+        self.assertEqual(first['feature_store_new_rows'], 1500)
+        self.assertEqual(second['feature_store_new_rows'], 0)
+        self.assertEqual(first['feature_rows'], second['feature_rows'])
+
+        predictor = make_predictor('light')
+        metrics = asyncio.run(predictor.train_model([], features=FeatureStore(self.root).load(
+            'roof', scalers=predictor.scalers)))
+        self.assertEqual(set(metrics), {'temperature', 'humidity', 'pressure'})
+
+
+if __name__ == '__main__':
+    unittest.main()
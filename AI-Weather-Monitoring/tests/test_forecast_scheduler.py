@@ -0,0 +1,109 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+
+from src.core.predictor.forecast_scheduler import ForecastScheduler
+from src.utils.clock import SystemClock, VirtualClock, set_clock
+
+
+class FakeExecutor:
+    """Counts rollouts; each takes a little real time so requests can pile up"""
+
+    def __init__(self):
+        self.predictor = None
+        self.calls = []
+
+    async def predict_station(self, station_id, recent_data, days_ahead=7):
+        self.calls.append(station_id)
+        await asyncio.sleep(0.05)
+        if not recent_data:
+            return []
+        return [{'station': station_id, 'step': step, 'history': len(recent_data)} for step in range(days_ahead * 24)]
+
+
+class TestForecastScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(datetime(2024, 1, 1))
+        set_clock(self.clock)
+        self.executor = FakeExecutor()
+        self.pushed = []
+
+        async def on_update(entry):
+            self.pushed.append(entry['version'])
+
+        self.scheduler = ForecastScheduler(self.executor, lambda station_id: [{}] * 10, ttl=600,
+                                           interval=300, min_new_readings=3, on_update=on_update)
+
+    def tearDown(self):
+        set_clock(SystemClock())
+
+    def test_concurrent_reads_share_one_rollout(self):
+        async def run():
+            entries = await asyncio.gather(*(self.scheduler.get('north') for _ in range(50)))
+            again = await self.scheduler.get('north')
+            return entries, again
+
+        entries, again = asyncio.run(run())
+        self.assertEqual(self.executor.calls, ['north'])
+        self.assertTrue(all(entry is entries[0] for entry in entries))
+        self.assertIs(again, entries[0])
+        self.assertEqual(len(entries[0]['forecast']), 168)
+
+    def test_new_data_and_ttl_trigger_recomputation(self):
+        async def run():
+            first = await self.scheduler.get('north')
+            for _ in range(2):
+                self.scheduler.notify('north')
+            self.assertNotIn('north', self.scheduler.inflight)
+            self.scheduler.notify('north')
+            await self.scheduler.inflight['north']
+            second = await self.scheduler.get('north', known_version=first['version'])
+            self.assertIsNone(await self.scheduler.get('north', known_version=second['version']))
+            self.clock.advance(601)
+            third = await self.scheduler.get('north', known_version=second['version'])
+            return first, second, third
+
+        first, second, third = asyncio.run(run())
+        self.assertEqual(len(self.executor.calls), 3)
+        self.assertEqual((first['version'], second['version']), ('default:0', 'default:3'))
+        self.assertGreater(third['computed_at'], second['computed_at'])
+        self.assertEqual(self.pushed, ['default:0', 'default:3', 'default:3'])
+
+    def test_empty_forecasts_are_cached_briefly(self):
+        scheduler = ForecastScheduler(self.executor, lambda station_id: [], ttl=600, empty_ttl=30,
+                                      min_new_readings=3)
+
+        async def run():
+            entries = [await scheduler.get('new-station') for _ in range(5)]
+            self.clock.advance(31)
+            entries.append(await scheduler.get('new-station'))
+            return entries
+
+        entries = asyncio.run(run())
+        self.assertEqual([entry['forecast'] for entry in entries], [[]] * 6)
+        self.assertEqual(self.executor.calls, ['new-station'] * 2)
+        self.assertEqual(entries[0]['expires_at'] - entries[0]['computed_at'], 30)
+
+    def test_cadence_refreshes_known_stations_and_route_serves_cache(self):
+        async def run():
+            self.scheduler.notify('north')
+            self.scheduler.notify('south')
+            self.scheduler.start()
+            # Let the loop's virtual sleep elapse and the refreshes finish
+            while len(self.scheduler.cache) < 2:
+                await asyncio.sleep(0.01)
+            response = await self.scheduler._forecast_request({'station': 'south'})
+            version = json.loads(response[2])['version']
+            not_modified = await self.scheduler._forecast_request({'station': 'south', 'version': version})
+            await self.scheduler.close()
+            return response, not_modified
+
+        response, not_modified = asyncio.run(run())
+        self.assertEqual(sorted(self.executor.calls[:2]), ['north', 'south'])
+        self.assertEqual(response[0], '200 OK')
+        self.assertEqual(not_modified[0], '304 Not Modified')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from sklearn.linear_model import Ridge
+
+from src.core.predictor.weather_predictor import (
+    EnhancedWeatherPredictor, horizon_offsets, horizon_steps, parse_horizons
+)
+from tests.test_prediction_executor import make_history
+
+
+class TestHorizonSpec(unittest.TestCase):
+    def test_offsets_follow_segments(self):
+        offsets = horizon_offsets(parse_horizons('1h:24h,3h:7d'), 7 * 24)
+        self.assertEqual(len(offsets), 24 + 48)
+        self.assertEqual(offsets[22:26], [23, 24, 27, 30])
+        self.assertEqual(offsets[-1], 168)
+        self.assertEqual(horizon_offsets(parse_horizons('1h'), 48), list(range(1, 49)))
+        # The last step carries on past the end of the spec
+        self.assertEqual(horizon_offsets(parse_horizons('1h:2h,6h:12h'), 24), [1, 2, 8, 14, 20])
+        self.assertEqual(horizon_steps('1h:24h,3h:7d', 168), {1, 3})
+        for bad in ('', '0h', '1h:24h,3h:12h', '1x'):
+            with self.assertRaises(ValueError):
+                parse_horizons(bad)
+
+
+class TestVariableResolutionForecast(unittest.TestCase):
+    def setUp(self):
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models = {param: Ridge() for param in self.predictor.WEATHER_PARAMS}
+        self.history = make_history(400)
+        asyncio.run(self.predictor.train_model(self.history))
+
+    def forecast(self, spec: str):
+        return asyncio.run(self.predictor.predict_weather(self.history[-200:], 2, spec))
+
+    def test_without_step_models_coarse_steps_match_hourly_rollout(self):
+        hourly = self.forecast('1h')
+        coarse = self.forecast('1h:12h,3h:2d')
+        leads = horizon_offsets(parse_horizons('1h:12h,3h:2d'), 48)
+        self.assertEqual(len(hourly), 48)
+        self.assertEqual([step['timestamp'] for step in coarse], [hourly[lead - 1]['timestamp'] for lead in leads])
+        self.assertEqual([step['pressure'] for step in coarse], [hourly[lead - 1]['pressure'] for lead in leads])
+
+    def test_step_models_replace_hourly_hops_and_persist(self):
+        metrics = asyncio.run(self.predictor.train_step_models(self.history, [3], model_factory=Ridge))
+        self.assertEqual(set(metrics), {3})
+        self.assertEqual(set(self.predictor.step_models[3]), set(self.predictor.WEATHER_PARAMS))
+
+        coarse = self.forecast('1h:12h,3h:2d')
+        hourly = self.forecast('1h')
+        self.assertEqual(len(coarse), 24)
+        self.assertEqual(datetime.fromisoformat(coarse[12]['timestamp']) - datetime.fromisoformat(coarse[11]['timestamp']),
+                         datetime.fromisoformat(hourly[14]['timestamp']) - datetime.fromisoformat(hourly[11]['timestamp']))
+        self.assertNotEqual(coarse[12]['pressure'], hourly[14]['pressure'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ensemble.joblib')
+            self.assertTrue(self.predictor.save_models(path))
+            loaded = EnhancedWeatherPredictor()
+            self.assertTrue(loaded.load_models(path))
+        self.assertEqual(set(loaded.step_models), {3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import logging
+import os
+import queue
+import tempfile
+import unittest
+from unittest import mock
+
+from src.utils import logger as logger_module
+from src.utils.logger import RateLimitedQueueHandler
+
+
+class TestQueuedLogging(unittest.TestCase):
+    def setUp(self):
+        self.queue = queue.Queue()
+        self.handler = RateLimitedQueueHandler(self.queue, window=60)
+        self.logger = logging.getLogger('tests.queued_logging')
+        self.logger.handlers = [self.handler]
+        self.logger.propagate = False
+
+    def drain(self):
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait().getMessage())
+        return messages
+
+    def test_repeats_are_suppressed_and_summarised(self):
+        with mock.patch('src.utils.logger.time.monotonic', return_value=100.0):
+            for value in (150.0, 151.5, 152.0):
+                self.logger.error(f"Invalid humidity value: {value}")
+            self.logger.error("Missing required weather parameters")
+        self.assertEqual(self.drain(), ["Invalid humidity value: 150.0", "Missing required weather parameters"])
+
+        with mock.patch('src.utils.logger.time.monotonic', return_value=161.0):
+            self.logger.error("Invalid humidity value: 153.0")
+        self.assertEqual(self.drain(),
+                         ["Invalid humidity value: 153.0 (suppressed 2 times in the last 60s)"])
+
+    def test_flush_reports_pending_suppressions(self):
+        for _ in range(4):
+            self.logger.warning("BMP180 Error!")
+        self.handler.flush_suppressed()
+        self.assertEqual(self.drain(), ["BMP180 Error!", "BMP180 Error! (suppressed 3 times in the last 60s)"])
+
+    def test_sweep_reports_messages_that_stop_recurring(self):
+        with mock.patch('src.utils.logger.time.monotonic', return_value=100.0):
+            for _ in range(3):
+                self.logger.warning("BMP180 Error!")
+            self.handler.sweep()
+        self.assertEqual(self.drain(), ["BMP180 Error!"])
+        with mock.patch('src.utils.logger.time.monotonic', return_value=161.0):
+            self.handler.sweep()
+        self.assertEqual(self.drain(), ["BMP180 Error! (suppressed 2 times in the last 60s)"])
+
+    def test_sweeper_thread_summarises_without_further_records(self):
+        handler = RateLimitedQueueHandler(self.queue, window=0.05)
+        self.logger.handlers = [handler]
+        handler.start_sweeper()
+        try:
+            for _ in range(3):
+                self.logger.warning("BMP180 Error!")
+            self.assertEqual(self.queue.get(timeout=1).getMessage(), "BMP180 Error!")
+            self.assertEqual(self.queue.get(timeout=1).getMessage(),
+                             "BMP180 Error! (suppressed 2 times in the last 0.05s)")
+        finally:
+            handler.close()
+
+    def test_setup_logging_writes_rotating_file_from_listener_thread(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, 'station.log')
+            with mock.patch.dict(os.environ, {'LOG_MAX_BYTES': '200', 'LOG_BACKUP_COUNT': '2'}):
+                logger_module.stop_logging()
+                try:
+                    logger_module.setup_logging('INFO', log_file)
+                    first = logger_module._listener
+                    logger_module.setup_logging('DEBUG', os.path.join(tmp, 'other.log'))
+                    self.assertIs(logger_module._listener, first)
+                    log = logging.getLogger('tests.rotation')
+                    for i in range(20):
+                        log.info(f"reading {'x' * i} accepted")
+                finally:
+                    logger_module.stop_logging()
+            self.assertTrue(os.path.exists(log_file + '.1'))
+            self.assertFalse(os.path.exists(os.path.join(tmp, 'other.log')))
+
+
+if __name__ == '__main__':
+    unittest.main()
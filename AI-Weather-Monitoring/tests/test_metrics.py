@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+
+from src.utils.metrics import MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram('read_seconds', 'Read time', ['method'], buckets=(0.01, 0.1))
+        child = histogram.labels(method='serial')
+        for value in (0.005, 0.01, 0.05, 2.0):
+            child.observe(value)
+        text = self.registry.render()
+        self.assertIn('# TYPE read_seconds histogram', text)
+        self.assertIn('read_seconds_bucket{method="serial",le="0.01"} 2', text)
+        self.assertIn('read_seconds_bucket{method="serial",le="0.1"} 3', text)
+        self.assertIn('read_seconds_bucket{method="serial",le="+Inf"} 4', text)
+        self.assertIn('read_seconds_count{method="serial"} 4', text)
+
+    def test_counters_gauges_and_reregistration(self):
+        dropped = self.registry.counter('dropped_total', 'Dropped', ['reason'])
+        dropped.labels(reason='malformed').inc()
+        dropped.labels(reason='malformed').inc(2)
+        self.assertIs(self.registry.counter('dropped_total', 'Dropped', ['reason']), dropped)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('dropped_total', 'Dropped')
+        queue = []
+        depth = self.registry.gauge('queue_depth', 'Depth')
+        depth.set_function(lambda: len(queue))
+        queue.extend([1, 2])
+        text = self.registry.render()
+        self.assertIn('dropped_total{reason="malformed"} 3.0', text)
+        self.assertIn('queue_depth 2.0', text)
+
+    def test_endpoint_serves_prometheus_text(self):
+        self.registry.counter('readings_total', 'Readings').inc()
+
+        async def scrape(path):
+            server = MetricsServer(self.registry, port=0)
+            await server.start()
+            try:
+                reader, writer = await asyncio.open_connection(server.host, server.port)
+                writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+                response = await reader.read()
+                writer.close()
+                return response.decode()
+            finally:
+                await server.stop()
+
+        response = asyncio.run(scrape('/metrics'))
+        self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+        self.assertIn('readings_total 1.0', response)
+        self.assertTrue(asyncio.run(scrape('/nope')).startswith('HTTP/1.1 404'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import joblib
+from sklearn.linear_model import Ridge
+
+from src.core.predictor.model_registry import ModelRegistry
+from src.core.predictor.prediction_executor import PredictionExecutor
+from src.core.predictor.retraining import ModelVersions
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+from tests.test_prediction_executor import make_history
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'stations')
+        self.default_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def promote(self, station_id: str, bundle) -> str:
+        os.makedirs(os.path.join(self.root, station_id), exist_ok=True)
+        versions = ModelVersions(os.path.join(self.root, station_id))
+        version = versions.new_version()
+        joblib.dump(bundle, versions.path(version))
+        versions.add(version, {}, 'candidate')
+        versions.promote(version, os.path.join(self.tmp.name, f'{station_id}-serving.joblib'))
+        return version
+
+    def test_stations_map_to_versions_and_share_default(self):
+        joblib.dump({'models': 'default'}, self.default_path)
+        version = self.promote('north', {'models': 'north'})
+        registry = ModelRegistry(EnhancedWeatherPredictor()._read_bundle, self.root, self.default_path)
+
+        async def run():
+            return [(await registry.get(station))['models'] for station in ('north', 'south', 'east', 'north')]
+
+        self.assertEqual(asyncio.run(run()), ['north', 'default', 'default', 'north'])
+        self.assertEqual(registry.version_for('north'), version)
+        self.assertIsNone(registry.version_for('south'))
+        self.assertEqual((registry.counts['miss'], registry.counts['hit']), (2, 2))
+
+    def test_concurrent_requests_share_one_load(self):
+        loads = []
+
+        def loader(path):
+            loads.append(threading.current_thread().name)
+            time.sleep(0.1)
+            return {'models': path}
+
+        registry = ModelRegistry(loader, self.root, self.default_path)
+
+        async def run():
+            return await asyncio.gather(*(registry.get(f'station-{i}') for i in range(10)))
+
+        bundles = asyncio.run(run())
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(all(bundle is bundles[0] for bundle in bundles))
+        self.assertEqual((registry.counts['miss'], registry.counts['coalesced']), (1, 9))
+
+    def test_dot_station_ids_stay_under_root(self):
+        # A version promoted in the parent of root must not be served for '..'
+        parent = ModelVersions(self.tmp.name)
+        version = parent.new_version()
+        joblib.dump({'models': 'parent'}, parent.path(version))
+        parent.add(version, {}, 'candidate')
+        parent.promote(version, os.path.join(self.tmp.name, 'parent-serving.joblib'))
+        self.assertEqual(ModelVersions(self.tmp.name).current, version)
+
+        registry = ModelRegistry(EnhancedWeatherPredictor()._read_bundle, self.root, self.default_path)
+        for station in ('..', '.'):
+            self.assertIsNone(registry.version_for(station))
+            self.assertEqual(registry.path_for(station), self.default_path)
+
+    def test_missing_bundle_raises(self):
+        registry = ModelRegistry(EnhancedWeatherPredictor()._read_bundle, self.root, self.default_path)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(registry.get('north'))
+
+    def test_least_recently_used_evicted_over_budget(self):
+        for station in 'abcd':
+            self.promote(station, {'models': station})
+        loads = []
+        # Each bundle in memory adds 50 "bytes" to a 100 byte baseline
+        registry = ModelRegistry(lambda path: loads.append(path) or {'models': path},
+                                 self.root, self.default_path, rss_budget=210,
+                                 memory_probe=lambda: 100 + 50 * (len(loads) - registry.counts['evicted']))
+
+        async def run():
+            for station in 'abc':
+                await registry.get(station)
+            await registry.get('b')
+            await registry.get('d')
+
+        asyncio.run(run())
+        self.assertEqual(list(registry.loaded), [registry.path_for('b'), registry.path_for('d')])
+        self.assertEqual(registry.counts['evicted'], 2)
+        self.assertEqual(registry.footprints[registry.path_for('a')], 50)
+
+    def test_station_forecast_uses_registry_models(self):
+        predictor = EnhancedWeatherPredictor()
+        predictor.models = {param: Ridge() for param in predictor.WEATHER_PARAMS}
+        history = make_history(300)
+        asyncio.run(predictor.train_model(history))
+        predictor.save_models(self.default_path)
+        expected = asyncio.run(predictor.predict_weather(history[-100:], 1))
+
+        fresh = EnhancedWeatherPredictor()
+        registry = ModelRegistry(fresh._read_bundle, self.root, self.default_path)
+        executor = PredictionExecutor(fresh, model_registry=registry)
+
+        async def run():
+            try:
+                return await executor.predict_station('south', history[-100:], 1)
+            finally:
+                await executor.shutdown()
+
+        forecast = asyncio.run(run())
+        self.assertTrue(forecast)
+        self.assertEqual([step['temperature'] for step in forecast], [step['temperature'] for step in expected])
+        # The shared predictor keeps its own models
+        self.assertNotIsInstance(fresh.models['temperature'], Ridge)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.model_search import (
+    SuccessiveHalvingSearch, load_features, pareto_front, recommend, sample_configs, training_matrices
+)
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+SMALL_SPACE = {
+    'rf_estimators': [0, 5, 10],
+    'rf_max_depth': [3, 6],
+    'xgb_estimators': [0, 5, 10],
+    'xgb_max_depth': [2, 4],
+    'gbm_estimators': [0, 5],
+    'gbm_max_depth': [2],
+    'svr_c': [0.3, 1.0, 3.0]
+}
+
+
+class TestModelSearch(unittest.TestCase):
+    def test_pareto_front_drops_dominated_results(self):
+        results = [
+            {'name': 'a', 'rmse': 1.0, 'latency_ms': 5.0, 'size_bytes': 100},
+            {'name': 'b', 'rmse': 2.0, 'latency_ms': 1.0, 'size_bytes': 100},
+            {'name': 'c', 'rmse': 2.0, 'latency_ms': 5.0, 'size_bytes': 100},
+            {'name': 'd', 'rmse': 3.0, 'latency_ms': 1.0, 'size_bytes': 10}
+        ]
+        front = pareto_front(results)
+        self.assertEqual([r['name'] for r in front], ['a', 'b', 'd'])
+        report = {'pareto': front}
+        self.assertEqual(recommend(report, max_latency_ms=2)['name'], 'b')
+        self.assertEqual(recommend(report, max_latency_ms=2, max_size_bytes=50)['name'], 'd')
+        self.assertIsNone(recommend(report, max_latency_ms=0.5))
+
+    def test_sampled_configs_keep_a_base_model(self):
+        configs = sample_configs(20, np.random.default_rng(0), SMALL_SPACE)
+        self.assertEqual(len(configs), 20)
+        for config in configs:
+            self.assertTrue(config['rf_estimators'] or config['xgb_estimators'] or config['gbm_estimators'])
+
+    def test_search_halves_configs_and_reports_front(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'history.csv')
+            pd.DataFrame(hourly_columns(700)).to_csv(path, index=False)
+            features = load_features([path], max_rows=600)
+        self.assertEqual(len(features), 600)
+
+        search = SuccessiveHalvingSearch(training_matrices(features), budget_s=120, workers=2, n_splits=2,
+                                         min_fraction=1 / 3, space=SMALL_SPACE, include_default=False)
+        report = search.run()
+        self.assertLess(report['elapsed_s'], 120)
+        self.assertEqual(report['fidelity'], 1.0)
+        self.assertTrue(report['pareto'])
+
+        first_bracket = [r for r in report['results'] if r['bracket'] == 1]
+        rungs = sorted({r['fraction'] for r in first_bracket})
+        self.assertEqual(len(rungs), 2)
+        self.assertLess(sum(r['fraction'] == rungs[1] for r in first_bracket),
+                        sum(r['fraction'] == rungs[0] for r in first_bracket))
+        for result in report['pareto']:
+            self.assertGreater(result['latency_ms'], 0)
+            self.assertGreater(result['size_bytes'], 0)
+
+    def test_saved_config_is_used_by_predictor(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ensemble_config.json')
+            with open(path, 'w') as f:
+                json.dump({'rf_estimators': 0, 'xgb_estimators': 20, 'svr_c': 3.0}, f)
+            os.environ['ENSEMBLE_CONFIG'] = path
+            try:
+                model = EnhancedWeatherPredictor().models['temperature']
+            finally:
+                del os.environ['ENSEMBLE_CONFIG']
+        self.assertEqual([name for name, _ in model.estimators], ['xgb', 'gbm'])
+        self.assertEqual(model.estimators[0][1].n_estimators, 20)
+        self.assertEqual(model.final_estimator.C, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
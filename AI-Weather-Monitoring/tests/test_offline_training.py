@@ -0,0 +1,53 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_features import hourly_columns
+from src.core.predictor.offline_training import train_out_of_core
+from src.core.predictor.streaming_features import StreamingFeatureBuilder, collect_stats, iter_features
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+
+class TestOfflineTraining(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.columns = hourly_columns(2000)
+        frame = pd.DataFrame(self.columns)
+        frame.iloc[:1200].to_csv(os.path.join(self.tmp.name, 'part-0.csv'), index=False)
+        frame.iloc[1200:].to_json(os.path.join(self.tmp.name, 'part-1.jsonl'), orient='records', lines=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunked_features_match_prepare_features(self):
+        paths = sorted(os.path.join(self.tmp.name, name) for name in os.listdir(self.tmp.name))
+        stats = collect_stats(paths, chunk_rows=137)
+        builder = StreamingFeatureBuilder(stats)
+        streamed = pd.concat(list(iter_features(paths, builder, chunk_rows=137)), ignore_index=True)
+        expected = EnhancedWeatherPredictor().prepare_features(self.columns).reset_index(drop=True)
+
+        self.assertEqual(list(streamed.drop(columns='row').columns), list(expected.columns))
+        numeric = [col for col in expected.columns if col != 'datetime']
+        np.testing.assert_allclose(streamed[numeric].to_numpy(), expected[numeric].to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_artifact_loads_into_predictor(self):
+        output = os.path.join(self.tmp.name, 'models', 'ensemble.joblib')
+        report = train_out_of_core([self.tmp.name], output, chunk_rows=300, horizon=1, rounds=5,
+                                   max_train_rows=1000)
+        self.assertEqual(report['rows'], 2000)
+        self.assertLess(report['train_rows'], 1200)
+        self.assertEqual(set(report['metrics']), {'temperature', 'humidity', 'pressure'})
+        self.assertGreater(report['seconds_per_million_rows'], 0)
+
+        predictor = EnhancedWeatherPredictor()
+        self.assertTrue(predictor.load_models(output))
+        forecast = asyncio.run(predictor.predict_weather(hourly_columns(100), days_ahead=1))
+        self.assertEqual(len(forecast), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
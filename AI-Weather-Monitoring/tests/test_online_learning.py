@@ -0,0 +1,81 @@
+import asyncio
+import pickle
+import unittest
+from unittest import mock
+
+from sklearn.linear_model import Ridge
+
+from benchmarks.bench_features import hourly_readings
+from src.core.predictor.online_learning import OnlineLearner
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+
+
+class TestOnlineLearning(unittest.TestCase):
+    def setUp(self):
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models = {param: Ridge() for param in self.predictor.WEATHER_PARAMS}
+
+    def stream(self, learner: OnlineLearner, readings, batch: int = 24):
+        for start in range(0, len(readings), batch):
+            learner.update(readings[start:start + batch])
+
+    def test_sgd_learns_and_installs_after_warm_up(self):
+        learner = OnlineLearner(self.predictor, mode='sgd', min_updates=5)
+        readings = hourly_readings(24 * 60)
+        self.stream(learner, readings[:24 * 4])
+        self.assertIsInstance(self.predictor.models['temperature'], Ridge)
+
+        self.stream(learner, readings[24 * 4:])
+        self.assertIs(self.predictor.models['temperature'], learner.learners['temperature'])
+        self.assertEqual(self.predictor.models_meta['version'], f'online-sgd-{learner.updates}')
+        # Scaled temperature swings by about +-2.5; a converged model is far closer than that
+        self.assertLess(learner.rmse('temperature'), 0.5)
+
+    def test_every_labelled_row_is_used_once(self):
+        learner = OnlineLearner(self.predictor, mode='sgd', min_updates=0)
+        readings = hourly_readings(500)
+        used = sum(learner.update(readings[start:start + 30]) for start in range(0, 500, 30))
+        # 23 warm-up rows never produce features and the last row has no label yet
+        self.assertEqual(used, 500 - 23 - 1)
+
+    def test_xgb_update_cost_is_bounded(self):
+        learner = OnlineLearner(self.predictor, mode='xgb', min_updates=0, max_trees=20, rounds_per_update=5)
+        readings = hourly_readings(24 * 40)
+        self.stream(learner, readings[:24 * 10])
+        self.assertEqual(learner.learners['pressure'].n_trees, 20)
+        size = len(pickle.dumps(learner.learners['pressure'].booster))
+
+        # Refresh-only updates keep the ensemble the same size however long it runs
+        self.stream(learner, readings[24 * 10:])
+        self.assertEqual(learner.learners['pressure'].n_trees, 20)
+        self.assertLess(abs(len(pickle.dumps(learner.learners['pressure'].booster)) - size), size * 0.1)
+        self.assertLessEqual(len(learner.windows.carry), 24)
+        self.assertLess(learner.rmse('temperature'), 0.5)
+
+    def test_observe_batches_readings(self):
+        learner = OnlineLearner(self.predictor, mode='sgd', batch_size=24, min_updates=0)
+
+        async def run():
+            return [await learner.observe(reading) for reading in hourly_readings(72)]
+
+        updated = asyncio.run(run())
+        self.assertEqual(sum(updated), 2)
+        self.assertEqual(learner.updates, 2)
+
+    def test_warm_up_batch_does_not_publish(self):
+        executor = mock.Mock(reload_models=mock.AsyncMock())
+        learner = OnlineLearner(self.predictor, executor, mode='sgd', batch_size=24, min_updates=0, publish_every=1)
+        self.assertFalse(learner.publish_due)
+
+        with mock.patch.object(self.predictor, 'save_models', return_value=True) as save:
+            async def run():
+                return [await learner.observe(reading) for reading in hourly_readings(48)]
+
+            updated = asyncio.run(run())
+        self.assertEqual(updated.count(True), 1)
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(executor.reload_models.await_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import unittest
+
+from src.service.pipeline import (
+    MAX_STATION_ID_BYTES, PipelineSupervisor, _load_test_predictor, decode_ranges, decode_readings,
+    encode_ranges, encode_readings, parse_reading, shard_for
+)
+
+
+class TestPipelineCodec(unittest.TestCase):
+    def test_readings_round_trip(self):
+        readings = [('station-1', 1700000000.5, 21.5, 55.0, 1012.25), ('s2', 1700000001.0, -3.0, 90.0, 990.0)]
+        decoded = decode_readings(encode_readings(readings))
+        self.assertEqual([tuple(r.values()) for r in decoded], readings)
+
+    def test_long_non_ascii_station_ids_round_trip(self):
+        # Share a 16-byte prefix and put a multibyte character across byte 16
+        north, south = 'Sметеостанция-север-№1', 'Sметеостанция-юг-№2'
+        readings = [(north, 1.0, 20.0, 50.0, 1000.0), (south, 2.0, 21.0, 51.0, 1001.0),
+                    (north, 3.0, 22.0, 52.0, 1002.0)]
+        decoded = decode_readings(encode_readings(readings))
+        self.assertEqual([tuple(r.values()) for r in decoded], readings)
+        self.assertEqual(decode_readings(encode_readings([])), [])
+        with self.assertRaises(ValueError):
+            encode_readings([('x' * (MAX_STATION_ID_BYTES + 1), 1.0, 20.0, 50.0, 1000.0)])
+
+    def test_ranges_round_trip(self):
+        ranges = [('station-1', 0, 64), ('Sметеостанция-север-№1', 2 ** 40, 2 ** 40 + 3)]
+        self.assertEqual(decode_ranges(encode_ranges(ranges)), ranges)
+
+    def test_shard_is_stable(self):
+        self.assertEqual(shard_for('station-42', 8), shard_for('station-42', 8))
+        self.assertEqual({shard_for(f'station-{i}', 4) for i in range(100)}, {0, 1, 2, 3})
+
+    def test_parse_reading_rejects_bad_lines(self):
+        self.assertEqual(parse_reading(b'{"temperature": 20, "humidity": 50, "pressure": 1000}'), (20.0, 50.0, 1000.0))
+        self.assertIsNone(parse_reading(b'{"temperature": 20, "humidity": 50}'))
+        self.assertIsNone(parse_reading(b'{"temperature": 20, "humidity": 150, "pressure": 1000}'))
+        self.assertIsNone(parse_reading(b'not json'))
+
+
+class TestPipelineSupervisor(unittest.TestCase):
+    def test_end_to_end(self):
+        supervisor = PipelineSupervisor(ingestion_workers=2, inference_workers=1,
+                                        predictor_factory=_load_test_predictor, batch_size=8)
+        supervisor.start()
+        line = json.dumps({'temperature': 21.0, 'humidity': 60.0, 'pressure': 1010.0}).encode()
+        for i in range(50):
+            supervisor.submit(f'station-{i % 5}', line)
+        supervisor.submit('station-0', b'garbage')
+        with self.assertRaises(ValueError):
+            supervisor.submit('s' * (MAX_STATION_ID_BYTES + 1), line)
+        report = supervisor.stop()
+
+        self.assertEqual(sum(v['accepted'] for k, v in report.items() if k.startswith('ingestion')), 50)
+        self.assertEqual(sum(v['rejected'] for k, v in report.items() if k.startswith('ingestion')), 1)
+        self.assertEqual(report['inference-0']['processed'], 50)
+        self.assertEqual(report['broadcast-0']['messages'], 50)
+
+    def test_inference_reads_shared_history(self):
+        supervisor = PipelineSupervisor(ingestion_workers=2, inference_workers=2,
+                                        predictor_factory=_load_test_predictor, batch_size=8,
+                                        history_capacity=256)
+        supervisor.start()
+        for i in range(60):
+            line = json.dumps({'temperature': 20.0 + i % 7, 'humidity': 60.0, 'pressure': 1010.0}).encode()
+            supervisor.submit(f'station-{i % 3}', line)
+        supervisor.flush()
+        report = supervisor.stop()
+
+        self.assertEqual(sum(v['processed'] for k, v in report.items() if k.startswith('inference')), 60)
+        self.assertEqual(sum(v['overrun'] for k, v in report.items() if k.startswith('inference')), 0)
+        self.assertEqual(report['broadcast-0']['messages'], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
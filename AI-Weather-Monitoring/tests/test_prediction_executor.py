@@ -0,0 +1,127 @@
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+from sklearn.linear_model import Ridge
+
+from src.core.predictor.prediction_executor import PredictionExecutor
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor, build_ensemble
+from src.utils.loop_lag import LoopLagProbe
+
+
+def make_history(hours: int):
+    start = datetime(2024, 1, 1)
+    rng = np.random.default_rng(0)
+    return [{
+        'timestamp': (start + timedelta(hours=i)).isoformat(),
+        'temperature': 20 + 5 * np.sin(i / 24 * 2 * np.pi) + rng.normal(0, 0.3),
+        'humidity': 60 + rng.normal(0, 3),
+        'pressure': 1010 + rng.normal(0, 1)
+    } for i in range(hours)]
+
+
+class SlowPredictor(EnhancedWeatherPredictor):
+    """Hangs in both entry points; module level so forecast workers can unpickle it"""
+
+    def process_sensor_data(self, data):
+        time.sleep(0.5)
+        return data
+
+    async def predict_weather(self, recent_data, days_ahead=7):
+        time.sleep(30)
+        return []
+
+
+class TestPredictionExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models = {param: Ridge() for param in self.predictor.WEATHER_PARAMS}
+        self.predictor.models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        self.executor = PredictionExecutor(self.predictor, max_processes=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_training_keeps_loop_responsive(self):
+        # The served stacking ensemble, with fewer trees per base model so the fit takes seconds
+        predictor = EnhancedWeatherPredictor()
+        small = {'rf_estimators': 20, 'xgb_estimators': 20, 'gbm_estimators': 20}
+        predictor.models = {param: build_ensemble(small) for param in predictor.WEATHER_PARAMS}
+        predictor.models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        self.executor = PredictionExecutor(predictor, max_processes=1)
+        history = make_history(400)
+        # Mirror WeatherApp.run, which freezes start-up objects out of the collector
+        gc.collect()
+        gc.freeze()
+        self.addCleanup(gc.unfreeze)
+
+        async def scenario():
+            # The bound is for the retrain; the first forecast also pays for spawning its worker
+            async with LoopLagProbe(interval=0.002) as probe:
+                metrics = await self.executor.train_model(history)
+            forecast = await self.executor.predict_weather(history[-48:], days_ahead=1)
+            await self.executor.shutdown()
+            return probe, metrics, forecast
+
+        probe, metrics, forecast = asyncio.run(scenario())
+        self.assertEqual(set(metrics), {'temperature', 'humidity', 'pressure'})
+        self.assertTrue(os.path.exists(predictor.models_path))
+        self.assertEqual(len(forecast), 24)
+        self.assertGreater(len(probe.samples), 10)
+        self.assertLess(probe.max_lag, 0.01, probe.summary())
+
+    def test_training_timeout_terminates_job(self):
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor.train_model(make_history(2000), timeout=0.01)
+            await self.executor.shutdown()
+
+        asyncio.run(scenario())
+        self.assertFalse(os.path.exists(self.predictor.models_path))
+
+    def test_training_installs_models_in_the_parent(self):
+        served = self.predictor.models
+
+        async def scenario():
+            metrics = await self.executor.train_model(make_history(200))
+            await self.executor.shutdown()
+            return metrics
+
+        self.assertTrue(asyncio.run(scenario()))
+        self.assertIsNot(self.predictor.models, served)
+        self.assertEqual(set(self.predictor.models), set(self.predictor.WEATHER_PARAMS))
+
+    def test_slow_reading_times_out(self):
+        executor = PredictionExecutor(SlowPredictor(), reading_timeout=0.05)
+
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await executor.process_sensor_data({'temperature': 20.0})
+            await executor.shutdown()
+
+        asyncio.run(scenario())
+
+    def test_running_forecast_timeout_retires_workers(self):
+        executor = PredictionExecutor(SlowPredictor(), max_processes=1)
+
+        async def scenario():
+            pool = await executor._get_forecast_pool()
+            with self.assertRaises(asyncio.TimeoutError):
+                await executor.predict_weather(make_history(48), days_ahead=1, timeout=5)
+            # Later forecasts do not queue behind the hung job
+            self.assertIsNot(executor.forecast_pool, pool)
+            for process in list(pool._processes.values()):
+                process.terminate()
+            await executor.shutdown()
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from src.utils.metrics import MetricsRegistry, MetricsServer
+from src.utils.profiler import Profiler
+from src.utils.stage_timer import StageTimer
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = Profiler(output_dir=self.tmp.name, sample_interval=0.002,
+                                 slow_callback_threshold=0.02)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_session_writes_tagged_profiles(self):
+        timer = StageTimer()
+
+        async def block_loop():
+            with timer.track('prediction'):
+                busy(0.05)
+
+        async def scenario():
+            self.profiler.start(tag='unit')
+            await asyncio.create_task(block_loop())
+            leaked = [bytearray(1024) for _ in range(200)]
+            await asyncio.sleep(0.01)
+            files = self.profiler.stop()
+            del leaked
+            return files
+
+        files = asyncio.run(scenario())
+        self.assertEqual(set(files), {'cpu', 'memory', 'memory_snapshot', 'slow'})
+        self.assertTrue(all(os.path.basename(path).startswith(tuple('0123456789')) and '-unit-' in path
+                            for path in files.values()))
+        with open(files['cpu']) as f:
+            folded = f.read()
+        self.assertIn('stage:prediction', folded)
+        self.assertIn('test_profiler.py:busy', folded)
+        with open(files['slow']) as f:
+            slow = json.load(f)['callbacks']
+        self.assertTrue(any('block_loop' in record['callback'] for record in slow))
+        self.assertFalse(self.profiler.active)
+
+    def test_interleaved_coroutines_keep_their_own_stage(self):
+        timer = StageTimer()
+
+        async def predict(entered):
+            with timer.track('prediction'):
+                entered.set()
+                await asyncio.sleep(0)
+
+        async def broadcast(entered):
+            await entered.wait()
+            with timer.track('broadcast'):
+                await asyncio.sleep(0.01)  # prediction leaves its stage meanwhile
+                busy(0.05)
+
+        async def scenario():
+            self.profiler.start(modes=['cpu', 'slow'], tag='interleaved')
+            entered = asyncio.Event()
+            await asyncio.gather(predict(entered), broadcast(entered))
+            return self.profiler.stop()
+
+        files = asyncio.run(scenario())
+        with open(files['slow']) as f:
+            slow = json.load(f)['callbacks']
+        self.assertEqual([record['stage'] for record in slow if 'broadcast' in record['callback']],
+                         ['broadcast'])
+        with open(files['cpu']) as f:
+            busy_stacks = [line for line in f if 'test_profiler.py:busy' in line]
+        self.assertTrue(busy_stacks)
+        self.assertTrue(all('stage:broadcast' in line for line in busy_stacks))
+
+    def test_admin_endpoint_runs_bounded_session(self):
+        async def request(server, method, path):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            response = (await reader.read()).decode()
+            writer.close()
+            return response.split('\r\n', 1)[0], json.loads(response.split('\r\n\r\n', 1)[1])
+
+        async def scenario():
+            server = MetricsServer(MetricsRegistry(), port=0)
+            self.profiler.register_routes(server)
+            await server.start()
+            try:
+                started = await request(server, 'POST', '/profile?seconds=0.1&modes=cpu&tag=admin-test')
+                conflict = await request(server, 'POST', '/profile?seconds=1')
+                await asyncio.sleep(0.3)
+                status = await request(server, 'GET', '/profile')
+            finally:
+                await self.profiler.close()
+                await server.stop()
+            return started, conflict, status
+
+        started, conflict, status = asyncio.run(scenario())
+        self.assertEqual(started[0], 'HTTP/1.1 202 Accepted')
+        self.assertEqual(conflict[0], 'HTTP/1.1 409 Conflict')
+        self.assertFalse(status[1]['active'])
+        self.assertEqual(set(status[1]['last_files']), {'cpu'})
+
+
+if __name__ == '__main__':
+    unittest.main()
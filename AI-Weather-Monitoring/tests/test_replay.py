@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime
+
+from replay import replay, synthetic_recording
+from src.utils.clock import SystemClock, VirtualClock, get_clock, set_clock
+
+
+class TestReplay(unittest.TestCase):
+    def tearDown(self):
+        set_clock(SystemClock())
+
+    def test_virtual_clock_sleep_does_not_wait(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        asyncio.run(clock.sleep(3600))
+        self.assertEqual(clock.now(), datetime(2024, 1, 1, 1))
+        clock.set(datetime(2023, 1, 1))
+        self.assertEqual(clock.now(), datetime(2024, 1, 1, 1))
+
+    def test_replay_runs_full_pipeline_on_virtual_time(self):
+        readings = synthetic_recording(days=0.25, interval=300, start=datetime(2024, 1, 1))
+        readings[3]['humidity'] = 150.0
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {'LOG_DIR': os.path.join(tmp, 'logs')}):
+            report = asyncio.run(replay(readings, os.path.join(tmp, 'cache.json')))
+
+        self.assertEqual(report['readings'], 72)
+        self.assertEqual(report['processed'], 71)
+        self.assertEqual((report['rejected'], report['dropped']), (1, 0))
+        self.assertEqual(report['stages']['validation']['count'], 72)
+        self.assertEqual(set(report['stages']), {'validation', 'prediction', 'broadcast', 'storage'})
+        self.assertGreater(report['speedup'], 1)
+        self.assertGreaterEqual(get_clock().now(), readings[-1]['recorded_at'])
+
+    def test_replay_waits_for_a_full_station_queue(self):
+        readings = synthetic_recording(days=0.5, interval=300, start=datetime(2024, 1, 1))
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {'LOG_DIR': os.path.join(tmp, 'logs'), 'STATION_QUEUE_SIZE': '4'}):
+            report = asyncio.run(replay(readings, os.path.join(tmp, 'cache.json')))
+
+        self.assertEqual(report['readings'], 144)
+        self.assertEqual((report['processed'], report['rejected'], report['dropped']), (144, 0, 0))
+
+    def test_readings_are_stored_at_their_recorded_times(self):
+        readings = synthetic_recording(days=0.01, interval=1, start=datetime(2024, 1, 1))[:30]
+        later = synthetic_recording(days=0.05, interval=60, start=datetime(2024, 1, 1, 1))[:30]
+        readings += later
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {'LOG_DIR': os.path.join(tmp, 'logs'), 'UPDATE_INTERVAL': '5'}):
+            cache_file = os.path.join(tmp, 'cache.json')
+            report = asyncio.run(replay(readings, cache_file))
+            # Saved behind the loop, and flushed on shutdown
+            with open(cache_file) as f:
+                stored = json.load(f)
+
+        self.assertEqual(report['processed'], 60)
+        self.assertEqual([entry['timestamp'] for entry in stored],
+                         [reading['recorded_at'].timestamp() for reading in readings])
+        self.assertEqual(get_clock().now(), readings[-1]['recorded_at'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+from src.service.resampling import PARAMS, Resampler, TimeGrid, parse_interval
+
+START = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def fast_samples(seconds: int, every: int = 5):
+    """Readings every ``every`` seconds whose values are their offset from START"""
+    times = START + np.arange(0, seconds, every, dtype=float)
+    values = np.repeat((times - START)[:, None], len(PARAMS), axis=1)
+    return times, values
+
+
+class TestResampling(unittest.TestCase):
+    def test_parse_interval(self):
+        self.assertEqual(parse_interval('5s'), 5)
+        self.assertEqual(parse_interval('1m'), 60)
+        self.assertEqual(parse_interval('1h'), 3600)
+        with self.assertRaises(ValueError):
+            parse_interval('1w')
+
+    def test_averages_fast_samples_into_minutes_and_hours(self):
+        times, values = fast_samples(2 * 3600)
+        minutes, hours = TimeGrid(60, '1m'), TimeGrid(3600, '1h')
+        for grid in (minutes, hours):
+            grid.add(times, values)
+            grid.flush()
+        self.assertEqual(len(minutes), 120)
+        self.assertEqual(len(hours), 2)
+        window = minutes.window(3)
+        np.testing.assert_array_equal(window['timestamp'], START + np.array([117, 118, 119]) * 60.0)
+        # Twelve samples at 0, 5, ..., 55 seconds into each minute average to 27.5
+        np.testing.assert_allclose(window['temperature'], np.array([117, 118, 119]) * 60 + 27.5)
+        np.testing.assert_allclose(hours.window()['pressure'], [1797.5, 3600 + 1797.5])
+
+    def test_incremental_matches_batch(self):
+        times, values = fast_samples(3 * 3600, every=7)
+        batch = TimeGrid(60)
+        batch.add(times, values)
+        incremental = TimeGrid(60)
+        for chunk in np.array_split(np.arange(len(times)), 37):
+            incremental.add(times[chunk], values[chunk])
+        for _ in range(50):
+            incremental.add_reading(dict(zip(PARAMS, values[-1])), times[-1])
+            batch.add([times[-1]], values[-1:])
+        for column, expected in batch.window().items():
+            np.testing.assert_allclose(incremental.window()[column], expected)
+        self.assertEqual(incremental.open_bin, batch.open_bin)
+
+    def test_fill_policies(self):
+        times = START + np.array([0.0, 60, 240, 300, 900, 960])
+        values = np.repeat(np.array([[1.0], [2], [5], [6], [10], [11]]), len(PARAMS), axis=1)
+        expected = {
+            'ffill': [1, 2, 2, 2, 5, 6] + [np.nan] * 9 + [10],
+            'interpolate': [1, 2, 3, 4, 5, 6] + [np.nan] * 9 + [10],
+            'nan': [1, 2, np.nan, np.nan, 5, 6] + [np.nan] * 9 + [10],
+        }
+        for fill, column in expected.items():
+            grid = TimeGrid(60, fill=fill, max_gap=3)
+            grid.add(times, values)
+            window = grid.window()
+            np.testing.assert_array_equal(window['timestamp'], START + np.arange(16) * 60.0)
+            np.testing.assert_allclose(window['humidity'], column, err_msg=fill)
+
+    def test_fills_each_parameter_from_its_own_last_value(self):
+        grid = TimeGrid(60, fill='interpolate')
+        grid.add_reading({'temperature': 10.0, 'humidity': 50.0, 'pressure': 1000.0}, START)
+        grid.add_reading({'temperature': 12.0, 'humidity': None, 'pressure': 1001.0}, START + 60)
+        grid.add_reading({'temperature': 14.0, 'humidity': 60.0, 'pressure': 1002.0}, START + 120)
+        grid.flush()
+        np.testing.assert_allclose(grid.window()['humidity'], [50, 55, 60])
+        np.testing.assert_allclose(grid.window()['temperature'], [10, 12, 14])
+
+    def test_drops_late_readings_and_wraps_the_ring(self):
+        times, values = fast_samples(3600, every=60)
+        grid = TimeGrid(60, capacity=16)
+        grid.add(times, values)
+        grid.add([times[10]], values[:1])
+        self.assertEqual(grid.late, 1)
+        grid.flush()
+        self.assertEqual(len(grid), 16)
+        window = grid.window()
+        np.testing.assert_array_equal(window['timestamp'], times[-16:])
+        np.testing.assert_allclose(window['temperature'], values[-16:, 0])
+        grid.add([times[-1]], values[:1])
+        self.assertEqual(grid.late, 2)
+
+    def test_resampler_keeps_stations_apart_and_feeds_prepare_features(self):
+        resampler = Resampler('1m,1h', fill='ffill', max_gap=2, capacity=500)
+        for hour in range(60):
+            for station, offset in (('north', 0.0), ('south', 10.0)):
+                resampler.add({'station_id': station, 'temperature': 20.0 + offset + np.sin(hour / 4),
+                               'humidity': 60.0 + hour % 7, 'pressure': 1010.0 + hour % 5},
+                              START + hour * 3600 + 30)
+        self.assertEqual(set(resampler.grids), {'north', 'south'})
+        north, south = resampler.window('north', '1h'), resampler.window('south', '1h')
+        self.assertEqual(len(north['timestamp']), 59)
+        np.testing.assert_allclose(south['temperature'] - north['temperature'], 10.0)
+        # Readings an hour apart are more than max_gap minutes apart, so the minutes between stay empty
+        minutes = resampler.window('north', '1m', 30)['temperature']
+        self.assertTrue(np.isnan(minutes[:-1]).all())
+        self.assertAlmostEqual(minutes[-1], north['temperature'][-1])
+
+        features = EnhancedWeatherPredictor().prepare_features(north)
+        self.assertEqual(len(features), 59 - 23)
+
+    def test_add_many_accepts_reading_dicts(self):
+        readings = [{'timestamp': f'2024-01-01T00:{minute:02d}:00', 'temperature': float(minute),
+                     'humidity': 50.0, 'pressure': 1000.0} for minute in range(0, 60, 10)]
+        resampler = Resampler('30m', fill='nan', max_gap=0)
+        resampler.add_many(readings, 'north')
+        resampler.flush()
+        window = resampler.window('north', '30m')
+        np.testing.assert_allclose(window['temperature'], [10.0, 40.0])
+        self.assertEqual(window['timestamp'][0], 1704067200.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import gc
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.linear_model import Ridge
+
+from benchmarks.bench_features import hourly_readings
+from src.core.predictor.retraining import ModelVersions, RetrainingManager
+from src.core.predictor.weather_predictor import EnhancedWeatherPredictor
+from src.utils.loop_lag import LoopLagProbe
+
+
+class TestRetraining(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.predictor = EnhancedWeatherPredictor()
+        self.predictor.models = {param: Ridge() for param in self.predictor.WEATHER_PARAMS}
+        self.predictor.models_path = os.path.join(self.tmp.name, 'ensemble.joblib')
+        self.manager = RetrainingManager(self.predictor, versions_dir=os.path.join(self.tmp.name, 'versions'),
+                                         training_interval=300, min_data_points=100, drift_threshold=0.5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_volume_triggers_retrain_and_hot_swap(self):
+        gc.collect()
+        gc.freeze()
+        self.addCleanup(gc.unfreeze)
+
+        async def scenario():
+            for reading in hourly_readings(299):
+                self.manager.observe(reading)
+            self.assertFalse(self.manager.maybe_retrain())
+            self.manager.observe(hourly_readings(300)[-1])
+            served = self.predictor.models
+            async with LoopLagProbe(interval=0.002) as probe:
+                self.assertTrue(self.manager.maybe_retrain())
+                self.assertFalse(self.manager.maybe_retrain())
+                while not self.manager._task.done():
+                    # Inference keeps running on the served models during training
+                    self.predictor.process_sensor_data(hourly_readings(1)[0])
+                    await asyncio.sleep(0.01)
+            report = self.manager._task.result()
+            return served, probe, report
+
+        served, probe, report = asyncio.run(scenario())
+        self.assertEqual(report['outcome'], 'promoted')
+        self.assertEqual(report['reason'], 'volume')
+        self.assertIsNone(report['incumbent_rmse'])
+        self.assertIsNot(self.predictor.models, served)
+        self.assertEqual(self.predictor.models_meta['version'], report['version'])
+        self.assertTrue(os.path.exists(self.predictor.models_path))
+        self.assertLess(probe.max_lag, 0.05, probe.summary())
+
+    def test_rejects_worse_candidate_and_rolls_back(self):
+        async def scenario():
+            for reading in hourly_readings(400):
+                self.manager.observe(reading)
+            first = await self.manager.retrain()
+            second = await self.manager.retrain()
+            self.manager.tolerance = -0.5
+            rejected = await self.manager.retrain()
+            rolled_back = await self.manager.rollback()
+            return first, second, rejected, rolled_back
+
+        first, second, rejected, rolled_back = asyncio.run(scenario())
+        self.assertEqual([first['outcome'], second['outcome'], rejected['outcome']],
+                         ['promoted', 'promoted', 'rejected'])
+        self.assertIsNotNone(second['incumbent_rmse'])
+        self.assertFalse(os.path.exists(self.manager.versions.path(rejected['version'])))
+        self.assertEqual(rolled_back, first['version'])
+        self.assertEqual(self.predictor.models_meta['version'], first['version'])
+        versions = ModelVersions(self.manager.versions.root)
+        self.assertEqual(versions.current, first['version'])
+        self.assertEqual(versions.registry['versions'][second['version']]['status'], 'rolled_back')
+
+    def test_forecast_drift_triggers_retrain(self):
+        self.manager.errors = type(self.manager.errors)(maxlen=10)
+        readings = hourly_readings(150)
+        for reading in readings[:100]:
+            self.manager.observe(reading)
+        self.manager.new_readings = 0
+
+        def forecast_for(batch, offset):
+            return [{**r, 'temperature': r['temperature'] + offset} for r in batch]
+
+        self.manager.track_forecast(forecast_for(readings[100:110], 0.5))
+        for reading in readings[100:110]:
+            self.manager.observe(reading)
+        self.assertIsNone(self.manager.retrain_reason())
+        self.assertAlmostEqual(self.manager.baseline_error, np.sqrt(0.25 / 3))
+
+        self.manager.track_forecast(forecast_for(readings[110:120], 3.0))
+        for reading in readings[110:120]:
+            self.manager.observe(reading)
+        self.assertEqual(self.manager.retrain_reason(), 'drift')
+
+    def test_scaled_forecasts_are_scored_in_reading_units(self):
+        readings = hourly_readings(200)
+        recent = readings[:168]
+        asyncio.run(self.predictor.train_model(readings))
+        forecast = asyncio.run(self.predictor.predict_weather(recent, 1))
+        self.manager.track_forecast(forecast, recent)
+        tracked = self.manager.forecasts[self.manager._hour_key(forecast[0]['timestamp'])]
+        scaler = self.predictor.scalers['pressure']
+        self.assertAlmostEqual(tracked['pressure'], forecast[0]['pressure'] * scaler.scale_[0] + scaler.center_[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import multiprocessing
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from src.service.pipeline import _load_test_predictor
+from src.utils.shared_ring_buffer import SharedRingBuffer
+
+
+def _sum_latest(name, n, results):
+    reader = SharedRingBuffer.attach(name)
+    window = reader.latest(n)
+    results.put((float(window['temperature'].sum()), window.is_valid()))
+    del window
+    reader.close()
+
+
+class TestSharedRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = SharedRingBuffer.create(capacity=8)
+
+    def tearDown(self):
+        self.buffer.close()
+        self.buffer.unlink()
+
+    def rows(self, start, count):
+        return [(float(i), 20.0 + i, 50.0, 1000.0) for i in range(start, start + count)]
+
+    def test_latest_window_is_contiguous_view_after_wrap(self):
+        for row in self.rows(0, 13):
+            self.buffer.append(row)
+        window = self.buffer.latest(8)
+        np.testing.assert_array_equal(window['timestamp'], np.arange(5, 13, dtype=float))
+        self.assertIsNotNone(window['timestamp'].base)
+        self.assertTrue(window.is_valid())
+        del window
+
+    def test_extend_matches_append(self):
+        self.buffer.extend(np.array(self.rows(0, 11)))
+        self.assertEqual(self.buffer.sequence, 11)
+        window = self.buffer.latest(3)
+        np.testing.assert_array_equal(window['temperature'], [28.0, 29.0, 30.0])
+        del window
+
+    def test_window_invalidated_when_overwritten(self):
+        self.buffer.extend(np.array(self.rows(0, 4)))
+        window = self.buffer.latest(4)
+        self.buffer.extend(np.array(self.rows(4, 6)))
+        self.assertFalse(window.is_valid())
+        with self.assertRaises(ValueError):
+            self.buffer.window(0, 4)
+        del window
+
+    def test_reader_in_other_process(self):
+        self.buffer.extend(np.array(self.rows(0, 6)))
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        process = ctx.Process(target=_sum_latest, args=(self.buffer.name, 4, results))
+        process.start()
+        total, valid = results.get(timeout=30)
+        process.join()
+        self.assertEqual(total, sum(20.0 + i for i in range(2, 6)))
+        self.assertTrue(valid)
+
+    def test_predictor_reads_window_in_place(self):
+        rows = [(1_700_000_000.0 + 60 * i, 15.0 + 3 * i, 40.0 + 5 * i, 1000.0 + i) for i in range(5)]
+        self.buffer.extend(np.array(rows))
+        predictor = _load_test_predictor()
+        window = self.buffer.latest(5)
+        results = predictor.process_sensor_columns(window.columns)
+        del window
+        readings = [dict(zip(('timestamp', 'temperature', 'humidity', 'pressure'), row))
+                    for row in rows]
+        expected = predictor.process_sensor_batch(readings)
+        self.assertEqual([r['prediction'] for r in results], [r['prediction'] for r in expected])
+        self.assertEqual([r['current']['temperature'] for r in results], [r['temperature'] for r in readings])
+        self.assertEqual(results[0]['current']['timestamp'], datetime.fromtimestamp(1_700_000_000).isoformat())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import sys
+import unittest
+
+from src.service.device_manager import DeviceManager
+from src.simulator.virtual_station import StationSimulator, VirtualStation
+
+
+class TestVirtualStation(unittest.TestCase):
+    @unittest.skipIf(sys.platform == 'win32', "pty serial pairs need a POSIX system")
+    def test_device_manager_reads_serial_and_wifi(self):
+        async def scenario():
+            station = VirtualStation('station-0001', interval=0.02, seed=1)
+            await station.start()
+            serial_device, wifi_device = DeviceManager(), DeviceManager()
+            try:
+                self.assertTrue(await serial_device.connect('serial', port=station.serial_path, timeout=1))
+                serial_reading = await serial_device.read_data()
+                self.assertTrue(await wifi_device.connect('wifi', ip=station.http_host, port=station.http_port))
+                wifi_reading = await wifi_device.read_data()
+            finally:
+                await serial_device.disconnect()
+                await wifi_device.disconnect()
+                await station.stop()
+            return serial_reading, wifi_reading
+
+        serial_reading, wifi_reading = asyncio.run(scenario())
+        for reading in (serial_reading, wifi_reading):
+            self.assertEqual(set(reading), {'temperature', 'humidity', 'pressure', 'timestamp', 'station_id'})
+            self.assertEqual(reading['station_id'], 'default')
+
+    def test_dropouts_and_malformed_lines(self):
+        async def scenario():
+            simulator = StationSimulator(3, seed=7, interval=0.005, dropout_rate=0.3,
+                                         malformed_rate=0.3, use_pty=False)
+            await simulator.start()
+            await asyncio.sleep(0.5)
+            station = simulator.stations[0]
+            reader, writer = await asyncio.open_connection(station.http_host, station.http_port)
+            writer.write(b'GET /history HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+            await simulator.stop()
+            return simulator.describe(), response
+
+        summary, response = asyncio.run(scenario())
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'))
+        self.assertEqual(len(summary), 3)
+        self.assertTrue(all(station['dropped'] > 0 for station in summary))
+        station = VirtualStation('x', malformed_rate=1.0, seed=3)
+        self.assertEqual(station.counters['malformed'], 0)
+        station.render_line(station.next_reading())
+        self.assertEqual(station.counters['malformed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
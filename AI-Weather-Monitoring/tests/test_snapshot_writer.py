@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.utils.snapshot_writer import SNAPSHOT_WRITES, SnapshotWriter, write_json_atomic
+
+
+class TestSnapshotWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'current_state.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_bursts_coalesce_into_rate_limited_writes(self):
+        async def scenario():
+            writer = SnapshotWriter(self.path, min_interval=0.1, fsync=False)
+            writer.start()
+            before = SNAPSHOT_WRITES.labels().value
+            for i in range(500):
+                writer.update({'timestamp': i})
+                if i % 100 == 0:
+                    await asyncio.sleep(0.02)
+            await asyncio.sleep(0.15)
+            written = SNAPSHOT_WRITES.labels().value - before
+            latest = self.read()
+            await writer.close()
+            return written, latest
+
+        written, latest = asyncio.run(scenario())
+        self.assertLessEqual(written, 3)
+        self.assertEqual(latest, {'timestamp': 499})
+        self.assertEqual(os.listdir(self.tmp.name), ['current_state.json'])
+
+    def test_keyed_snapshot_holds_all_stations_in_one_file(self):
+        async def scenario():
+            writer = SnapshotWriter(self.path, min_interval=10, keyed=True, fsync=False)
+            writer.start()
+            for station in range(50):
+                writer.update({'temperature': 20 + station}, key=f'station-{station:04d}')
+            writer.update({'temperature': 99}, key='station-0000')
+            await writer.close()
+
+        asyncio.run(scenario())
+        stations = self.read()['stations']
+        self.assertEqual(len(stations), 50)
+        self.assertEqual(stations['station-0000'], {'temperature': 99})
+
+
+    def test_close_waits_for_the_write_in_flight(self):
+        started = threading.Event()
+
+        def slow_write(*args):
+            started.set()
+            time.sleep(0.1)
+            write_json_atomic(*args)
+
+        async def scenario():
+            writer = SnapshotWriter(self.path, min_interval=0, fsync=False)
+            writer.start()
+            writer.update({'timestamp': 1})
+            while not started.is_set():
+                await asyncio.sleep(0.005)
+            await writer.close()
+            return os.path.exists(self.path)
+
+        with mock.patch('src.utils.snapshot_writer.write_json_atomic', slow_write):
+            written = asyncio.run(scenario())
+        self.assertTrue(written)
+        self.assertEqual(self.read(), {'timestamp': 1})
+
+    def test_concurrent_atomic_writes_use_separate_temp_files(self):
+        errors = []
+
+        def write_many(i):
+            try:
+                for _ in range(200):
+                    write_json_atomic(self.path, {'writer': i, 'padding': 'x' * 4096}, fsync=False)
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write_many, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertIn(self.read()['writer'], range(4))
+        self.assertEqual(os.listdir(self.tmp.name), ['current_state.json'])
+
+if __name__ == '__main__':
+    unittest.main()
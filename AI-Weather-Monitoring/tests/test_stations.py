@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import unittest
+
+import websockets
+
+from src.core.predictor.weather_predictor import DEFAULT_STATION, EnhancedWeatherPredictor
+from src.service.service import ALL_STATIONS, WeatherService, topic_for
+from src.service.stations import StationRouter, parse_stations, station_path
+
+
+class TestStationConfig(unittest.TestCase):
+    def test_parse_stations(self):
+        stations = parse_stations('north=wifi:192.168.4.10, south=serial:COM3,south=wifi:10.0.0.2')
+        self.assertEqual(stations['north'], [('wifi', {'ip': '192.168.4.10'})])
+        self.assertEqual([method for method, _ in stations['south']], ['serial', 'wifi'])
+        self.assertEqual(parse_stations(''), {DEFAULT_STATION: []})
+        with self.assertRaises(ValueError):
+            parse_stations('north=bluetooth:x')
+
+    def test_topics_and_paths(self):
+        self.assertEqual(topic_for('/stations/north'), 'north')
+        self.assertEqual(topic_for('/stations/north?token=1'), 'north')
+        self.assertEqual(topic_for('/'), ALL_STATIONS)
+        self.assertEqual(station_path('../etc'), '.._etc')
+        for station_id in ('.', '..', '...', ''):
+            path = os.path.normpath(os.path.join('stations', station_path(station_id)))
+            self.assertEqual(os.path.dirname(path), 'stations', station_id)
+        self.assertNotEqual(station_path('.'), station_path('..'))
+
+
+class TestStationRouter(unittest.TestCase):
+    def test_stations_are_ordered_and_independent(self):
+        handled = []
+
+        async def handler(reading):
+            if reading['station_id'] == 'slow':
+                await asyncio.sleep(0.05)
+            handled.append((reading['station_id'], reading['seq']))
+
+        async def run():
+            router = StationRouter(handler)
+            for seq in range(5):
+                router.submit({'station_id': 'slow', 'seq': seq})
+                router.submit({'station_id': 'fast', 'seq': seq})
+            await asyncio.sleep(0.01)
+            # The slow station's backlog does not hold up the fast one
+            self.assertEqual([seq for station, seq in handled if station == 'fast'], list(range(5)))
+            await router.close()
+
+        asyncio.run(run())
+        self.assertEqual([seq for station, seq in handled if station == 'slow'], list(range(5)))
+
+    def test_full_backlog_drops_only_that_station(self):
+        async def run():
+            router = StationRouter(lambda reading: asyncio.sleep(1), queue_size=2)
+            accepted = [router.submit({'station_id': 'a'}) for _ in range(4)]
+            self.assertTrue(router.submit({'station_id': 'b'}))
+            await router.close(drain=False)
+            return accepted
+
+        # The first reading is taken off the queue once the drain task runs
+        self.assertEqual(asyncio.run(run()), [True, True, False, False])
+
+    def test_put_waits_for_a_full_backlog(self):
+        handled = []
+
+        async def handler(reading):
+            await asyncio.sleep(0.001)
+            handled.append(reading['seq'])
+
+        async def run():
+            router = StationRouter(handler, queue_size=2)
+            for seq in range(20):
+                await router.put({'station_id': 'a', 'seq': seq})
+            await router.close()
+
+        asyncio.run(run())
+        self.assertEqual(handled, list(range(20)))
+
+    def test_predictor_buffers_per_station(self):
+        predictor = EnhancedWeatherPredictor()
+        reading = {'temperature': 20.0, 'humidity': 50.0, 'pressure': 1010.0}
+        predictor.process_sensor_batch([{**reading, 'station_id': 'a'}, reading, {**reading, 'station_id': 'a'}])
+        self.assertEqual(len(predictor.station_buffers['a']), 2)
+        self.assertEqual(len(predictor.data_buffer), 1)
+
+
+class TestStationTopics(unittest.TestCase):
+    def test_clients_receive_only_their_station(self):
+        async def run():
+            service = WeatherService(websocket_host='127.0.0.1', websocket_port=0, metrics_port=0)
+            await service.start_websocket_server()
+            url = f'ws://127.0.0.1:{service.websocket_port}'
+            await service.broadcast_data({'station_id': 'north', 'seq': 0})
+            async with websockets.connect(f'{url}/stations/north') as north, \
+                    websockets.connect(f'{url}/stations/south') as south, websockets.connect(url) as everyone:
+                # New subscribers start from their station's latest message
+                self.assertEqual(json.loads(await north.recv())['seq'], 0)
+                while len(service.connected_clients) < 3:
+                    await asyncio.sleep(0.01)
+                await service.broadcast_data({'station_id': 'north', 'seq': 1})
+                await service.broadcast_data({'station_id': 'south', 'seq': 2})
+                self.assertEqual(json.loads(await north.recv())['seq'], 1)
+                self.assertEqual(json.loads(await south.recv())['seq'], 2)
+                self.assertEqual([json.loads(await everyone.recv())['seq'] for _ in range(2)], [1, 2])
+            service.websocket_server.close()
+            await service.websocket_server.wait_closed()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()